@@ -1,4 +1,4 @@
-import asyncio, random, string, threading
+import asyncio, os, random, string, threading, time
 import nest_asyncio
 
 nest_asyncio.apply()
@@ -11,6 +11,7 @@ from enum import Enum
 import models
 
 from python.helpers import (
+    chat_index,
     extract_tools,
     files,
     errors,
@@ -29,7 +30,7 @@ from langchain_core.messages import SystemMessage, BaseMessage
 
 import python.helpers.log as Log
 from python.helpers.dirty_json import DirtyJson
-from python.helpers.defer import DeferredTask
+from python.helpers.defer import DeferredTask, EventLoopPool, get_pool_size
 from typing import Callable
 from python.helpers.localization import Localization
 from python.helpers.extension import call_extensions
@@ -67,6 +68,12 @@ class AgentContext:
     _contexts_lock = threading.RLock()
     _counter: int = 0
     _notification_manager = None
+    # chats are spread over several event loop threads so a blocking call in one does not stall the others
+    _loop_pool = EventLoopPool(
+        "AgentContext",
+        size=get_pool_size("A0_CONTEXT_LOOPS"),
+        strategy=os.getenv("A0_CONTEXT_LOOP_STRATEGY", "least_load"),
+    )
 
     def __init__(
         self,
@@ -102,6 +109,7 @@ class AgentContext:
         self.config = config
         self.data = data or {}
         self.output_data = output_data or {}
+        self._output_version = 0
         self.log = log or Log.Log()
         self.log.context = self
         self.paused = paused
@@ -112,6 +120,7 @@ class AgentContext:
         AgentContext._counter += 1
         self.no = AgentContext._counter
         self.last_message = last_message or datetime.now(timezone.utc)
+        self.last_used = time.time()  # idle contexts are evicted by persist_chat.evict_idle_chats
 
         # initialize agent at last (context is complete now)
         self.agent0 = agent0 or Agent(0, self.config, self)
@@ -119,7 +128,16 @@ class AgentContext:
     @staticmethod
     def get(id: str):
         with AgentContext._contexts_lock:
-            return AgentContext._contexts.get(id, None)
+            context = AgentContext._contexts.get(id, None)
+            if context:
+                context.last_used = time.time()
+                return context
+        # chats on disk are loaded on first use
+        if id and chat_index.is_unloaded(id):
+            from python.helpers import persist_chat
+
+            return persist_chat.hydrate_chat(id)
+        return None
 
     @staticmethod
     def use(id: str):
@@ -144,9 +162,10 @@ class AgentContext:
     @staticmethod
     def first():
         with AgentContext._contexts_lock:
-            if not AgentContext._contexts:
-                return None
-            return list(AgentContext._contexts.values())[0]
+            if AgentContext._contexts:
+                return list(AgentContext._contexts.values())[0]
+        entries = chat_index.entries()
+        return AgentContext.get(entries[0].id) if entries else None
 
     @staticmethod
     def all():
@@ -178,6 +197,8 @@ class AgentContext:
             context = AgentContext._contexts.pop(id, None)
         if context and context.task:
             context.task.kill()
+        if context:
+            AgentContext._loop_pool.release(id)
         return context
 
     def get_data(self, key: str, recursive: bool = True):
@@ -195,6 +216,23 @@ class AgentContext:
     def set_output_data(self, key: str, value: Any, recursive: bool = True):
         # recursive is not used now, prepared for context hierarchy
         self.output_data[key] = value
+        self._output_version += 1
+
+    def output_key(self) -> tuple:
+        """Cheap fingerprint that changes whenever output() does, used to reuse serialized state."""
+        return (
+            self.name,
+            self.no,
+            self.created_at,
+            self.log.guid,
+            self.log.version,
+            len(self.log.logs),
+            self.paused,
+            self.last_message,
+            self.type,
+            self.is_running(),
+            self._output_version,
+        )
 
     def output(self):
         return {
@@ -207,7 +245,7 @@ class AgentContext:
             ),
             "no": self.no,
             "log_guid": self.log.guid,
-            "log_version": len(self.log.updates),
+            "log_version": self.log.version,
             "log_length": len(self.log.logs),
             "paused": self.paused,
             "last_message": (
@@ -286,7 +324,7 @@ class AgentContext:
     ):
         if not self.task:
             self.task = DeferredTask(
-                thread_name=self.__class__.__name__,
+                thread_name=AgentContext._loop_pool.thread_name_for(self.id),
             )
         self.task.start_task(func, *args, **kwargs)
         return self.task
@@ -1041,13 +1079,24 @@ class Agent:
         try:
             if len(stream) < 25:
                 return  # no reason to try
-            response = DirtyJson.parse_string(stream)
-            if isinstance(response, dict):
+
+            # keep one incremental parser per stream, restart if the text was rewritten (masking)
+            parser: DirtyJson | None = self.loop_data.params_temporary.get(
+                "response_stream_parser"
+            )
+            if parser and stream.startswith(parser.json_string):
+                response = parser.feed(stream[len(parser.json_string) :])
+            else:
+                parser = DirtyJson()
+                self.loop_data.params_temporary["response_stream_parser"] = parser
+                response = parser.feed(stream)
+
+            if isinstance(response, dict) and parser.changed:
                 await self.call_extensions(
                     "response_stream",
                     loop_data=self.loop_data,
                     text=stream,
-                    parsed=response,
+                    parsed=parser.snapshot(),
                 )
 
         except Exception as e:
@@ -1071,7 +1120,7 @@ class Agent:
         paths = subagents.get_paths(self, "tools", name + ".py", default_root="python")
         for path in paths:
             try:
-                classes = extract_tools.load_classes_from_file(path, Tool)  # type: ignore[arg-type]
+                classes = extract_tools.load_classes_from_file_cached(path, Tool)  # type: ignore[arg-type]
                 break
             except Exception:
                 continue
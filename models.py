@@ -1,11 +1,18 @@
+import asyncio
+from collections import OrderedDict
+from concurrent.futures import Future
 from dataclasses import dataclass, field
 from enum import Enum
 import logging
 import os
+import queue
+import threading
+import weakref
 from typing import (
     Any,
     Awaitable,
     Callable,
+    Hashable,
     List,
     Optional,
     Iterator,
@@ -14,7 +21,7 @@ from typing import (
     TypedDict,
 )
 
-from litellm import completion, acompletion, embedding
+from litellm import completion, acompletion, embedding, aembedding
 import litellm
 import openai
 from litellm.types.utils import ModelResponse
@@ -24,7 +31,7 @@ from python.helpers import settings, dirty_json
 from python.helpers.dotenv import load_dotenv
 from python.helpers.providers import ModelType as ProviderModelType, get_provider_config
 from python.helpers.rate_limiter import RateLimiter
-from python.helpers.tokens import approximate_tokens
+from python.helpers.tokens import approximate_tokens, estimate_tokens
 from python.helpers import dirty_json, browser_use_monkeypatch
 
 from langchain_core.language_models.chat_models import SimpleChatModel
@@ -198,14 +205,18 @@ rate_limiters: dict[str, RateLimiter] = {}
 api_keys_round_robin: dict[str, int] = {}
 
 
-def get_api_key(service: str) -> str:
-    # get api key for the service
-    key = (
+def _get_raw_api_key(service: str) -> str:
+    return (
         dotenv.get_dotenv_value(f"API_KEY_{service.upper()}")
         or dotenv.get_dotenv_value(f"{service.upper()}_API_KEY")
         or dotenv.get_dotenv_value(f"{service.upper()}_API_TOKEN")
         or "None"
     )
+
+
+def get_api_key(service: str) -> str:
+    # get api key for the service
+    key = _get_raw_api_key(service)
     # if the key contains a comma, use round-robin
     if "," in key:
         api_keys = [k.strip() for k in key.split(",") if k.strip()]
@@ -218,7 +229,8 @@ def get_rate_limiter(
     provider: str, name: str, requests: int, input: int, output: int
 ) -> RateLimiter:
     key = f"{provider}\\{name}"
-    rate_limiters[key] = limiter = rate_limiters.get(key, RateLimiter(seconds=60))
+    # setdefault keeps one limiter when contexts on several loop threads ask at once
+    limiter = rate_limiters.setdefault(key, RateLimiter(seconds=60))
     limiter.limits["requests"] = requests or 0
     limiter.limits["input"] = input or 0
     limiter.limits["output"] = output or 0
@@ -535,7 +547,7 @@ class LiteLLMChatWrapper(SimpleChatModel):
                                 )
                             # Add output tokens to rate limiter if configured
                             if limiter:
-                                limiter.add(output=approximate_tokens(output["reasoning_delta"]))
+                                limiter.add(output=estimate_tokens(output["reasoning_delta"]))
                         # collect response delta and call callbacks
                         if output["response_delta"]:
                             if response_callback:
@@ -547,7 +559,7 @@ class LiteLLMChatWrapper(SimpleChatModel):
                                 )
                             # Add output tokens to rate limiter if configured
                             if limiter:
-                                limiter.add(output=approximate_tokens(output["response_delta"]))
+                                limiter.add(output=estimate_tokens(output["response_delta"]))
 
                 # non-stream response
                 else:
@@ -555,9 +567,9 @@ class LiteLLMChatWrapper(SimpleChatModel):
                     output = result.add_chunk(parsed)
                     if limiter:
                         if output["response_delta"]:
-                            limiter.add(output=approximate_tokens(output["response_delta"]))
+                            limiter.add(output=estimate_tokens(output["response_delta"]))
                         if output["reasoning_delta"]:
-                            limiter.add(output=approximate_tokens(output["reasoning_delta"]))
+                            limiter.add(output=estimate_tokens(output["reasoning_delta"]))
 
                 # Successful completion of stream
                 return result.response, result.reasoning
@@ -667,6 +679,115 @@ class BrowserCompatibleChatWrapper(ChatOpenRouter):
 
         return resp
 
+class EmbeddingBatcher:
+    """Coalesces single query embeddings requested on the same event loop within a short window
+    into one batched embedding call, duplicate texts are embedded once."""
+
+    def __init__(
+        self,
+        embed: Callable[[List[str]], Awaitable[List[List[float]]]],
+        window: float = 0.005,
+        max_batch: int = 64,
+    ):
+        self.embed = embed
+        self.window = window
+        self.max_batch = max_batch
+        self._pending: dict[asyncio.AbstractEventLoop, list[tuple[str, asyncio.Future]]] = {}
+        self.stats = {"requests": 0, "batches": 0}
+
+    async def submit(self, text: str) -> List[float]:
+        loop = asyncio.get_running_loop()
+        pending = self._pending.get(loop)
+        if pending is None:
+            pending = self._pending[loop] = []
+            loop.call_later(self.window, self._schedule_flush, loop, pending)
+        future = loop.create_future()
+        pending.append((text, future))
+        self.stats["requests"] += 1
+        if len(pending) >= self.max_batch:
+            self._schedule_flush(loop, pending)
+        return await future
+
+    def _schedule_flush(self, loop: asyncio.AbstractEventLoop, pending: list):
+        if self._pending.get(loop) is pending:
+            del self._pending[loop]
+            loop.create_task(self._flush(pending))
+
+    async def _flush(self, pending: list[tuple[str, asyncio.Future]]):
+        texts = list(dict.fromkeys(text for text, _ in pending))
+        self.stats["batches"] += 1
+        try:
+            vectors = dict(zip(texts, await self.embed(texts)))
+        except BaseException as e:
+            for _, future in pending:
+                if not future.done():
+                    future.set_exception(e)
+            if not isinstance(e, Exception):
+                raise
+            return
+        for text, future in pending:
+            if not future.done():
+                future.set_result(vectors[text])
+
+
+class QueryEmbeddingCache:
+    """LRU of query embeddings keyed by model and text. Recall, memory tools and consolidation
+    search the same query text several times, document embeddings are cached separately.
+    The model key is the embedding_cache_key of the wrapper, provider, name and settings that change vectors."""
+
+    def __init__(self, size: int = 512, max_chars: int = 16_000):
+        self.size = size
+        self.max_chars = max_chars
+        self._cache: OrderedDict[tuple[Hashable, str], List[float]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0}
+
+    def get(self, model: Hashable, text: str) -> List[float] | None:
+        with self._lock:
+            vector = self._cache.get((model, text))
+            if vector is None:
+                self.stats["misses"] += 1
+                return None
+            self.stats["hits"] += 1
+            self._cache.move_to_end((model, text))
+            return list(vector)
+
+    def put(self, model: Hashable, text: str, vector: List[float]):
+        if len(text) > self.max_chars:
+            return
+        with self._lock:
+            self._cache[(model, text)] = list(vector)
+            while len(self._cache) > self.size:
+                self._cache.popitem(last=False)
+
+    def embed(self, model: Hashable, text: str, embed: Callable[[str], List[float]]) -> List[float]:
+        vector = self.get(model, text)
+        if vector is None:
+            vector = embed(text)
+            self.put(model, text, vector)
+        return vector
+
+    async def aembed(
+        self, model: Hashable, text: str, embed: Callable[[str], Awaitable[List[float]]]
+    ) -> List[float]:
+        vector = self.get(model, text)
+        if vector is None:
+            vector = await embed(text)
+            self.put(model, text, vector)
+        return vector
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+    def get_stats(self) -> dict[str, int]:
+        with self._lock:
+            return {**self.stats, "size": len(self._cache), "max_size": self.size}
+
+
+query_embedding_cache = QueryEmbeddingCache()
+
+
 class LiteLLMEmbeddingWrapper(Embeddings):
     model_name: str
     kwargs: dict = {}
@@ -682,6 +803,13 @@ class LiteLLMEmbeddingWrapper(Embeddings):
         self.model_name = f"{provider}/{model}" if provider != "openai" else model
         self.kwargs = kwargs
         self.a0_model_conf = model_config
+        self.query_batcher = EmbeddingBatcher(self.aembed_documents)
+        # same frozen form as the model cache, the api key does not change vectors
+        self.embedding_cache_key = (
+            provider,
+            model,
+            _freeze({k: v for k, v in kwargs.items() if k != "api_key"}),
+        )
 
     def embed_documents(self, texts: List[str]) -> List[List[float]]:
         # Apply rate limiting if configured
@@ -694,6 +822,9 @@ class LiteLLMEmbeddingWrapper(Embeddings):
         ]
 
     def embed_query(self, text: str) -> List[float]:
+        return query_embedding_cache.embed(self.embedding_cache_key, text, self._embed_query)
+
+    def _embed_query(self, text: str) -> List[float]:
         # Apply rate limiting if configured
         apply_rate_limiter_sync(self.a0_model_conf, text)
 
@@ -701,6 +832,137 @@ class LiteLLMEmbeddingWrapper(Embeddings):
         item = resp.data[0]  # type: ignore
         return item.get("embedding") if isinstance(item, dict) else item.embedding  # type: ignore
 
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        # Apply rate limiting if configured
+        await apply_rate_limiter(self.a0_model_conf, " ".join(texts))
+
+        resp = await aembedding(model=self.model_name, input=texts, **self.kwargs)
+        return [
+            item.get("embedding") if isinstance(item, dict) else item.embedding  # type: ignore
+            for item in resp.data  # type: ignore
+        ]
+
+    async def aembed_query(self, text: str) -> List[float]:
+        # concurrent searches share one embedding request
+        return await query_embedding_cache.aembed(self.embedding_cache_key, text, self.query_batcher.submit)
+
+
+# local sentence-transformers models encode on a dedicated thread per model, "0" runs encodes in the default executor
+_inference_thread = os.getenv("A0_EMBED_INFERENCE_THREAD", "").strip().lower()
+EMBED_INFERENCE_THREAD = _inference_thread not in {"0", "false", "no", "off"}
+# max texts encoded together by the inference thread
+EMBED_MAX_BATCH = 256
+
+
+def _to_list(embeddings: Any) -> List[List[float]]:
+    return embeddings.tolist() if hasattr(embeddings, "tolist") else embeddings  # type: ignore
+
+
+class _InferenceThread:
+    """Encodes requests for one local model on a single thread, requests queued
+    while an encode runs are encoded together in the next batch."""
+
+    def __init__(self, model: SentenceTransformer, name: str):
+        self.model = model
+        self.stats = {"requests": 0, "batches": 0}
+        self._queue: queue.SimpleQueue[tuple[List[str], Future] | None] = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, name=f"embed-{name}", daemon=True)
+        self._thread.start()
+
+    def submit(self, texts: List[str]) -> Future:
+        future: Future = Future()
+        self._queue.put((texts, future))
+        return future
+
+    def stop(self):
+        self._queue.put(None)
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            batch = [item]
+            size = len(item[0])
+            while size < EMBED_MAX_BATCH:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._encode(batch)
+                    return
+                batch.append(item)
+                size += len(item[0])
+            self._encode(batch)
+
+    def _encode(self, batch: list[tuple[List[str], Future]]):
+        batch = [(texts, future) for texts, future in batch if future.set_running_or_notify_cancel()]
+        if not batch:
+            return
+        texts = [text for request, _ in batch for text in request]
+        self.stats["requests"] += len(batch)
+        self.stats["batches"] += 1
+        try:
+            vectors = _to_list(self.model.encode(texts, convert_to_tensor=False))  # type: ignore
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        start = 0
+        for request, future in batch:
+            future.set_result(vectors[start : start + len(request)])
+            start += len(request)
+
+
+@dataclass
+class _LocalModel:
+    model: SentenceTransformer
+    worker: _InferenceThread | None = None
+    refs: int = 0
+
+
+# loaded sentence-transformers models by name and kwargs, unloaded when the last wrapper is gone
+_local_models: dict[tuple, _LocalModel] = {}
+_local_models_lock = threading.Lock()
+
+
+def _acquire_local_model(name: str, st_kwargs: dict) -> tuple[tuple, _LocalModel]:
+    key = (name, _freeze(st_kwargs))
+    with _local_models_lock:
+        entry = _local_models.get(key)
+        if entry is None:
+            model = SentenceTransformer(name, **st_kwargs)
+            worker = _InferenceThread(model, name) if EMBED_INFERENCE_THREAD else None
+            entry = _local_models[key] = _LocalModel(model, worker)
+        entry.refs += 1
+    return key, entry
+
+
+def _release_local_model(key: tuple):
+    with _local_models_lock:
+        entry = _local_models.get(key)
+        if entry is None:
+            return
+        entry.refs -= 1
+        if entry.refs > 0:
+            return
+        del _local_models[key]
+    if entry.worker:
+        entry.worker.stop()
+
+
+def get_local_model_stats() -> list[dict[str, Any]]:
+    with _local_models_lock:
+        return [
+            {
+                "model": key[0],
+                "refs": entry.refs,
+                **(entry.worker.stats if entry.worker else {}),
+            }
+            for key, entry in _local_models.items()
+        ]
+
 
 class LocalSentenceTransformerWrapper(Embeddings):
     """Local wrapper for sentence-transformers models to avoid HuggingFace API calls"""
@@ -730,26 +992,46 @@ class LocalSentenceTransformerWrapper(Embeddings):
         }
         st_kwargs = {k: v for k, v in (kwargs or {}).items() if k in st_allowed_keys}
 
-        self.model = SentenceTransformer(model, **st_kwargs)
+        # weights are loaded once per process and shared by all wrappers of the same model
+        key, self._local = _acquire_local_model(model, st_kwargs)
+        weakref.finalize(self, _release_local_model, key)
+        self.model = self._local.model
         self.model_name = model
         self.a0_model_conf = model_config
+        self.query_batcher = EmbeddingBatcher(self.aembed_documents)
+        self.embedding_cache_key = (provider, *key)
+
+    def _encode(self, texts: List[str]) -> List[List[float]]:
+        if self._local.worker:
+            return self._local.worker.submit(texts).result()
+        return _to_list(self.model.encode(texts, convert_to_tensor=False))  # type: ignore
 
     def embed_documents(self, texts: List[str]) -> List[List[float]]:
         # Apply rate limiting if configured
         apply_rate_limiter_sync(self.a0_model_conf, " ".join(texts))
 
-        embeddings = self.model.encode(texts, convert_to_tensor=False)  # type: ignore
-        return embeddings.tolist() if hasattr(embeddings, "tolist") else embeddings  # type: ignore
+        return self._encode(texts)
 
     def embed_query(self, text: str) -> List[float]:
+        return query_embedding_cache.embed(self.embedding_cache_key, text, self._embed_query)
+
+    def _embed_query(self, text: str) -> List[float]:
         # Apply rate limiting if configured
         apply_rate_limiter_sync(self.a0_model_conf, text)
 
-        embedding = self.model.encode([text], convert_to_tensor=False)  # type: ignore
-        result = (
-            embedding[0].tolist() if hasattr(embedding[0], "tolist") else embedding[0]
-        )
-        return result  # type: ignore
+        return self._encode([text])[0]
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        # Apply rate limiting if configured
+        await apply_rate_limiter(self.a0_model_conf, " ".join(texts))
+
+        if self._local.worker:
+            return await asyncio.wrap_future(self._local.worker.submit(texts))
+        # encoding is CPU bound, keep it off the event loop
+        return await asyncio.to_thread(self._encode, texts)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return await query_embedding_cache.aembed(self.embedding_cache_key, text, self.query_batcher.submit)
 
 
 def _get_litellm_chat(
@@ -901,14 +1183,88 @@ def _merge_provider_defaults(
     return provider_name, kwargs
 
 
+# shared model wrappers, keyed by kind, provider, name, config and kwargs,
+# dropped whenever settings, .env or secrets change (provider defaults and keys come from there)
+_model_cache: dict[tuple, Any] = {}
+_model_cache_version: tuple | None = None
+_model_cache_lock = threading.Lock()
+_model_cache_stats = {"hits": 0, "misses": 0}
+
+
+def _freeze(value: Any) -> Any:
+    if isinstance(value, dict):
+        return tuple(sorted((str(k), _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    if isinstance(value, ModelConfig):
+        return _freeze(value.__dict__)
+    try:
+        hash(value)
+        return value
+    except TypeError:
+        return repr(value)
+
+
+def _rotates_api_key(provider: str, kwargs: dict) -> bool:
+    # comma separated keys are handed out round-robin per created model, those are never shared
+    return "api_key" not in kwargs and "," in _get_raw_api_key(provider)
+
+
+def _get_cached_model(
+    kind: str,
+    provider: str,
+    name: str,
+    model_config: Optional[ModelConfig],
+    kwargs: dict,
+    create: Callable[[], Any],
+):
+    global _model_cache_version
+    if _rotates_api_key(provider, kwargs):
+        return create()
+    key = (kind, provider, name, _freeze(model_config), _freeze(kwargs))
+    version = settings.get_settings_version()
+    with _model_cache_lock:
+        if version != _model_cache_version:
+            _model_cache.clear()
+            _model_cache_version = version
+        model = _model_cache.get(key)
+        if model is not None:
+            _model_cache_stats["hits"] += 1
+            return model
+        _model_cache_stats["misses"] += 1
+
+    model = create()
+    with _model_cache_lock:
+        if version == _model_cache_version:
+            model = _model_cache.setdefault(key, model)
+    return model
+
+
+def clear_model_cache():
+    with _model_cache_lock:
+        _model_cache.clear()
+
+
+def get_model_cache_stats() -> dict[str, Any]:
+    with _model_cache_lock:
+        stats: dict[str, Any] = {**_model_cache_stats, "size": len(_model_cache)}
+    stats["local_models"] = get_local_model_stats()
+    stats["query_embeddings"] = query_embedding_cache.get_stats()
+    return stats
+
+
 def get_chat_model(
     provider: str, name: str, model_config: Optional[ModelConfig] = None, **kwargs: Any
 ) -> LiteLLMChatWrapper:
     orig = provider.lower()
-    provider_name, kwargs = _merge_provider_defaults("chat", orig, kwargs)
-    return _get_litellm_chat(
-        LiteLLMChatWrapper, name, provider_name, model_config, **kwargs
-    )
+
+    def create():
+        provider_name, merged = _merge_provider_defaults("chat", orig, dict(kwargs))
+        return _get_litellm_chat(
+            LiteLLMChatWrapper, name, provider_name, model_config, **merged
+        )
+
+    return _get_cached_model("chat", orig, name, model_config, kwargs, create)
 
 
 def get_browser_model(
@@ -925,5 +1281,9 @@ def get_embedding_model(
     provider: str, name: str, model_config: Optional[ModelConfig] = None, **kwargs: Any
 ) -> LiteLLMEmbeddingWrapper | LocalSentenceTransformerWrapper:
     orig = provider.lower()
-    provider_name, kwargs = _merge_provider_defaults("embedding", orig, kwargs)
-    return _get_litellm_embedding(name, provider_name, model_config, **kwargs)
+
+    def create():
+        provider_name, merged = _merge_provider_defaults("embedding", orig, dict(kwargs))
+        return _get_litellm_embedding(name, provider_name, model_config, **merged)
+
+    return _get_cached_model("embedding", orig, name, model_config, kwargs, create)
@@ -37,9 +37,19 @@ async def preload():
                 except Exception as e:
                     PrintStyle().error(f"Error in preload_kokoro: {e}")
 
+        # start document parsing worker processes
+        async def preload_document_parsing():
+            try:
+                from python.helpers import document_parsing
+
+                return await document_parsing.warm_up()
+            except Exception as e:
+                PrintStyle().error(f"Error in preload_document_parsing: {e}")
+
         # async tasks to preload
         tasks = [
             preload_embedding(),
+            preload_document_parsing(),
             # preload_whisper(),
             # preload_kokoro()
         ]
@@ -46,8 +46,8 @@ class BackupRestore(ApiHandler):
                 user_edited_metadata=metadata
             )
 
-            # Load all chats from the chats folder
-            load_tmp_chats()
+            # Load all chats from the chats folder, restored chats may come with stale index files
+            load_tmp_chats(rebuild_index=True)
 
             return {
                 "success": True,
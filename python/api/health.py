@@ -1,5 +1,6 @@
 from python.helpers.api import ApiHandler, Request, Response
-from python.helpers import errors, git
+from python.helpers import errors, git, defer, extension
+import models
 
 class HealthCheck(ApiHandler):
 
@@ -23,4 +24,10 @@ class HealthCheck(ApiHandler):
         except Exception as e:
             error = errors.error_text(e)
 
-        return {"gitinfo": gitinfo, "error": error}
+        return {
+            "gitinfo": gitinfo,
+            "error": error,
+            "loops": defer.get_loop_metrics(),
+            "extensions": extension.get_extension_stats()[:20],
+            "models": models.get_model_cache_stats(),
+        }
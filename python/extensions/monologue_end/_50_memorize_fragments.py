@@ -100,22 +100,31 @@ class MemorizeMemories(Extension):
             total_consolidated = 0
             rem = []
 
-            for memory in memories:
-                # Convert memory to plain text
-                txt = f"{memory}"
+            # Convert memories to plain text
+            texts = [f"{memory}" for memory in memories]
+
+            similar = [None] * len(texts)
+            if set["memory_memorize_consolidation"]:
+                # Use intelligent consolidation system
+                from python.helpers.memory_consolidation import create_memory_consolidator
+                consolidator = create_memory_consolidator(
+                    self.agent,
+                    similarity_threshold=DEFAULT_MEMORY_THRESHOLD,  # More permissive for discovery
+                    max_similar_memories=8,
+                    max_llm_context_memories=4
+                )
+                try:
+                    # Search similar memories of all fragments in one pass
+                    similar = await consolidator.find_similar_memories(texts, Memory.Area.FRAGMENTS.value)
+                except Exception as e:
+                    # Log error, each fragment searches on its own
+                    log_item.update(consolidation_error=str(e))
+
+            for txt, similar_memories in zip(texts, similar):
 
                 if set["memory_memorize_consolidation"]:
                     
                     try:
-                        # Use intelligent consolidation system
-                        from python.helpers.memory_consolidation import create_memory_consolidator
-                        consolidator = create_memory_consolidator(
-                            self.agent,
-                            similarity_threshold=DEFAULT_MEMORY_THRESHOLD,  # More permissive for discovery
-                            max_similar_memories=8,
-                            max_llm_context_memories=4
-                        )
-
                         # Create memory item-specific log for detailed tracking
                         memory_log = None # too many utility messages, skip log for now
                         # memory_log = self.agent.context.log.log(
@@ -129,7 +138,8 @@ class MemorizeMemories(Extension):
                             new_memory=txt,
                             area=Memory.Area.FRAGMENTS.value,
                             metadata={"area": Memory.Area.FRAGMENTS.value},
-                            log_item=memory_log
+                            log_item=memory_log,
+                            similar_memories=similar_memories
                         )
 
                         # Update the individual log item with completion status but keep it temporary
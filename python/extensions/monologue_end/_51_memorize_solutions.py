@@ -102,27 +102,38 @@ class MemorizeSolutions(Extension):
             total_consolidated = 0
             rem = []
 
+            texts = []
             for solution in solutions:
                 # Convert solution to structured text
                 if isinstance(solution, dict):
                     problem = solution.get('problem', 'Unknown problem')
                     solution_text = solution.get('solution', 'Unknown solution')
-                    txt = f"# Problem\n {problem}\n# Solution\n {solution_text}"
+                    texts.append(f"# Problem\n {problem}\n# Solution\n {solution_text}")
                 else:
                     # If solution is not a dict, convert it to string
-                    txt = f"# Solution\n {str(solution)}"
+                    texts.append(f"# Solution\n {str(solution)}")
+
+            similar = [None] * len(texts)
+            if set["memory_memorize_consolidation"]:
+                # Use intelligent consolidation system
+                from python.helpers.memory_consolidation import create_memory_consolidator
+                consolidator = create_memory_consolidator(
+                    self.agent,
+                    similarity_threshold=DEFAULT_MEMORY_THRESHOLD,  # More permissive for discovery
+                    max_similar_memories=6,    # Fewer for solutions (more complex)
+                    max_llm_context_memories=3
+                )
+                try:
+                    # Search similar memories of all solutions in one pass
+                    similar = await consolidator.find_similar_memories(texts, Memory.Area.SOLUTIONS.value)
+                except Exception as e:
+                    # Log error, each solution searches on its own
+                    log_item.update(consolidation_error=str(e))
+
+            for txt, similar_memories in zip(texts, similar):
 
                 if set["memory_memorize_consolidation"]:
                     try:
-                        # Use intelligent consolidation system
-                        from python.helpers.memory_consolidation import create_memory_consolidator
-                        consolidator = create_memory_consolidator(
-                            self.agent,
-                            similarity_threshold=DEFAULT_MEMORY_THRESHOLD,  # More permissive for discovery
-                            max_similar_memories=6,    # Fewer for solutions (more complex)
-                            max_llm_context_memories=3
-                        )
-
                         # Create solution-specific log for detailed tracking
                         solution_log = None # too many utility messages, skip log for now
                         # solution_log = self.agent.context.log.log(
@@ -136,7 +147,8 @@ class MemorizeSolutions(Extension):
                             new_memory=txt,
                             area=Memory.Area.SOLUTIONS.value,
                             metadata={"area": Memory.Area.SOLUTIONS.value},
-                            log_item=solution_log
+                            log_item=solution_log,
+                            similar_memories=similar_memories
                         )
 
                         # Update the individual log item with completion status but keep it temporary
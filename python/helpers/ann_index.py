@@ -0,0 +1,251 @@
+import json
+import math
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any
+
+import numpy as np
+
+# faiss needs to be patched for python 3.12 on arm #TODO remove once not needed
+from python.helpers import faiss_monkey_patch
+import faiss
+
+from python.helpers import files
+from python.helpers.print_style import PrintStyle
+
+# Approximate nearest neighbor search for large vector stores.
+# The flat index of a FAISS store stays the source of truth (adds, deletes, snapshots and the
+# memory journal work on it unchanged). Once the store crosses the threshold of its config, an
+# HNSW or IVF index over the same vectors is built in a background thread and used for searches.
+# It follows the store lazily on search: appended vectors are added, deleted documents are
+# tombstoned and excluded by a selector, and the index is rebuilt when too many are dead.
+
+INDEX_TYPES = ("flat", "hnsw", "ivf_flat", "ivf_pq")
+CONFIG_FILE = "index.json"
+
+_default_type = os.getenv("A0_MEMORY_INDEX", "").strip().lower()
+DEFAULT_INDEX_TYPE = _default_type if _default_type in INDEX_TYPES else "hnsw"
+_threshold = os.getenv("A0_MEMORY_INDEX_THRESHOLD", "").strip()
+DEFAULT_THRESHOLD = int(_threshold) if _threshold.isdigit() else 50_000
+
+# rebuild when this share of the indexed vectors is deleted
+REBUILD_DELETED_RATIO = 0.2
+# retrain IVF centroids when the store grew by this factor since training
+REBUILD_GROWTH = 2.0
+# max vectors used to train IVF centroids and PQ codebooks
+MAX_TRAINING_POINTS = 100_000
+# candidates fetched per result from a quantized index, re-ranked with exact scores of the flat index
+RERANK_FETCH = 8
+
+
+@dataclass
+class IndexConfig:
+    type: str = DEFAULT_INDEX_TYPE
+    threshold: int = DEFAULT_THRESHOLD  # documents before switching from flat search
+    hnsw_m: int = 32
+    ef_construction: int = 80
+    ef_search: int = 64
+    nlist: int = 0  # IVF lists, 0 picks 4 * sqrt(n)
+    nprobe: int = 16
+    pq_m: int = 16  # PQ sub-quantizers, lowered to a divisor of the dimension
+
+
+def load_config(db_dir: str | None = None) -> IndexConfig:
+    """Index config of a vector store folder, index.json in it overrides the defaults."""
+    config = IndexConfig()
+    if db_dir and files.exists(db_dir, CONFIG_FILE):
+        try:
+            data = json.loads(files.read_file(files.get_abs_path(db_dir, CONFIG_FILE)))
+            for key, value in data.items():
+                if hasattr(config, key):
+                    setattr(config, key, value)
+        except Exception as e:
+            PrintStyle.error(f"Invalid {CONFIG_FILE} in {db_dir}: {e}")
+    if config.type not in INDEX_TYPES:
+        PrintStyle.error(f"Unknown index type {config.type!r}, using {DEFAULT_INDEX_TYPE}")
+        config.type = DEFAULT_INDEX_TYPE
+    return config
+
+
+def build_index(config: IndexConfig, vectors: np.ndarray) -> Any:
+    """Inner product index of the configured type holding vectors, ids are their row numbers."""
+    n, dim = vectors.shape
+    if config.type == "flat":
+        index = faiss.IndexFlatIP(dim)
+    elif config.type == "hnsw":
+        index = faiss.IndexHNSWFlat(dim, config.hnsw_m, faiss.METRIC_INNER_PRODUCT)
+        index.hnsw.efConstruction = config.ef_construction
+        index.hnsw.efSearch = config.ef_search
+    else:
+        # faiss wants at least 39 training points per centroid
+        nlist = max(1, min(config.nlist or int(4 * math.sqrt(n)), n // 39))
+        quantizer = faiss.IndexFlatIP(dim)
+        if config.type == "ivf_pq":
+            m = max(d for d in range(1, min(config.pq_m, dim) + 1) if dim % d == 0)
+            index = faiss.IndexIVFPQ(quantizer, dim, nlist, m, 8, faiss.METRIC_INNER_PRODUCT)
+        else:
+            index = faiss.IndexIVFFlat(quantizer, dim, nlist, faiss.METRIC_INNER_PRODUCT)
+        sample = vectors
+        if n > MAX_TRAINING_POINTS:
+            rows = np.random.default_rng(0).choice(n, MAX_TRAINING_POINTS, replace=False)
+            sample = vectors[rows]
+        index.train(sample)
+        index.nprobe = min(config.nprobe, nlist)
+    index.add(vectors)
+    return index
+
+
+def get_search_params(index: Any, selector: Any = None, k: int = 0) -> Any:
+    """Search parameters restricting index to the selected ids, keeping its tuning."""
+    if isinstance(index, faiss.IndexHNSW):
+        return faiss.SearchParametersHNSW(sel=selector, efSearch=max(index.hnsw.efSearch, k))
+    if isinstance(index, faiss.IndexIVF):
+        return faiss.SearchParametersIVF(sel=selector, nprobe=index.nprobe)
+    return faiss.SearchParameters(sel=selector)
+
+
+class AnnIndex:
+    """Approximate index following the flat index of a FAISS store, see the module comment."""
+
+    def __init__(self, config: IndexConfig):
+        self.config = config
+        self.index: Any = None
+        self.stats = {"builds": 0, "build_ms": 0.0, "searches": 0}
+        self._ids: list[str] = []  # docstore id per ann id
+        self._alive = np.zeros(0, dtype=bool)
+        self._known: dict[str, tuple[int, Any]] = {}  # docstore id -> ann id, document
+        self._deleted = 0
+        self._trained_at = 0
+        self._synced: tuple[dict, int] | None = None  # mapping and its length at the last sync
+        self._selector: Any = None
+        self._bitmap: np.ndarray | None = None
+        self._building = False
+        self._lock = threading.RLock()
+
+    def get(self, db: Any) -> "AnnIndex | None":
+        """Synced index to search db with, None while db is small or the index is being built."""
+        with self._lock:
+            if self.config.type == "flat":
+                return None
+            if self.index is None:
+                if db.index.ntotal >= self.config.threshold:
+                    self._start_build(db)
+                return None
+            self._sync(db)
+            live = len(self._known)
+            if not self._building and (
+                self._deleted > REBUILD_DELETED_RATIO * len(self._ids)
+                or (isinstance(self.index, faiss.IndexIVF) and live > REBUILD_GROWTH * self._trained_at)
+            ):
+                self._start_build(db)
+            return self
+
+    def search(self, vectors: np.ndarray, k: int) -> list[list[tuple[str, float]]]:
+        """Docstore ids and scores of the k nearest live vectors, one row per query vector."""
+        with self._lock:
+            k = min(k, len(self._known))
+            if k <= 0:
+                return [[] for _ in range(len(vectors))]
+            params = get_search_params(self.index, self._get_selector(), k)
+            scores, indices = self.index.search(vectors, k, params=params)
+            self.stats["searches"] += 1
+            return [
+                [(self._ids[i], float(score)) for score, i in zip(row_scores, row_indices) if i != -1]
+                for row_scores, row_indices in zip(scores, indices)
+            ]
+
+    @property
+    def quantized(self) -> bool:
+        """Scores are approximations of the compressed vectors, re-rank before comparing them."""
+        return self.config.type == "ivf_pq"
+
+    def get_stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "type": self.config.type,
+                "ready": self.index is not None,
+                "building": self._building,
+                "size": len(self._known),
+                "deleted": self._deleted,
+                **self.stats,
+            }
+
+    def _sync(self, db: Any):
+        mapping = db.index_to_docstore_id
+        if self._synced and self._synced[0] is mapping:
+            # nothing deleted since, new vectors were appended at the end
+            if self._synced[1] == len(mapping):
+                return
+            added = [(pos, mapping[pos]) for pos in range(self._synced[1], len(mapping))]
+        else:
+            # the store was compacted by deletes, compare documents (an id may be deleted and re-added)
+            docs = db.docstore._dict
+            for id, (ann_id, doc) in list(self._known.items()):
+                if docs.get(id) is not doc:
+                    self._remove(id, ann_id)
+            added = [(pos, id) for pos, id in mapping.items() if id not in self._known]
+        if added:
+            positions = np.array([pos for pos, _ in added], dtype=np.int64)
+            vectors = db.index.reconstruct_batch(positions)
+            self._add([id for _, id in added], [db.docstore._dict[id] for _, id in added], vectors)
+        self._synced = (mapping, len(mapping))
+
+    def _add(self, ids: list[str], docs: list[Any], vectors: np.ndarray):
+        self.index.add(vectors)
+        start = len(self._ids)
+        self._ids.extend(ids)
+        self._alive = np.concatenate([self._alive, np.ones(len(ids), dtype=bool)])
+        for i, (id, doc) in enumerate(zip(ids, docs)):
+            self._known[id] = (start + i, doc)
+        self._selector = None
+
+    def _remove(self, id: str, ann_id: int):
+        del self._known[id]
+        self._alive[ann_id] = False
+        self._deleted += 1
+        self._selector = None
+
+    def _get_selector(self) -> Any:
+        if not self._deleted:
+            return None
+        if self._selector is None:
+            self._bitmap = np.packbits(self._alive, bitorder="little")
+            self._selector = faiss.IDSelectorBitmap(len(self._alive), faiss.swig_ptr(self._bitmap))
+        return self._selector
+
+    def _start_build(self, db: Any):
+        if self._building:
+            return
+        self._building = True
+        mapping = db.index_to_docstore_id
+        ids = [mapping[pos] for pos in range(len(mapping))]
+        docs = [db.docstore._dict[id] for id in ids]
+        vectors = db.index.reconstruct_n(0, len(ids))
+        threading.Thread(
+            target=self._build, args=(ids, docs, vectors), name="ann-index-build", daemon=True
+        ).start()
+
+    def _build(self, ids: list[str], docs: list[Any], vectors: np.ndarray):
+        start = time.perf_counter()
+        try:
+            index = build_index(self.config, vectors)
+        except Exception as e:
+            PrintStyle.error(f"Building {self.config.type} index failed, using flat search: {e}")
+            with self._lock:
+                self.config.type = "flat"
+                self._building = False
+            return
+        with self._lock:
+            self.index = index
+            self._ids = ids
+            self._alive = np.ones(len(ids), dtype=bool)
+            self._known = {id: (i, doc) for i, (id, doc) in enumerate(zip(ids, docs))}
+            self._deleted = 0
+            self._trained_at = len(ids)
+            self._synced = None  # catch up with changes made during the build
+            self._selector = None
+            self._building = False
+            self.stats["builds"] += 1
+            self.stats["build_ms"] = round((time.perf_counter() - start) * 1000, 1)
@@ -730,6 +730,9 @@ class BackupService:
                             "error": str(e)
                         })
 
+                # restored memory snapshots must not get the current change logs replayed onto them
+                self._discard_memory_logs(restored_files)
+
                 return {
                     "restored_files": restored_files,
                     "deleted_files": deleted_files,
@@ -752,6 +755,27 @@ class BackupService:
             if os.path.exists(temp_dir):
                 os.rmdir(temp_dir)
 
+    def _discard_memory_logs(self, restored_files: List[Dict[str, Any]]):
+        """Drop memory write-ahead logs next to restored index files, they belong to the replaced snapshot"""
+        from python.helpers import memory_journal
+
+        snapshot_files = (memory_journal.INDEX_FILE, memory_journal.DOCSTORE_FILE)
+        restored: Dict[str, List[str]] = {}
+        for info in restored_files:
+            db_dir, name = os.path.split(info["target_path"])
+            restored.setdefault(db_dir, []).append(name)
+        for db_dir, names in restored.items():
+            if not any(name in snapshot_files for name in names):
+                continue
+            journal = memory_journal.get_journal(db_dir)
+            # logs from the backup itself belong to the restored snapshot
+            journal.discard_log(keep=names)
+            # a restored pair is complete, an unfinished swap recorded before must not overwrite it
+            for name in snapshot_files:
+                tmp = journal.path(name + ".tmp")
+                if os.path.exists(tmp):
+                    os.remove(tmp)
+
     def _translate_restore_path(self, archive_path: str, backup_metadata: Dict[str, Any]) -> str:
         """Translate file path from backed up system to current system.
 
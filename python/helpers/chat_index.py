@@ -0,0 +1,109 @@
+import json
+import os
+import threading
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from typing import Any
+
+from python.helpers.localization import Localization
+
+# Lightweight index of chats kept on disk without a loaded AgentContext.
+# Chats are listed from their index entries and hydrated by AgentContext.get when opened or messaged,
+# idle contexts are evicted back to an index entry by persist_chat.evict_idle_chats.
+# This module must not import agent, persist_chat hydrates and evicts contexts.
+
+META_FILE = "meta.json"
+
+
+@dataclass
+class ChatIndexEntry:
+    id: str
+    name: str | None = None
+    created_at: str = ""  # isoformat, like chat.json
+    last_message: str = ""
+    type: str = "user"
+    project: str | None = None
+    output_data: dict[str, Any] = field(default_factory=dict)
+    log_guid: str = ""
+    log_length: int = 0
+    no: int = 0  # context number in this process, not persisted
+
+    def output(self) -> dict[str, Any]:
+        """Same shape as AgentContext.output() of the hydrated context."""
+        return {
+            "id": self.id,
+            "name": self.name,
+            "created_at": _serialize_datetime(self.created_at),
+            "no": self.no,
+            "log_guid": self.log_guid,
+            "log_version": self.log_length,
+            "log_length": self.log_length,
+            "paused": False,
+            "last_message": _serialize_datetime(self.last_message),
+            "type": self.type,
+            "running": False,
+            **self.output_data,
+        }
+
+
+def _serialize_datetime(value: str):
+    try:
+        dt = datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        dt = datetime.fromtimestamp(0)
+    return Localization.get().serialize_datetime(dt)
+
+
+_unloaded: dict[str, ChatIndexEntry] = {}
+_lock = threading.RLock()
+
+
+def add(entry: ChatIndexEntry):
+    with _lock:
+        _unloaded[entry.id] = entry
+
+
+def pop(ctxid: str) -> ChatIndexEntry | None:
+    with _lock:
+        return _unloaded.pop(ctxid, None)
+
+
+def get(ctxid: str) -> ChatIndexEntry | None:
+    with _lock:
+        return _unloaded.get(ctxid)
+
+
+def is_unloaded(ctxid: str) -> bool:
+    return ctxid in _unloaded
+
+
+def entries() -> list[ChatIndexEntry]:
+    with _lock:
+        return list(_unloaded.values())
+
+
+def clear():
+    with _lock:
+        _unloaded.clear()
+
+
+def read_entry(folder: str) -> ChatIndexEntry | None:
+    """Index entry stored in the chat folder, None when missing or unreadable."""
+    path = os.path.join(folder, META_FILE)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        data.pop("no", None)
+        return ChatIndexEntry(**data)
+    except Exception:
+        return None
+
+
+def write_entry(folder: str, entry: ChatIndexEntry):
+    data = asdict(entry)
+    del data["no"]
+    os.makedirs(folder, exist_ok=True)
+    tmp = os.path.join(folder, META_FILE + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, default=lambda o: None)
+    os.replace(tmp, os.path.join(folder, META_FILE))
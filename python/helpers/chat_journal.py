@@ -0,0 +1,306 @@
+import json
+import os
+import threading
+import time
+import uuid
+from typing import Any, Callable
+
+from python.helpers.print_style import PrintStyle
+from python.helpers.strings import sanitize_string
+
+# Append-only journal of chat changes kept next to chat.json.
+# persist_chat appends what changed since the previous save (new messages, replaced histories,
+# updated log items, metadata) instead of rewriting the whole chat. The journal is folded into
+# a new chat.json by a background compaction and replayed on top of chat.json when loading.
+#
+# Every chat.json carries the id of its journal generation. A journal file starts with a header
+# naming the generation it applies to, a rotated journal ends with the id of the generation it
+# produces, so stale journals left behind by an interrupted save are never replayed twice.
+
+SNAPSHOT_FILE = "chat.json"
+JOURNAL_FILE = "chat.journal"
+COMPACTING_FILE = "chat.journal.compacting"
+SNAPSHOT_ID_KEY = "_journal"
+
+COMPACT_AFTER_RECORDS = 200
+COMPACT_AFTER_BYTES = 4 * 1024 * 1024
+COMPACT_INTERVAL_SECONDS = 10 * 60
+
+
+class ChatJournal:
+
+    def __init__(self, folder: str, log_size: int):
+        self.folder = folder
+        self.log_size = log_size
+        self.lock = threading.RLock()  # guards the journal file and rotation
+        self.files_lock = threading.RLock()  # guards chat.json while written or loaded
+        self.snapshot_id: str = ""
+        self.records = 0
+        self.bytes = 0
+        self.last_compaction = time.time()
+        # what the files contain for the live context, owned by persist_chat
+        self.state: Any = None
+        self._compaction: threading.Thread | None = None
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.folder, name)
+
+    # --- writing ---
+
+    def append(self, records: list[str]):
+        """Append serialized records, durable when this returns."""
+        if not records:
+            return
+        with self.lock:
+            os.makedirs(self.folder, exist_ok=True)
+            path = self.path(JOURNAL_FILE)
+            lines = []
+            if not os.path.exists(path):
+                lines.append(json.dumps({"op": "header", "base": self.snapshot_id}))
+            lines.extend(records)
+            data = sanitize_string("".join(line + "\n" for line in lines)).encode("utf-8")
+            with open(path, "ab") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            self.records += len(records)
+            self.bytes += len(data)
+
+    def write_snapshot(self, data: dict[str, Any], serialize: Callable[[Any], str]):
+        """Write a full chat.json synchronously and drop the journal it contains."""
+        self.wait()
+        with self.files_lock, self.lock:
+            snapshot_id = uuid.uuid4().hex
+            self._write_file(SNAPSHOT_FILE, serialize({**data, SNAPSHOT_ID_KEY: snapshot_id}))
+            self.snapshot_id = snapshot_id
+            for name in (COMPACTING_FILE, JOURNAL_FILE):
+                if os.path.exists(self.path(name)):
+                    os.remove(self.path(name))
+            self.records = self.bytes = 0
+            self.last_compaction = time.time()
+
+    def _write_file(self, name: str, content: str):
+        os.makedirs(self.folder, exist_ok=True)
+        tmp = self.path(name + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(sanitize_string(content))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path(name))
+
+    # --- compaction ---
+
+    def maybe_compact(self, serialize: Callable[[Any], str]):
+        if not self.records:
+            return
+        if (
+            self.records >= COMPACT_AFTER_RECORDS
+            or self.bytes >= COMPACT_AFTER_BYTES
+            or time.time() - self.last_compaction >= COMPACT_INTERVAL_SECONDS
+        ):
+            self.compact(serialize)
+
+    def compact(self, serialize: Callable[[Any], str], background: bool = True):
+        with self.lock:
+            if self._compaction and self._compaction.is_alive():
+                return
+            journal, compacting = self.path(JOURNAL_FILE), self.path(COMPACTING_FILE)
+            if not os.path.exists(journal):
+                return
+
+            # a previous compaction failed, its records stay in front and lead to the same generation
+            next_id = uuid.uuid4().hex
+            if os.path.exists(compacting):
+                with open(journal, "rb") as src, open(compacting, "ab") as dst:
+                    # skip the header of the journal, it continues the compacting file
+                    src.readline()
+                    dst.write(src.read())
+                    dst.write(self._next_record(next_id))
+                    dst.flush()
+                    os.fsync(dst.fileno())
+                os.remove(journal)
+            else:
+                with open(journal, "ab") as f:
+                    f.write(self._next_record(next_id))
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(journal, compacting)
+
+            # new appends go to a fresh journal based on the generation being compacted
+            self.snapshot_id = next_id
+            self.records = self.bytes = 0
+            self.last_compaction = time.time()
+
+            if background:
+                self._compaction = threading.Thread(
+                    target=self._finish_compaction,
+                    args=(serialize,),
+                    daemon=True,
+                    name="ChatCompaction",
+                )
+                self._compaction.start()
+            else:
+                self._finish_compaction(serialize)
+
+    @staticmethod
+    def _next_record(next_id: str) -> bytes:
+        return (json.dumps({"op": "next", "id": next_id}) + "\n").encode("utf-8")
+
+    def wait(self):
+        thread = self._compaction
+        if thread and thread.is_alive() and thread is not threading.current_thread():
+            thread.join()
+
+    def _finish_compaction(self, serialize: Callable[[Any], str]):
+        try:
+            with self.files_lock:
+                data, snapshot_id = self._replay((COMPACTING_FILE,))
+                if data is not None:
+                    self._write_file(SNAPSHOT_FILE, serialize({**data, SNAPSHOT_ID_KEY: snapshot_id}))
+                compacting = self.path(COMPACTING_FILE)
+                if os.path.exists(compacting):
+                    os.remove(compacting)
+        except Exception as e:
+            PrintStyle.error(f"Chat compaction failed in '{self.folder}': {e}")
+
+    # --- loading ---
+
+    def load(self) -> dict[str, Any] | None:
+        """chat.json with the journals replayed on top, None when there is no chat.json."""
+        with self.files_lock, self.lock:
+            data, snapshot_id = self._replay((COMPACTING_FILE, JOURNAL_FILE), truncate=True)
+            return data
+
+    def _replay(
+        self, names: tuple[str, ...], truncate: bool = False
+    ) -> tuple[dict[str, Any] | None, str]:
+        path = self.path(SNAPSHOT_FILE)
+        if not os.path.exists(path):
+            return None, ""
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.loads(f.read())
+        snapshot_id = data.pop(SNAPSHOT_ID_KEY, "")
+
+        replay = _Replay(data, self.log_size)
+        for name in names:
+            records = read_records(self.path(name), truncate=truncate)
+            if not records or records[0].get("op") != "header":
+                continue
+            # journal of another generation, already contained in chat.json or stale
+            if not snapshot_id or records[0].get("base") != snapshot_id:
+                continue
+            for record in records[1:]:
+                if record.get("op") == "next":
+                    snapshot_id = record.get("id", "")
+                else:
+                    replay.apply(record)
+        return replay.finish(), snapshot_id
+
+
+def read_records(path: str, truncate: bool = False) -> list[dict[str, Any]]:
+    records = []
+    if not os.path.exists(path):
+        return records
+    with open(path, "rb") as f:
+        data = f.read()
+    pos = 0
+    while pos < len(data):
+        end = data.find(b"\n", pos)
+        if end < 0:
+            break  # torn tail from an interrupted write
+        try:
+            records.append(json.loads(data[pos:end].decode("utf-8")))
+        except Exception:
+            break
+        pos = end + 1
+    # cut the torn tail so records appended later are not hidden behind it
+    if truncate and pos < len(data):
+        with open(path, "r+b") as f:
+            f.truncate(pos)
+    return records
+
+
+class _Replay:
+    """Applies journal records to the chat.json dictionary."""
+
+    def __init__(self, data: dict[str, Any], log_size: int):
+        self.data = data
+        self.log_size = log_size
+        self.histories: dict[int, dict[str, Any]] = {}  # agent index -> parsed history
+
+    def apply(self, record: dict[str, Any]):
+        op = record.get("op")
+        agents: list[dict[str, Any]] = self.data.setdefault("agents", [])
+        index = record.get("index", 0)
+
+        if op == "meta":
+            self.data.update(record["meta"])
+        elif op == "agent":
+            agent = record["agent"]
+            if index < len(agents):
+                agents[index] = agent
+            else:
+                agents.append(agent)
+            self.histories.pop(index, None)
+        elif op == "agents":
+            del agents[record["count"] :]
+            for i in [i for i in self.histories if i >= record["count"]]:
+                del self.histories[i]
+        elif op == "history":
+            agents[index]["history"] = record["history"]
+            self.histories.pop(index, None)
+        elif op == "messages":
+            history = self.histories.get(index)
+            if history is None:
+                history = self.histories[index] = json.loads(agents[index]["history"])
+            history["current"]["messages"].extend(record["messages"])
+            history["counter"] = record.get("counter", history.get("counter", 0))
+        elif op == "agent_data":
+            agents[index]["data"] = record["data"]
+        elif op == "log":
+            self._apply_log(record)
+
+    def _apply_log(self, record: dict[str, Any]):
+        log = self.data.setdefault("log", {"guid": record["guid"], "logs": []})
+        log["guid"] = record["guid"]
+        log["progress"] = record.get("progress", log.get("progress", ""))
+        log["progress_no"] = record.get("progress_no", log.get("progress_no", 0))
+        logs: list[dict[str, Any]] = log.setdefault("logs", [])
+        positions = {item.get("no"): i for i, item in enumerate(logs)}
+        for item in record["items"]:
+            pos = positions.get(item.get("no"))
+            if pos is None:
+                positions[item.get("no")] = len(logs)
+                logs.append(item)
+            else:
+                logs[pos] = item
+        if len(logs) > self.log_size:
+            del logs[: len(logs) - self.log_size]
+
+    def finish(self) -> dict[str, Any]:
+        agents = self.data.get("agents", [])
+        for index, history in self.histories.items():
+            agents[index]["history"] = json.dumps(history, ensure_ascii=False)
+        self.histories = {}
+        return self.data
+
+
+_journals: dict[str, ChatJournal] = {}
+_journals_lock = threading.Lock()
+
+
+def get_journal(folder: str, log_size: int) -> ChatJournal:
+    folder = os.path.abspath(folder)
+    with _journals_lock:
+        journal = _journals.get(folder)
+        if journal is None:
+            journal = _journals[folder] = ChatJournal(folder, log_size)
+        return journal
+
+
+def drop_journal(folder: str):
+    folder = os.path.abspath(folder)
+    with _journals_lock:
+        journal = _journals.pop(folder, None)
+    if journal:
+        journal.wait()
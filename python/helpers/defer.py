@@ -1,6 +1,9 @@
 import asyncio
 from dataclasses import dataclass
+import os
 import threading
+import time
+import zlib
 from concurrent.futures import Future
 from typing import Any, Callable, Optional, Coroutine, TypeVar, Awaitable
 
@@ -8,6 +11,8 @@ T = TypeVar("T")
 
 THREAD_BACKGROUND = "Background"
 
+LAG_PROBE_INTERVAL = 0.5  # seconds between event loop lag probes
+
 
 class EventLoopThread:
     _instances: dict[str, "EventLoopThread"] = {}
@@ -28,6 +33,7 @@ class EventLoopThread:
     def _start(self):
         if not hasattr(self, "loop") or not self.loop:
             self.loop = asyncio.new_event_loop()
+            self.lag_last = self.lag_max = self.lag_avg = 0.0
         if not hasattr(self, "thread") or not self.thread:
             self.thread = threading.Thread(
                 target=self._run_event_loop, daemon=True, name=self.thread_name
@@ -38,8 +44,37 @@ class EventLoopThread:
         if not self.loop:
             raise RuntimeError("Event loop is not initialized")
         asyncio.set_event_loop(self.loop)
+        self._schedule_lag_probe()
         self.loop.run_forever()
 
+    def _schedule_lag_probe(self):
+        if self.loop and not self.loop.is_closed():
+            self.loop.call_later(
+                LAG_PROBE_INTERVAL,
+                self._lag_probe,
+                time.monotonic() + LAG_PROBE_INTERVAL,
+            )
+
+    def _lag_probe(self, expected: float):
+        # how late the callback ran = how long the loop was blocked by synchronous work
+        lag = max(0.0, time.monotonic() - expected)
+        self.lag_last = lag
+        self.lag_max = max(self.lag_max, lag)
+        self.lag_avg = self.lag_avg * 0.9 + lag * 0.1
+        self._schedule_lag_probe()
+
+    def get_lag_stats(self) -> dict[str, float]:
+        return {
+            "lag_last_ms": round(getattr(self, "lag_last", 0.0) * 1000, 1),
+            "lag_avg_ms": round(getattr(self, "lag_avg", 0.0) * 1000, 1),
+            "lag_max_ms": round(getattr(self, "lag_max", 0.0) * 1000, 1),
+        }
+
+    @classmethod
+    def get_all(cls) -> list["EventLoopThread"]:
+        with cls._lock:
+            return list(cls._instances.values())
+
     def terminate(self):
         loop = getattr(self, "loop", None)
         thread = getattr(self, "thread", None)
@@ -74,6 +109,77 @@ class EventLoopThread:
         return asyncio.run_coroutine_threadsafe(coro, self.loop)
 
 
+class EventLoopPool:
+    """Fixed number of named event loop threads shared by keys (e.g. chat context ids).
+    Each key is pinned to one loop, chosen by the least number of keys (then lowest lag) or by key hash."""
+
+    def __init__(self, name: str, size: int, strategy: str = "least_load"):
+        self.name = name
+        self.size = max(1, size)
+        self.strategy = strategy
+        self._assigned: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def thread_name(self, index: int) -> str:
+        return f"{self.name}-{index}"
+
+    def thread_name_for(self, key: str) -> str:
+        with self._lock:
+            index = self._assigned.get(key)
+            if index is None:
+                if self.strategy == "hash":
+                    index = zlib.crc32(key.encode()) % self.size
+                else:
+                    load = [0] * self.size
+                    for assigned in self._assigned.values():
+                        load[assigned] += 1
+                    index = min(
+                        range(self.size), key=lambda i: (load[i], self._lag(i), i)
+                    )
+                self._assigned[key] = index
+            return self.thread_name(index)
+
+    def release(self, key: str):
+        with self._lock:
+            self._assigned.pop(key, None)
+
+    def _lag(self, index: int) -> float:
+        instance = EventLoopThread._instances.get(self.thread_name(index))
+        return getattr(instance, "lag_avg", 0.0) if instance else 0.0
+
+    def get_metrics(self) -> list[dict[str, Any]]:
+        with self._lock:
+            load = [0] * self.size
+            for assigned in self._assigned.values():
+                load[assigned] += 1
+        metrics = []
+        for index in range(self.size):
+            instance = EventLoopThread._instances.get(self.thread_name(index))
+            metrics.append(
+                {
+                    "thread": self.thread_name(index),
+                    "keys": load[index],
+                    "running": bool(instance and instance.loop),
+                    **(instance.get_lag_stats() if instance else {}),
+                }
+            )
+        return metrics
+
+
+def get_pool_size(env_name: str, default: int | None = None) -> int:
+    value = os.getenv(env_name, "").strip()
+    if value.isdigit() and int(value) > 0:
+        return int(value)
+    return default or min(os.cpu_count() or 1, 8)
+
+
+def get_loop_metrics() -> list[dict[str, Any]]:
+    return [
+        {"thread": loop.thread_name, **loop.get_lag_stats()}
+        for loop in EventLoopThread.get_all()
+    ]
+
+
 @dataclass
 class ChildTask:
     task: "DeferredTask"
@@ -1,4 +1,5 @@
 import json
+import re
 
 def try_parse(json_string: str):
     try:
@@ -15,7 +16,53 @@ def stringify(obj, **kwargs):
     return json.dumps(obj, ensure_ascii=False, **kwargs)
 
 
+_STRING_STOPS = {
+    '"': re.compile(r'[\\"]'),
+    "'": re.compile(r"[\\']"),
+    "`": re.compile(r"[\\`]"),
+}
+_UNQUOTED_STOPS = re.compile(r"[:,}\]]")
+_ESCAPES = {"b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+
+# resume modes of an open container
+_MEMBER = "member"
+_AFTER_VALUE = "after_value"
+_AFTER_COMMA = "after_comma"
+
+
+class _Frame:
+    __slots__ = ("container", "start", "after_comma", "partial", "tentative")
+
+    def __init__(self, container, start: int, tentative: bool = False):
+        self.container = container
+        self.start = start  # index where the current (uncommitted) member begins
+        self.after_comma = False  # arrays resume in the post-comma branch
+        self.partial = None  # undo record of the entry written by the current member
+        self.tentative = tentative  # opening brace was decided without lookahead
+
+
+def _same(a, b) -> bool:
+    return a is b or (type(a) is type(b) and a == b)
+
+
+def _copy_tree(value):
+    if isinstance(value, dict):
+        return {k: _copy_tree(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_copy_tree(v) for v in value]
+    return value
+
+
 class DirtyJson:
+    """Forgiving JSON parser.
+
+    Use parse/parse_string for one-off parsing. For streamed input, keep one
+    instance and call feed() with each new chunk: open containers stay on the
+    stack between calls and only the last uncommitted member of the innermost
+    container is re-parsed, so each call costs O(chunk) instead of O(total).
+    `changed` tells whether the last feed() modified the result.
+    """
+
     def __init__(self):
         self._reset()
 
@@ -24,7 +71,12 @@ class DirtyJson:
         self.index = 0
         self.current_char = None
         self.result = None
-        self.stack = []
+        self.stack: list[_Frame] = []
+        self.changed = False
+        self._start: int | None = None  # position of the top-level value
+        self._completed = False
+        self._strings: dict[int, tuple[int, str, bool]] = {}  # string token states
+        self._replaced = None  # entry rolled back at resume, for change detection
 
     @staticmethod
     def parse_string(json_string):
@@ -33,31 +85,109 @@ class DirtyJson:
 
     def parse(self, json_string):
         self._reset()
-        self.json_string = json_string
-
-        # Add bounds checking to prevent IndexError
+        # Return None for empty strings
         if not json_string:
-            # Return None for empty strings
             return None
-
-        self.index = self.get_start_pos(self.json_string)
-
-        # Ensure index is within bounds
-        if self.index >= len(self.json_string):
-            # If start position is beyond string length, return None
-            return None
-
-        self.current_char = self.json_string[self.index]
-        self._parse()
-        return self.result
+        return self.feed(json_string)
 
     def feed(self, chunk):
+        self.changed = False
+        if not chunk or self._completed:
+            return self.result
         self.json_string += chunk
-        if not self.current_char and self.json_string:
-            self.current_char = self.json_string[0]
-        self._parse()
+        self._resume()
+        if self._replaced is not None:  # rolled back entry was not written again
+            self._replaced = None
+            self.changed = True
         return self.result
 
+    def snapshot(self):
+        """Copy of the current result that later feed() calls will not mutate."""
+        return _copy_tree(self.result)
+
+    def _resume(self):
+        if self.stack:
+            frame = self.stack[-1]
+            if frame.tentative:
+                # "{" was the last char, it may still turn out to be "{{"
+                self.stack.pop()
+                frame = self.stack[-1] if self.stack else None
+            if frame:
+                self._rollback(frame)
+                self._seek(frame.start)
+                self._run(_AFTER_COMMA if frame.after_comma else _MEMBER)
+                return
+
+        # (re)parse the top-level value
+        if self._start is None:
+            start = self.get_start_pos(self.json_string)
+            if self.json_string[start] in ("{", "[", '"'):
+                self._start = start
+        previous = self.result
+        self._seek(self._start or 0)
+        self.result = self._parse_value()
+        if self.stack:
+            self._run(_MEMBER)
+        self.changed = not _same(previous, self.result)
+
+    def _run(self, mode):
+        while self.stack and mode:
+            frame = self.stack[-1]
+            if isinstance(frame.container, dict):
+                mode = self._object_step(frame, mode)
+            else:
+                mode = self._array_step(frame, mode)
+
+    def _rollback(self, frame: _Frame):
+        partial, frame.partial = frame.partial, None
+        self._replaced = None
+        if partial is None:
+            return
+        container = frame.container
+        if isinstance(container, dict):
+            key, had_old, old = partial
+            self._replaced = (frame, key, container[key])
+            if had_old:
+                container[key] = old
+            else:
+                del container[key]
+        else:
+            self._replaced = (frame, partial, container[partial])
+            del container[partial:]
+
+    def _push(self, container, tentative=False):
+        self._advance()  # Skip opening brace/bracket
+        self.stack.append(_Frame(container, self.index, tentative))
+        return container
+
+    def _pop(self):
+        self.stack.pop()
+        if not self.stack:
+            self._completed = True
+        return _AFTER_VALUE
+
+    def _set_member(self, frame: _Frame, key, value):
+        container = frame.container
+        if isinstance(container, dict):
+            frame.partial = (key, key in container, container.get(key))
+            container[key] = value
+        else:
+            key = frame.partial = len(container)
+            container.append(value)
+        replaced = self._replaced
+        if replaced is not None and replaced[0] is frame:
+            self._replaced = None
+            if replaced[1] == key and _same(replaced[2], value):
+                return
+        self.changed = True
+
+    def _seek(self, index):
+        self.index = index
+        if index < len(self.json_string):
+            self.current_char = self.json_string[index]
+        else:
+            self.current_char = None
+
     def _advance(self, count=1):
         self.index += count
         if self.index < len(self.json_string):
@@ -94,31 +224,15 @@ class DirtyJson:
                 break
             self._advance()
 
-    def _parse(self):
-        if self.result is None:
-            self.result = self._parse_value()
-        else:
-            self._continue_parsing()
-
-    def _continue_parsing(self):
-        while self.current_char is not None:
-            if isinstance(self.result, dict):
-                self._parse_object_content()
-            elif isinstance(self.result, list):
-                self._parse_array_content()
-            elif isinstance(self.result, str):
-                self.result = self._parse_string()
-            else:
-                break
-
     def _parse_value(self):
         self._skip_whitespace()
         if self.current_char == "{":
+            tentative = self.index + 1 >= len(self.json_string)
             if self._peek(1) == "{":  # Handle {{
                 self._advance(2)
-            return self._parse_object()
+            return self._push({}, tentative)
         elif self.current_char == "[":
-            return self._parse_array()
+            return self._push([])
         elif self.current_char in ['"', "'", "`"]:
             if self._peek(2) == self.current_char * 2:  # type: ignore
                 return self._parse_multiline_string()
@@ -149,50 +263,46 @@ class DirtyJson:
             return True
         return False
 
-    def _parse_object(self):
-        obj = {}
-        self._advance()  # Skip opening brace
-        self.stack.append(obj)
-        self._parse_object_content()
-        return obj
-
-    def _parse_object_content(self):
-        while self.current_char is not None:
-            self._skip_whitespace()
-            if self.current_char == "}":
-                if self._peek(1) == "}":  # Handle }}
-                    self._advance(2)
-                else:
-                    self._advance()
-                self.stack.pop()
-                return
-            if self.current_char is None:
-                self.stack.pop()
-                return  # End of input reached while parsing object
-
-            key = self._parse_key()
-            value = None
+    def _object_step(self, frame: _Frame, mode):
+        if mode == _AFTER_VALUE:
             self._skip_whitespace()
-
-            if self.current_char == ":":
+            if self.current_char == ",":
                 self._advance()
-                value = self._parse_value()
             elif self.current_char is None:
-                value = None  # End of input reached after key
+                return None  # End of input reached after value
+
+        # next member, everything before it is committed
+        frame.start = self.index
+        frame.partial = None
+        frame.after_comma = False
+        if self.current_char is None:
+            return None
+        self._skip_whitespace()
+        if self.current_char == "}":
+            if self.index + 1 >= len(self.json_string):
+                return None  # wait for lookahead, it may be }}
+            if self._peek(1) == "}":  # Handle }}
+                self._advance(2)
             else:
-                value = self._parse_value()
+                self._advance()
+            return self._pop()
+        if self.current_char is None:
+            return None  # End of input reached while parsing object
 
-            self.stack[-1][key] = value
+        key = self._parse_key()
+        value = None
+        self._skip_whitespace()
 
-            self._skip_whitespace()
-            if self.current_char == ",":
-                self._advance()
-                continue
-            elif self.current_char != "}":
-                if self.current_char is None:
-                    self.stack.pop()
-                    return  # End of input reached after value
-                continue
+        if self.current_char == ":":
+            self._advance()
+            value = self._parse_value()
+        elif self.current_char is None:
+            value = None  # End of input reached after key
+        else:
+            value = self._parse_value()
+
+        self._set_member(frame, key, value)
+        return _MEMBER if self.stack[-1] is not frame else _AFTER_VALUE
 
     def _parse_key(self):
         self._skip_whitespace()
@@ -212,84 +322,117 @@ class DirtyJson:
             self._advance()
         return result
 
-    def _parse_array(self):
-        arr = []
-        self._advance()  # Skip opening bracket
-        self.stack.append(arr)
-        self._parse_array_content()
-        return arr
-
-    def _parse_array_content(self):
-        while self.current_char is not None:
-            self._skip_whitespace()
-            if self.current_char == "]":
-                self._advance()
-                self.stack.pop()
-                return
-            value = self._parse_value()
-            self.stack[-1].append(value)
+    def _array_step(self, frame: _Frame, mode):
+        if mode == _AFTER_VALUE:
             self._skip_whitespace()
             if self.current_char == ",":
                 self._advance()
-                # handle trailing commas, end of array
-                self._skip_whitespace()
-                if self.current_char is None or self.current_char == "]":
-                    if self.current_char == "]":
-                        self._advance()
-                    self.stack.pop()
-                    return
+                mode = _AFTER_COMMA
+            elif self.current_char is None:
+                return None  # End of input reached after value
             elif self.current_char != "]":
-                self.stack.pop()
-                return
+                return self._pop()
+
+        if mode == _AFTER_COMMA:
+            frame.start = self.index
+            frame.partial = None
+            frame.after_comma = True
+            # handle trailing commas, end of array
+            self._skip_whitespace()
+            if self.current_char is None:
+                return None
+            if self.current_char == "]":
+                self._advance()
+                return self._pop()
+
+        # next element, everything before it is committed
+        frame.start = self.index
+        frame.partial = None
+        frame.after_comma = False
+        if self.current_char is None:
+            return None
+        self._skip_whitespace()
+        if self.current_char == "]":
+            self._advance()
+            return self._pop()
+        value = self._parse_value()
+        self._set_member(frame, None, value)
+        return _MEMBER if self.stack[-1] is not frame else _AFTER_VALUE
 
     def _parse_string(self):
-        result = ""
+        # string tokens are cached by start index, a string cut off by the end
+        # of input resumes from its last safe position on the next feed()
+        start = self.index
         quote_char = self.current_char
-        self._advance()  # Skip opening quote
-        while self.current_char is not None and self.current_char != quote_char:
-            if self.current_char == "\\":
-                self._advance()
-                if self.current_char in ['"', "'", "\\", "/", "b", "f", "n", "r", "t"]:
-                    result += {
-                        "b": "\b",
-                        "f": "\f",
-                        "n": "\n",
-                        "r": "\r",
-                        "t": "\t",
-                    }.get(self.current_char, self.current_char)
-                elif self.current_char == "u":
-                    self._advance()  # Skip 'u'
-                    unicode_char = ""
-                    # Try to collect exactly 4 hex digits
-                    for _ in range(4):
-                        if self.current_char is None or not self.current_char.isalnum():
-                            # If we can't get 4 hex digits, treat it as a literal '\u' followed by whatever we got
-                            return result + "\\u" + unicode_char
-                        unicode_char += self.current_char
-                        self._advance()
-                    try:
-                        result += chr(int(unicode_char, 16))
-                    except ValueError:
-                        # If invalid hex value, treat as literal
-                        result += "\\u" + unicode_char
-                    continue
-            else:
-                result += self.current_char
+        state = self._strings.get(start)
+        if state is not None:
+            index, result, closed = state
+            self._seek(index)
+            if closed:
+                return result
+        else:
+            self._advance()  # Skip opening quote
+            result = ""
+
+        text = self.json_string
+        stops = _STRING_STOPS[quote_char]  # type: ignore
+        while True:
+            match = stops.search(text, self.index)
+            if match is None:
+                result += text[self.index :]
+                self._seek(len(text))
+                self._strings[start] = (self.index, result, False)
+                return result
+            escape = match.start()
+            result += text[self.index : escape]
+            self._seek(escape + 1)
+            if text[escape] == quote_char:
+                self._strings[start] = (self.index, result, True)
+                return result
+
+            # escape sequence
+            if self.current_char is None:
+                self._strings[start] = (escape, result, False)
+                return result
+            if self.current_char in ['"', "'", "\\", "/", "b", "f", "n", "r", "t"]:
+                result += _ESCAPES.get(self.current_char, self.current_char)
+            elif self.current_char == "u":
+                self._advance()  # Skip 'u'
+                unicode_char = ""
+                # Try to collect exactly 4 hex digits
+                for _ in range(4):
+                    if self.current_char is None or not self.current_char.isalnum():
+                        # If we can't get 4 hex digits, treat it as a literal '\u' followed by whatever we got
+                        if self.current_char is None:
+                            self._strings[start] = (escape, result, False)
+                        else:
+                            self._strings[start] = (
+                                self.index,
+                                result + "\\u" + unicode_char,
+                                True,
+                            )
+                        return result + "\\u" + unicode_char
+                    unicode_char += self.current_char
+                    self._advance()
+                try:
+                    result += chr(int(unicode_char, 16))
+                except ValueError:
+                    # If invalid hex value, treat as literal
+                    result += "\\u" + unicode_char
+                continue
             self._advance()
-        if self.current_char == quote_char:
-            self._advance()  # Skip closing quote
-        return result
 
     def _parse_multiline_string(self):
-        result = ""
         quote_char = self.current_char
-        self._advance(3)  # Skip first quote
-        while self.current_char is not None:
-            if self.current_char == quote_char and self._peek(2) == quote_char * 2:  # type: ignore
-                self._advance(3)  # Skip first quote
-                break
-            result += self.current_char
-            self._advance()
+        self._advance(3)  # Skip opening quotes
+        start = self.index
+        end = self.json_string.find(quote_char * 3, start)  # type: ignore
+        if end == -1:
+            result = self.json_string[start:]
+            self._seek(len(self.json_string))
+        else:
+            result = self.json_string[start:end]
+            self._seek(end + 3)  # Skip closing quotes
         return result.strip()
 
     def _parse_number(self):
@@ -306,28 +449,15 @@ class DirtyJson:
             return float(number_str)
 
     def _parse_unquoted_string(self):
-        result = ""
-        while self.current_char is not None and self.current_char not in [
-            ":",
-            ",",
-            "}",
-            "]",
-        ]:
-            result += self.current_char
-            self._advance()
+        match = _UNQUOTED_STOPS.search(self.json_string, self.index)
+        end = match.start() if match else len(self.json_string)
+        result = self.json_string[self.index : end]
+        self._seek(end)
         self._advance()
         return result.strip()
 
     def _peek(self, n):
-        peek_index = self.index + 1
-        result = ""
-        for _ in range(n):
-            if peek_index < len(self.json_string):
-                result += self.json_string[peek_index]
-                peek_index += 1
-            else:
-                break
-        return result
+        return self.json_string[self.index + 1 : self.index + 1 + n]
 
     def get_start_pos(self, input_str: str) -> int:
         chars = ["{", "[", '"']
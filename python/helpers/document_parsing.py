@@ -0,0 +1,114 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+import threading
+
+# Document parsing functions executed in worker processes by DocumentQueryHelper.
+# This module is imported by spawned workers, keep its imports light (no agent, models, settings).
+
+PDF_PAGES_PER_TASK = 4
+
+_pool: ProcessPoolExecutor | None = None
+_pool_lock = threading.Lock()
+
+
+def pool_size() -> int:
+    return max(1, min(os.cpu_count() or 1, 4))
+
+
+def get_pool() -> ProcessPoolExecutor:
+    """Bounded process pool shared by all document parsing, workers are spawned lazily."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=pool_size(),
+                # fork would copy the event loop threads of the parent process
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pool
+
+
+def _ready() -> bool:
+    return True
+
+
+async def warm_up():
+    """Start all workers ahead of the first document, spawned workers need a few seconds to import."""
+    import asyncio
+
+    pool = get_pool()
+    loop = asyncio.get_running_loop()
+    await asyncio.gather(
+        *[loop.run_in_executor(pool, _ready) for _ in range(pool_size())]
+    )
+
+
+def shutdown_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+def pdf_page_count(path: str) -> int:
+    import pymupdf
+
+    with pymupdf.open(path) as doc:
+        return doc.page_count
+
+
+def parse_pdf_pages(path: str, start: int, end: int) -> list[str]:
+    """Extract text, markdown tables and OCR'd images of pages [start, end)."""
+    import pymupdf
+    from langchain_community.document_loaders.blob_loaders import Blob
+    from langchain_community.document_loaders.parsers.pdf import PyMuPDFParser
+    from langchain_community.document_loaders.parsers.images import (
+        TesseractBlobParser,
+    )
+
+    with pymupdf.open(path) as doc:
+        part = pymupdf.open()
+        part.insert_pdf(doc, from_page=start, to_page=end - 1)
+        data = part.tobytes()
+        part.close()
+
+    parser = PyMuPDFParser(
+        mode="page",
+        extract_tables="markdown",
+        extract_images=True,
+        images_inner_format="text",
+        images_parser=TesseractBlobParser(),
+    )
+    return [page.page_content for page in parser.lazy_parse(Blob.from_data(data))]
+
+
+def ocr_pdf_pages(path: str, start: int, end: int) -> list[str]:
+    """Fallback for scanned PDFs without a text layer, pages [start, end)."""
+    import pdf2image
+    import pytesseract
+
+    pages = pdf2image.convert_from_path(path, first_page=start + 1, last_page=end)  # type: ignore
+    return [pytesseract.image_to_string(page) + "\n\n" for page in pages]
+
+
+def parse_unstructured(source: str, is_url: bool) -> str:
+    os.environ["USER_AGENT"] = "@mixedbread-ai/unstructured"
+    from langchain_unstructured import UnstructuredLoader
+
+    if is_url:
+        loader = UnstructuredLoader(
+            web_url=source,
+            mode="single",
+            partition_via_api=False,
+            strategy="hi_res",
+        )
+    else:
+        loader = UnstructuredLoader(
+            file_path=source,
+            mode="single",
+            partition_via_api=False,
+            strategy="hi_res",
+        )
+    return "\n".join([element.page_content for element in loader.load()])
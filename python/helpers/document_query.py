@@ -1,35 +1,93 @@
 import mimetypes
 import os
 import asyncio
+import concurrent.futures
+import contextlib
+import threading
+import time
 import aiohttp
 import json
 
 from python.helpers.vector_db import VectorDB
 
 os.environ["USER_AGENT"] = "@mixedbread-ai/unstructured"  # noqa E402
-from langchain_unstructured import UnstructuredLoader  # noqa E402
 
 from urllib.parse import urlparse
-from typing import Callable, Sequence, List, Optional, Tuple
+from typing import AsyncIterator, Callable, Sequence, List, Optional, Tuple
 from datetime import datetime
 
 from langchain_community.document_loaders import AsyncHtmlLoader
 from langchain_community.document_loaders.text import TextLoader
-from langchain_community.document_loaders.pdf import PyMuPDFLoader
 from langchain_community.document_transformers import MarkdownifyTransformer
-from langchain_community.document_loaders.parsers.images import TesseractBlobParser
 
 from langchain_core.documents import Document
 from langchain.schema import SystemMessage, HumanMessage
 
 from python.helpers.print_style import PrintStyle
-from python.helpers import files, errors
+from python.helpers import files, errors, memory, document_parsing
 from agent import Agent
 
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 
 
 DEFAULT_SEARCH_THRESHOLD = 0.5
+# documents without a version (no ETag/Last-Modified) are re-fetched after this time
+UNVERSIONED_DOCUMENT_TTL = 60 * 60
+# changes are written to disk in the background, at most this long after the first unsaved one
+SAVE_DELAY_SECONDS = 5.0
+# how often a waiting task retries the store lock
+LOCK_POLL_SECONDS = 0.01
+
+
+class StoreLock:
+    """Lock for a store shared by contexts on different event loop threads.
+    Tasks wait for it without blocking their loop, the task holding it may enter it again."""
+
+    def __init__(self):
+        self.thread_lock = threading.Lock()
+        self._owner: asyncio.Task | None = None
+
+    @contextlib.asynccontextmanager
+    async def hold(self):
+        task = asyncio.current_task()
+        if task is not None and self._owner is task:
+            yield
+            return
+        while not self.thread_lock.acquire(blocking=False):
+            await asyncio.sleep(LOCK_POLL_SECONDS)
+        self._owner = task
+        try:
+            yield
+        finally:
+            self._owner = None
+            self.thread_lock.release()
+
+
+class StreamingTextSplitter:
+    """Splits text that arrives in pieces (pages), only chunks that can no longer change are emitted.
+    No text is lost, but chunk boundaries may differ from splitting the whole text at once:
+    the separators tried depend on the text seen so far, not on pages still to come."""
+
+    def __init__(self, chunk_size: int, chunk_overlap: int):
+        self.splitter = RecursiveCharacterTextSplitter(
+            chunk_size=chunk_size, chunk_overlap=chunk_overlap
+        )
+        self.buffer = ""
+
+    def feed(self, text: str) -> list[str]:
+        self.buffer = self.buffer + "\n" + text if self.buffer else text
+        chunks = self.splitter.split_text(self.buffer)
+        if len(chunks) < 2:
+            return []
+        # the last chunk may still grow with the next piece, keep it buffered
+        tail = self.buffer.rfind(chunks[-1])
+        self.buffer = self.buffer[tail:] if tail >= 0 else chunks[-1]
+        return chunks[:-1]
+
+    def finish(self) -> list[str]:
+        chunks = self.splitter.split_text(self.buffer) if self.buffer else []
+        self.buffer = ""
+        return chunks
 
 
 class DocumentQueryStore:
@@ -42,26 +100,57 @@ class DocumentQueryStore:
     DEFAULT_CHUNK_SIZE = 1000
     DEFAULT_CHUNK_OVERLAP = 100
 
-    # Cache for initialized stores
+    MANIFEST_FILE = "documents.json"
+
+    # Cache for initialized stores, one per memory subdir and embedding model
     _stores: dict[str, "DocumentQueryStore"] = {}
+    _stores_lock = threading.Lock()
 
     @staticmethod
     def get(agent: Agent):
-        """Create a DocumentQueryStore instance for the specified agent."""
+        """Get the persistent DocumentQueryStore for the agent's memory subdir."""
         if not agent or not agent.config:
             raise ValueError("Agent and agent config must be provided")
 
-        # Initialize store
-        store = DocumentQueryStore(agent)
+        db_dir = files.get_abs_path(
+            memory.get_memory_subdir_abs(agent),
+            "documents",
+            VectorDB.get_embeddings_namespace(agent),
+        )
+        with DocumentQueryStore._stores_lock:
+            store = DocumentQueryStore._stores.get(db_dir)
+            if not store:
+                store = DocumentQueryStore(agent, db_dir)
+                DocumentQueryStore._stores[db_dir] = store
         return store
 
     def __init__(
         self,
         agent: Agent,
+        db_dir: str | None = None,
     ):
-        """Initialize a DocumentQueryStore instance."""
-        self.agent = agent
+        """Initialize a DocumentQueryStore instance, documents indexed before are loaded from db_dir.
+        The store is shared by all agents using db_dir, the agent is only used to load it."""
+        self.db_dir = db_dir
         self.vector_db: VectorDB | None = None
+        # normalized uri -> {"version": str | None, "indexed_at": float, "chunks": int}
+        self.manifest: dict[str, dict] = {}
+        # guards vector_db, manifest and indexing, not held while documents are parsed or embedded
+        self.lock = StoreLock()
+        # normalized uri -> done when the document being indexed by some context is stored
+        self.indexing: dict[str, concurrent.futures.Future] = {}
+        self._save_timer: threading.Timer | None = None
+        if db_dir and files.exists(db_dir, "index.faiss"):
+            try:
+                self.manifest = json.loads(
+                    files.read_file(files.get_abs_path(db_dir, self.MANIFEST_FILE))
+                )
+                self.vector_db = self.init_vector_db(agent)
+            except Exception as e:
+                PrintStyle.error(
+                    f"Failed to load document index '{db_dir}': {errors.format_error(e)}"
+                )
+                self.manifest, self.vector_db = {}, None
 
     @staticmethod
     def normalize_uri(uri: str) -> str:
@@ -94,41 +183,193 @@ class DocumentQueryStore:
 
         return normalized
 
-    def init_vector_db(self):
-        return VectorDB(self.agent, cache=True)
+    def init_vector_db(self, agent: Agent):
+        return VectorDB(agent, cache=True, db_dir=self.db_dir)
+
+    def _save(self):
+        """Schedule a background save, changes within SAVE_DELAY_SECONDS are written together."""
+        if not self.db_dir or not self.vector_db:
+            return
+        with DocumentQueryStore._stores_lock:
+            if self._save_timer:
+                return
+            self._save_timer = threading.Timer(SAVE_DELAY_SECONDS, self.flush)
+            self._save_timer.daemon = True
+            self._save_timer.start()
+
+    def flush(self):
+        """Write the index and manifest now, blocks the calling thread."""
+        with DocumentQueryStore._stores_lock:
+            if self._save_timer:
+                self._save_timer.cancel()
+                self._save_timer = None
+        with self.lock.thread_lock:
+            if not self.db_dir or not self.vector_db:
+                return
+            try:
+                self.vector_db.save()
+                files.write_file(
+                    files.get_abs_path(self.db_dir, self.MANIFEST_FILE),
+                    json.dumps(self.manifest),
+                )
+            except Exception as e:
+                PrintStyle.error(
+                    f"Failed to save document index '{self.db_dir}': {errors.format_error(e)}"
+                )
+
+    @staticmethod
+    async def get_document_version(document_uri: str) -> str | None:
+        """
+        Get a version tag of the document source used to validate the cached index.
+        Files use mtime and size, web documents their ETag or Last-Modified header.
+
+        Args:
+            document_uri: The normalized URI of the document
+
+        Returns:
+            Version string or None if the source does not provide any
+        """
+        parsed = urlparse(document_uri)
+        scheme = parsed.scheme or "file"
+        try:
+            if scheme == "file":
+                stat = os.stat(document_uri.removeprefix("file://"))
+                return f"{stat.st_mtime_ns}:{stat.st_size}"
+            if scheme in ["http", "https"]:
+                async with aiohttp.ClientSession() as session:
+                    async with session.head(
+                        document_uri,
+                        timeout=aiohttp.ClientTimeout(total=2.0),
+                        allow_redirects=True,
+                    ) as response:
+                        if response.status > 399:
+                            return None
+                        return response.headers.get("etag") or response.headers.get(
+                            "last-modified"
+                        )
+        except Exception:
+            return None
+        return None
+
+    def is_document_current(self, document_uri: str, version: str | None) -> bool:
+        """
+        Check if a document is indexed and its source did not change since.
+
+        Args:
+            document_uri: The URI of the document
+            version: Current version of the source from get_document_version
+
+        Returns:
+            True if the indexed document can be reused
+        """
+        entry = self.manifest.get(self.normalize_uri(document_uri))
+        if not entry or not self.vector_db:
+            return False
+        if version is not None or entry.get("version") is not None:
+            return entry.get("version") == version
+        return time.time() - entry.get("indexed_at", 0) < UNVERSIONED_DOCUMENT_TTL
 
     async def add_document(
-        self, text: str, document_uri: str, metadata: dict | None = None
+        self,
+        agent: Agent,
+        text: str,
+        document_uri: str,
+        metadata: dict | None = None,
+        version: str | None = None,
     ) -> tuple[bool, list[str]]:
         """
         Add a document to the store with the given URI.
 
         Args:
+            agent: Agent whose embedding model creates the index if there is none yet
             text: The document text content
             document_uri: The URI that uniquely identifies this document
             metadata: Optional metadata for the document
+            version: Version of the document source, see get_document_version
 
         Returns:
             True if successful, False otherwise
         """
+
+        async def single():
+            yield text
+
+        success, ids, _ = await self.add_document_stream(
+            agent, single(), document_uri, metadata, version
+        )
+        return success, ids
+
+    async def add_document_stream(
+        self,
+        agent: Agent,
+        texts: AsyncIterator[str],
+        document_uri: str,
+        metadata: dict | None = None,
+        version: str | None = None,
+        on_first_chunk: Callable[[], None] | None = None,
+    ) -> tuple[bool, list[str], str]:
+        """
+        Add a document whose text arrives in pieces, chunks are embedded as soon as they are complete.
+        Parsing and embedding run without the store lock, it is held only to replace the document.
+
+        Args:
+            agent: Agent whose embedding model creates the index if there is none yet
+            texts: Async iterator of text pieces (e.g. pages) in document order
+            document_uri: The URI that uniquely identifies this document
+            metadata: Optional metadata for the document
+            version: Version of the document source, see get_document_version
+            on_first_chunk: Called once the first chunk is embedded
+
+        Returns:
+            Success flag, ids of the chunks and the full document text
+        """
         # Normalize the URI
         document_uri = self.normalize_uri(document_uri)
 
-        # Delete existing document if it exists to avoid duplicates
-        await self.delete_document(document_uri)
-
         # Initialize metadata
         doc_metadata = metadata or {}
         doc_metadata["document_uri"] = document_uri
         doc_metadata["timestamp"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
-        # Split text into chunks
-        text_splitter = RecursiveCharacterTextSplitter(
+        splitter = StreamingTextSplitter(
             chunk_size=self.DEFAULT_CHUNK_SIZE, chunk_overlap=self.DEFAULT_CHUNK_OVERLAP
         )
-        chunks = text_splitter.split_text(text)
+        parts: list[str] = []
+        chunks: list[str] = []
+        embeddings: list[list[float]] = []
+
+        async def embed(new_chunks: list[str]) -> bool:
+            try:
+                # Initialize vector db if not already initialized
+                async with self.lock.hold():
+                    if not self.vector_db:
+                        self.vector_db = self.init_vector_db(agent)
+                    vector_db = self.vector_db
+                embeddings.extend(await vector_db.embed_documents(new_chunks))
+            except Exception as e:
+                err_text = errors.format_error(e)
+                PrintStyle.error(f"Error adding document '{document_uri}': {err_text}")
+                return False
+            first = not chunks
+            chunks.extend(new_chunks)
+            if first and on_first_chunk:
+                on_first_chunk()
+            return True
+
+        # parsing errors propagate, indexing errors are reported as failure
+        async for text in texts:
+            parts.append(text)
+            new_chunks = splitter.feed(text)
+            if new_chunks and not await embed(new_chunks):
+                return False, [], "\n".join(parts)
+        new_chunks = splitter.finish()
+        if new_chunks and not await embed(new_chunks):
+            return False, [], "\n".join(parts)
+
+        if not chunks:
+            PrintStyle.error(f"No chunks created for document: {document_uri}")
+            return False, [], "\n".join(parts)
 
-        # Create documents
         docs = []
         for i, chunk in enumerate(chunks):
             chunk_metadata = doc_metadata.copy()
@@ -136,24 +377,26 @@ class DocumentQueryStore:
             chunk_metadata["total_chunks"] = len(chunks)
             docs.append(Document(page_content=chunk, metadata=chunk_metadata))
 
-        if not docs:
-            PrintStyle.error(f"No chunks created for document: {document_uri}")
-            return False, []
-
-        try:
-            # Initialize vector db if not already initialized
-            if not self.vector_db:
-                self.vector_db = self.init_vector_db()
-
-            ids = await self.vector_db.insert_documents(docs)
-            PrintStyle.standard(
-                f"Added document '{document_uri}' with {len(docs)} chunks"
-            )
-            return True, ids
-        except Exception as e:
-            err_text = errors.format_error(e)
-            PrintStyle.error(f"Error adding document '{document_uri}': {err_text}")
-            return False, []
+        async with self.lock.hold():
+            # Delete existing document if it exists to avoid duplicates
+            await self.delete_document(document_uri)
+            try:
+                if not self.vector_db:
+                    self.vector_db = self.init_vector_db(agent)
+                ids = await self.vector_db.insert_documents(docs, embeddings)
+            except Exception as e:
+                err_text = errors.format_error(e)
+                PrintStyle.error(f"Error adding document '{document_uri}': {err_text}")
+                return False, [], "\n".join(parts)
+
+            self.manifest[document_uri] = {
+                "version": version,
+                "indexed_at": time.time(),
+                "chunks": len(ids),
+            }
+            self._save()
+        PrintStyle.standard(f"Added document '{document_uri}' with {len(docs)} chunks")
+        return True, ids, "\n".join(parts)
 
     async def get_document(self, document_uri: str) -> Optional[Document]:
         """
@@ -165,30 +408,30 @@ class DocumentQueryStore:
         Returns:
             The complete document if found, None otherwise
         """
+        async with self.lock.hold():
+            # DB not initialized, no documents inside
+            if not self.vector_db:
+                return None
 
-        # DB not initialized, no documents inside
-        if not self.vector_db:
-            return None
-
-        # Normalize the URI
-        document_uri = self.normalize_uri(document_uri)
+            # Normalize the URI
+            document_uri = self.normalize_uri(document_uri)
 
-        # Get all chunks for this document
-        docs = await self._get_document_chunks(document_uri)
-        if not docs:
-            PrintStyle.error(f"Document not found: {document_uri}")
-            return None
+            # Get all chunks for this document
+            docs = await self._get_document_chunks(document_uri)
+            if not docs:
+                PrintStyle.error(f"Document not found: {document_uri}")
+                return None
 
-        # Combine chunks into a single document
-        chunks = sorted(docs, key=lambda x: x.metadata.get("chunk_index", 0))
-        full_content = "\n".join(chunk.page_content for chunk in chunks)
+            # Combine chunks into a single document
+            chunks = sorted(docs, key=lambda x: x.metadata.get("chunk_index", 0))
+            full_content = "\n".join(chunk.page_content for chunk in chunks)
 
-        # Use metadata from first chunk
-        metadata = chunks[0].metadata.copy()
-        metadata.pop("chunk_index", None)
-        metadata.pop("total_chunks", None)
+            # Use metadata from first chunk
+            metadata = chunks[0].metadata.copy()
+            metadata.pop("chunk_index", None)
+            metadata.pop("total_chunks", None)
 
-        return Document(page_content=full_content, metadata=metadata)
+            return Document(page_content=full_content, metadata=metadata)
 
     async def _get_document_chunks(self, document_uri: str) -> List[Document]:
         """
@@ -200,22 +443,22 @@ class DocumentQueryStore:
         Returns:
             List of document chunks
         """
+        async with self.lock.hold():
+            # DB not initialized, no documents inside
+            if not self.vector_db:
+                return []
 
-        # DB not initialized, no documents inside
-        if not self.vector_db:
-            return []
-
-        # Normalize the URI
-        document_uri = self.normalize_uri(document_uri)
+            # Normalize the URI
+            document_uri = self.normalize_uri(document_uri)
 
-        # get docs from vector db
+            # get docs from vector db
 
-        chunks = await self.vector_db.search_by_metadata(
-            filter=f"document_uri == '{document_uri}'",
-        )
+            chunks = await self.vector_db.search_by_metadata(
+                filter=f"document_uri == '{document_uri}'",
+            )
 
-        PrintStyle.standard(f"Found {len(chunks)} chunks for document: {document_uri}")
-        return chunks
+            PrintStyle.standard(f"Found {len(chunks)} chunks for document: {document_uri}")
+            return chunks
 
     async def document_exists(self, document_uri: str) -> bool:
         """
@@ -227,16 +470,16 @@ class DocumentQueryStore:
         Returns:
             True if the document exists, False otherwise
         """
+        async with self.lock.hold():
+            # DB not initialized, no documents inside
+            if not self.vector_db:
+                return False
 
-        # DB not initialized, no documents inside
-        if not self.vector_db:
-            return False
+            # Normalize the URI
+            document_uri = self.normalize_uri(document_uri)
 
-        # Normalize the URI
-        document_uri = self.normalize_uri(document_uri)
-
-        chunks = await self._get_document_chunks(document_uri)
-        return len(chunks) > 0
+            chunks = await self._get_document_chunks(document_uri)
+            return len(chunks) > 0
 
     async def delete_document(self, document_uri: str) -> bool:
         """
@@ -248,32 +491,34 @@ class DocumentQueryStore:
         Returns:
             True if deleted, False if not found
         """
+        async with self.lock.hold():
+            # DB not initialized, no documents inside
+            if not self.vector_db:
+                return False
 
-        # DB not initialized, no documents inside
-        if not self.vector_db:
-            return False
-
-        # Normalize the URI
-        document_uri = self.normalize_uri(document_uri)
-
-        chunks = await self.vector_db.search_by_metadata(
-            filter=f"document_uri == '{document_uri}'",
-        )
-        if not chunks:
-            return False
-
-        # Collect IDs to delete
-        ids_to_delete = [chunk.metadata["id"] for chunk in chunks]
+            # Normalize the URI
+            document_uri = self.normalize_uri(document_uri)
 
-        # Delete from vector store
-        if ids_to_delete:
-            dels = await self.vector_db.delete_documents_by_ids(ids_to_delete)
-            PrintStyle.standard(
-                f"Deleted document '{document_uri}' with {len(dels)} chunks"
+            chunks = await self.vector_db.search_by_metadata(
+                filter=f"document_uri == '{document_uri}'",
             )
-            return True
+            if not chunks:
+                return False
+
+            # Collect IDs to delete
+            ids_to_delete = [chunk.metadata["id"] for chunk in chunks]
+
+            # Delete from vector store
+            if ids_to_delete:
+                dels = await self.vector_db.delete_documents_by_ids(ids_to_delete)
+                self.manifest.pop(document_uri, None)
+                self._save()
+                PrintStyle.standard(
+                    f"Deleted document '{document_uri}' with {len(dels)} chunks"
+                )
+                return True
 
-        return False
+            return False
 
     async def search_documents(
         self, query: str, limit: int = 10, threshold: float = 0.5, filter: str = ""
@@ -289,26 +534,26 @@ class DocumentQueryStore:
         Returns:
             List of matching documents
         """
+        async with self.lock.hold():
+            # DB not initialized, no documents inside
+            if not self.vector_db:
+                return []
 
-        # DB not initialized, no documents inside
-        if not self.vector_db:
-            return []
-
-        # Handle empty query
-        if not query:
-            return []
+            # Handle empty query
+            if not query:
+                return []
 
-        # Perform search
-        try:
-            results = await self.vector_db.search_by_similarity_threshold(
-                query=query, limit=limit, threshold=threshold, filter=filter
-            )
+            # Perform search
+            try:
+                results = await self.vector_db.search_by_similarity_threshold(
+                    query=query, limit=limit, threshold=threshold, filter=filter
+                )
 
-            PrintStyle.standard(f"Search '{query}' returned {len(results)} results")
-            return results
-        except Exception as e:
-            PrintStyle.error(f"Error searching documents: {str(e)}")
-            return []
+                PrintStyle.standard(f"Search '{query}' returned {len(results)} results")
+                return results
+            except Exception as e:
+                PrintStyle.error(f"Error searching documents: {str(e)}")
+                return []
 
     async def search_document(
         self, document_uri: str, query: str, limit: int = 10, threshold: float = 0.5
@@ -336,19 +581,20 @@ class DocumentQueryStore:
         Returns:
             List of document URIs
         """
-        # DB not initialized, no documents inside
-        if not self.vector_db:
-            return []
+        async with self.lock.hold():
+            # DB not initialized, no documents inside
+            if not self.vector_db:
+                return []
 
-        # Extract unique URIs
-        uris = set()
-        for doc in self.vector_db.db.get_all_docs().values():
-            if isinstance(doc.metadata, dict):
-                uri = doc.metadata.get("document_uri")
-                if uri:
-                    uris.add(uri)
+            # Extract unique URIs
+            uris = set()
+            for doc in self.vector_db.db.get_all_docs().values():
+                if isinstance(doc.metadata, dict):
+                    uri = doc.metadata.get("document_uri")
+                    if uri:
+                        uris.add(uri)
 
-        return sorted(list(uris))
+            return sorted(list(uris))
 
 
 class DocumentQueryHelper:
@@ -359,7 +605,6 @@ class DocumentQueryHelper:
         self.agent = agent
         self.store = DocumentQueryStore.get(agent)
         self.progress_callback = progress_callback or (lambda x: None)
-        self.store_lock = asyncio.Lock()
 
     async def document_qa(
         self, document_uris: List[str], questions: Sequence[str]
@@ -510,48 +755,86 @@ class DocumentQueryHelper:
         document_uri_norm = self.store.normalize_uri(document_uri)
 
         await self.agent.handle_intervention()
-        exists = await self.store.document_exists(document_uri_norm)
-        document_content = ""
-        if not exists:
-            await self.agent.handle_intervention()
-            if mimetype.startswith("image/"):
-                document_content = self.handle_image_document(document_uri, scheme)
-            elif mimetype == "text/html":
-                document_content = self.handle_html_document(document_uri, scheme)
-            elif mimetype.startswith("text/") or mimetype == "application/json":
-                document_content = self.handle_text_document(document_uri, scheme)
-            elif mimetype == "application/pdf":
-                document_content = self.handle_pdf_document(document_uri, scheme)
-            else:
-                document_content = self.handle_unstructured_document(
-                    document_uri, scheme
+        version = await self.store.get_document_version(document_uri_norm)
+        # the store is shared with other contexts, a document they are indexing is waited for
+        while True:
+            async with self.store.lock.hold():
+                exists = self.store.is_document_current(document_uri_norm, version)
+                pending = self.store.indexing.get(document_uri_norm)
+                if not exists and add_to_db and not pending:
+                    indexing = concurrent.futures.Future()
+                    self.store.indexing[document_uri_norm] = indexing
+            if exists or not add_to_db or not pending:
+                break
+            self.progress_callback(f"Waiting for document indexing")
+            await asyncio.wrap_future(pending)
+
+        if not exists and add_to_db:
+            try:
+                return await self._index_document(
+                    document_uri, document_uri_norm, scheme, mimetype, version
                 )
-            if add_to_db:
-                self.progress_callback(f"Indexing document")
-                await self.agent.handle_intervention()
-                async with self.store_lock:
-                    success, ids = await self.store.add_document(
-                        document_content, document_uri_norm
-                    )
-                if not success:
-                    self.progress_callback(f"Failed to index document")
-                    raise ValueError(
-                        f"DocumentQueryHelper::document_get_content: Failed to index document: {document_uri_norm}"
-                    )
-                self.progress_callback(f"Indexed {len(ids)} chunks")
-        else:
-            await self.agent.handle_intervention()
+            finally:
+                async with self.store.lock.hold():
+                    del self.store.indexing[document_uri_norm]
+                indexing.set_result(None)
+        if exists:
             doc = await self.store.get_document(document_uri_norm)
             if doc:
-                document_content = doc.page_content
-            else:
-                raise ValueError(
-                    f"DocumentQueryHelper::document_get_content: Document not found: {document_uri_norm}"
-                )
+                return doc.page_content
+            raise ValueError(
+                f"DocumentQueryHelper::document_get_content: Document not found: {document_uri_norm}"
+            )
+
+        await self.agent.handle_intervention()
+        texts = self.read_document(document_uri, scheme, mimetype)
+        return "\n".join([text async for text in texts])
+
+    async def _index_document(
+        self,
+        document_uri: str,
+        document_uri_norm: str,
+        scheme: str,
+        mimetype: str,
+        version: str | None,
+    ) -> str:
+        self.progress_callback(f"Indexing document")
+        started = time.monotonic()
+        success, ids, document_content = await self.store.add_document_stream(
+            self.agent,
+            self.read_document(document_uri, scheme, mimetype),
+            document_uri_norm,
+            version=version,
+            on_first_chunk=lambda: self.progress_callback(
+                f"First chunk embedded after {time.monotonic() - started:.2f}s"
+            ),
+        )
+        if not success:
+            self.progress_callback(f"Failed to index document")
+            raise ValueError(
+                f"DocumentQueryHelper::document_get_content: Failed to index document: {document_uri_norm}"
+            )
+        self.progress_callback(f"Indexed {len(ids)} chunks")
         return document_content
 
-    def handle_image_document(self, document: str, scheme: str) -> str:
-        return self.handle_unstructured_document(document, scheme)
+    async def read_document(
+        self, document_uri: str, scheme: str, mimetype: str
+    ) -> AsyncIterator[str]:
+        """Yield the document text in pieces, heavy parsing runs in the document parsing process pool."""
+        if mimetype.startswith("image/"):
+            yield await self.handle_image_document(document_uri, scheme)
+        elif mimetype == "text/html":
+            yield await asyncio.to_thread(self.handle_html_document, document_uri, scheme)
+        elif mimetype.startswith("text/") or mimetype == "application/json":
+            yield await asyncio.to_thread(self.handle_text_document, document_uri, scheme)
+        elif mimetype == "application/pdf":
+            async for page in self.handle_pdf_document(document_uri, scheme):
+                yield page
+        else:
+            yield await self.handle_unstructured_document(document_uri, scheme)
+
+    async def handle_image_document(self, document: str, scheme: str) -> str:
+        return await self.handle_unstructured_document(document, scheme)
 
     def handle_html_document(self, document: str, scheme: str) -> str:
         if scheme in ["http", "https"]:
@@ -590,112 +873,114 @@ class DocumentQueryHelper:
 
         return "\n".join([element.page_content for element in elements])
 
-    def handle_pdf_document(self, document: str, scheme: str) -> str:
-        temp_file_path = ""
+    def _write_temp_file(self, document: str, scheme: str, suffix: str) -> str:
+        import tempfile
+
         if scheme == "file":
-            # Use RFC file operations to read the PDF file as binary
+            # Use RFC file operations to read the file as binary
             file_content_bytes = files.read_file_bin(document)
-            # Create a temporary file for PyMuPDFLoader since it needs a file path
-            import tempfile
-
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as temp_file:
-                temp_file.write(file_content_bytes)
-                temp_file_path = temp_file.name
         elif scheme in ["http", "https"]:
-            # download the file from the web url to a temporary file using python libraries for downloading
+            # download the file from the web url to a temporary file
             import requests
-            import tempfile
 
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as temp_file:
-                response = requests.get(document, timeout=10.0)
-                if response.status_code != 200:
-                    raise ValueError(
-                        f"DocumentQueryHelper::handle_pdf_document: Failed to download PDF from {document}: {response.status_code}"
-                    )
-                temp_file.write(response.content)
-                temp_file_path = temp_file.name
+            response = requests.get(document, timeout=10.0)
+            if response.status_code != 200:
+                raise ValueError(
+                    f"DocumentQueryHelper::_write_temp_file: Failed to download {document}: {response.status_code}"
+                )
+            file_content_bytes = response.content
         else:
             raise ValueError(f"Unsupported scheme: {scheme}")
 
+        # parsers need a file path
+        with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as temp_file:
+            temp_file.write(file_content_bytes)
+            return temp_file.name
+
+    async def handle_pdf_document(
+        self, document: str, scheme: str
+    ) -> AsyncIterator[str]:
+        temp_file_path = await asyncio.to_thread(
+            self._write_temp_file, document, scheme, ".pdf"
+        )
         if not os.path.exists(temp_file_path):
             raise ValueError(
                 f"DocumentQueryHelper::handle_pdf_document: Temporary file not found: {temp_file_path}"
             )
 
+        loop = asyncio.get_running_loop()
+        pool = document_parsing.get_pool()
+        step = document_parsing.PDF_PAGES_PER_TASK
+        tasks: list[asyncio.Future] = []
         try:
             try:
-                loader = PyMuPDFLoader(
-                    temp_file_path,
-                    mode="single",
-                    extract_tables="markdown",
-                    extract_images=True,
-                    images_inner_format="text",
-                    images_parser=TesseractBlobParser(),
-                    pages_delimiter="\n",
+                page_count = await loop.run_in_executor(
+                    pool, document_parsing.pdf_page_count, temp_file_path
                 )
-                elements: list[Document] = loader.load()
-                contents = "\n".join([element.page_content for element in elements])
             except Exception as e:
                 PrintStyle.error(
                     f"DocumentQueryHelper::handle_pdf_document: Error loading with PyMuPDF: {e}"
                 )
-                contents = ""
+                page_count = 0
 
-            if not contents:
-                import pdf2image
-                import pytesseract
+            # all page ranges are queued at once, the pool bounds the parallelism
+            ranges = [(start, min(start + step, page_count)) for start in range(0, page_count, step)]
+            tasks = [
+                loop.run_in_executor(
+                    pool, document_parsing.parse_pdf_pages, temp_file_path, start, end
+                )
+                for start, end in ranges
+            ]
+            has_content = False
+            for (start, end), task in zip(ranges, tasks):
+                try:
+                    pages = await task
+                except Exception as e:
+                    PrintStyle.error(
+                        f"DocumentQueryHelper::handle_pdf_document: Error loading pages {start}-{end} with PyMuPDF: {e}"
+                    )
+                    pages = await loop.run_in_executor(
+                        pool, document_parsing.ocr_pdf_pages, temp_file_path, start, end
+                    )
+                for page in pages:
+                    if page:
+                        has_content = True
+                        yield page
 
+            if not has_content:
                 PrintStyle.debug(
                     f"DocumentQueryHelper::handle_pdf_document: FALLBACK Converting PDF to images: {temp_file_path}"
                 )
-
-                # Convert PDF to images
-                pages = pdf2image.convert_from_path(temp_file_path)  # type: ignore
+                count = page_count or 1_000_000  # unknown page count, convert all
+                pages = await loop.run_in_executor(
+                    pool, document_parsing.ocr_pdf_pages, temp_file_path, 0, count
+                )
                 for page in pages:
-                    contents += pytesseract.image_to_string(page) + "\n\n"
-
-            return contents
+                    yield page
         finally:
+            for task in tasks:
+                task.cancel()
             os.unlink(temp_file_path)
 
-    def handle_unstructured_document(self, document: str, scheme: str) -> str:
-        elements: list[Document] = []
+    async def handle_unstructured_document(self, document: str, scheme: str) -> str:
+        loop = asyncio.get_running_loop()
+        pool = document_parsing.get_pool()
         if scheme in ["http", "https"]:
-            # loader = UnstructuredURLLoader(urls=[document], mode="single")
-            loader = UnstructuredLoader(
-                web_url=document,
-                mode="single",
-                partition_via_api=False,
-                # chunking_strategy="by_page",
-                strategy="hi_res",
+            return await loop.run_in_executor(
+                pool, document_parsing.parse_unstructured, document, True
             )
-            elements = loader.load()
         elif scheme == "file":
-            # Use RFC file operations to read the file as binary
-            file_content_bytes = files.read_file_bin(document)
-            # Create a temporary file for UnstructuredLoader since it needs a file path
-            import tempfile
-            import os
-
             # Get file extension to preserve it for proper processing
             _, ext = os.path.splitext(document)
-            with tempfile.NamedTemporaryFile(delete=False, suffix=ext) as temp_file:
-                temp_file.write(file_content_bytes)
-                temp_file_path = temp_file.name
-
+            temp_file_path = await asyncio.to_thread(
+                self._write_temp_file, document, scheme, ext
+            )
             try:
-                loader = UnstructuredLoader(
-                    file_path=temp_file_path,
-                    mode="single",
-                    partition_via_api=False,
-                    # chunking_strategy="by_page",
-                    strategy="hi_res",
+                return await loop.run_in_executor(
+                    pool, document_parsing.parse_unstructured, temp_file_path, False
                 )
-                elements = loader.load()
             finally:
                 # Clean up temporary file
                 os.unlink(temp_file_path)
         else:
             raise ValueError(f"Unsupported scheme: {scheme}")
-
-        return "\n".join([element.page_content for element in elements])
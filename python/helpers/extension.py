@@ -1,4 +1,8 @@
 from abc import abstractmethod
+from dataclasses import dataclass
+import os
+import threading
+import time
 from typing import Any
 from python.helpers import extract_tools, files
 from typing import TYPE_CHECKING
@@ -9,8 +13,26 @@ if TYPE_CHECKING:
 
 DEFAULT_EXTENSIONS_FOLDER = "python/extensions"
 USER_EXTENSIONS_FOLDER = "usr/extensions"
+CHAIN_CHECK_INTERVAL = 2.0  # seconds between directory mtime checks of a cached chain
 
-_cache: dict[str, list[type["Extension"]]] = {}
+# folder -> (mtime of the folder, extension classes in it)
+_cache: dict[str, tuple[int | None, list[type["Extension"]]]] = {}
+
+
+@dataclass
+class _Chain:
+    classes: list[type["Extension"]]  # merged and ordered, ready to run
+    paths: list[str]  # candidate folders, existing or not
+    stamps: tuple
+    checked: float
+
+
+# (profile, project, extension point) -> chain
+_chains: dict[tuple[str, str, str], _Chain] = {}
+
+# (extension point, extension file) -> [calls, total seconds, max seconds]
+_timings: dict[tuple[str, str], list] = {}
+_timings_lock = threading.Lock()
 
 
 class Extension:
@@ -27,11 +49,85 @@ class Extension:
 async def call_extensions(
     extension_point: str, agent: "Agent|None" = None, **kwargs
 ) -> Any:
+    # execute unique extensions
+    for cls in _get_chain(extension_point, agent):
+        start = time.perf_counter()
+        try:
+            await cls(agent=agent).execute(**kwargs)
+        finally:
+            _record(extension_point, cls, time.perf_counter() - start)
+
+
+def reload_extensions():
+    """Forget cached chains and classes, extensions are loaded again on next call."""
+    _chains.clear()
+    _cache.clear()
+
+
+def get_extension_stats() -> list[dict[str, Any]]:
+    """Time spent in each extension, slowest in total first."""
+    with _timings_lock:
+        items = [(key, list(value)) for key, value in _timings.items()]
+    stats = [
+        {
+            "extension_point": extension_point,
+            "extension": extension,
+            "calls": calls,
+            "total_ms": round(total * 1000, 3),
+            "avg_ms": round(total / calls * 1000, 3),
+            "max_ms": round(maximum * 1000, 3),
+        }
+        for (extension_point, extension), (calls, total, maximum) in items
+    ]
+    return sorted(stats, key=lambda item: item["total_ms"], reverse=True)
+
+
+def clear_extension_stats():
+    with _timings_lock:
+        _timings.clear()
+
+
+def _record(extension_point: str, cls: type["Extension"], seconds: float):
+    key = (extension_point, _get_file_from_module(cls.__module__))
+    with _timings_lock:
+        timing = _timings.get(key)
+        if timing is None:
+            _timings[key] = [1, seconds, seconds]
+        else:
+            timing[0] += 1
+            timing[1] += seconds
+            if seconds > timing[2]:
+                timing[2] = seconds
+
+
+def _get_chain(extension_point: str, agent: "Agent|None") -> list[type["Extension"]]:
     from python.helpers import projects, subagents
 
+    profile = agent.config.profile if agent and agent.config.profile else ""
+    project = (projects.get_context_project_name(agent.context) or "") if agent else ""
+    key = (profile, project, extension_point)
+
+    # folders are checked for changes at most once per CHAIN_CHECK_INTERVAL
+    chain = _chains.get(key)
+    now = time.monotonic()
+    if chain is not None:
+        if now - chain.checked < CHAIN_CHECK_INTERVAL:
+            return chain.classes
+        if _get_stamps(chain.paths) == chain.stamps:
+            chain.checked = now
+            return chain.classes
+
     # search for extension folders in all agent's paths
-    paths = subagents.get_paths(agent, "extensions", extension_point, default_root="python")
-    all_exts = [cls for path in paths for cls in _get_extensions(path)]
+    paths = subagents.get_paths(
+        agent, "extensions", extension_point, default_root="python", must_exist_completely=False
+    )
+    stamps = _get_stamps(paths)
+    all_exts = [
+        cls
+        for path, stamp in zip(paths, stamps)
+        if stamp is not None
+        for cls in _get_extensions(path, stamp)
+    ]
 
     # merge: first ocurrence of file name is the override
     unique = {}
@@ -43,24 +139,34 @@ async def call_extensions(
         unique.values(), key=lambda cls: _get_file_from_module(cls.__module__)
     )
 
-    # execute unique extensions
-    for cls in classes:
-        await cls(agent=agent).execute(**kwargs)
+    _chains[key] = _Chain(classes=classes, paths=paths, stamps=stamps, checked=now)
+    return classes
+
+
+def _get_stamps(paths: list[str]) -> tuple:
+    stamps = []
+    for path in paths:
+        try:
+            stamps.append(os.stat(path).st_mtime_ns)
+        except OSError:
+            stamps.append(None)
+    return tuple(stamps)
 
 
 def _get_file_from_module(module_name: str) -> str:
     return module_name.split(".")[-1]
 
 
-def _get_extensions(folder: str):
+def _get_extensions(folder: str, stamp: int | None = None):
     global _cache
     folder = files.get_abs_path(folder)
-    if folder in _cache:
-        classes = _cache[folder]
+    cached = _cache.get(folder)
+    if cached is not None and (stamp is None or cached[0] == stamp):
+        classes = cached[1]
     else:
         if not files.exists(folder):
             return []
         classes = extract_tools.load_classes_from_folder(folder, "*", Extension)
-        _cache[folder] = classes
+        _cache[folder] = (stamp, classes)
 
     return classes
@@ -90,6 +90,10 @@ def fix_json_string(json_string):
 
 T = TypeVar('T')  # Define a generic type variable
 
+# process-wide cache of classes loaded from files, revalidated by file stat
+_file_classes_cache: dict[tuple[str, type, bool], tuple[tuple[int, int], list[type]]] = {}
+_file_classes_stats = {"hits": 0, "misses": 0}
+
 def import_module(file_path: str) -> ModuleType:
     # Handle file paths with periods in the name using importlib.util
     abs_path = get_abs_path(file_path)
@@ -149,3 +153,33 @@ def load_classes_from_file(file: str, base_class: type[T], one_per_file: bool =
                 break
                 
     return classes
+
+
+def load_classes_from_file_cached(file: str, base_class: type[T], one_per_file: bool = True) -> list[type[T]]:
+    """Same as load_classes_from_file, but the module is only executed again when the file changes (mtime/size)."""
+    abs_path = os.path.realpath(get_abs_path(file))
+    stat = os.stat(abs_path)
+    signature = (stat.st_mtime_ns, stat.st_size)
+    key = (abs_path, base_class, one_per_file)
+
+    cached = _file_classes_cache.get(key)
+    if cached and cached[0] == signature:
+        _file_classes_stats["hits"] += 1
+        return list(cached[1])
+
+    _file_classes_stats["misses"] += 1
+    classes = load_classes_from_file(abs_path, base_class, one_per_file)
+    _file_classes_cache[key] = (signature, list(classes))
+    return classes
+
+def reload_classes(file: str | None = None):
+    """Drop cached classes of one file or of all files, they will be imported again on next use."""
+    if file is None:
+        _file_classes_cache.clear()
+        return
+    abs_path = os.path.realpath(get_abs_path(file))
+    for key in [key for key in _file_classes_cache if key[0] == abs_path]:
+        del _file_classes_cache[key]
+
+def get_classes_cache_stats() -> dict[str, int]:
+    return {**_file_classes_stats, "size": len(_file_classes_cache)}
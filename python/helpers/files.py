@@ -15,7 +15,7 @@ import importlib.util
 import inspect
 import glob
 import mimetypes
-from simpleeval import simple_eval
+from simpleeval import simple_eval, SimpleEval
 
 
 class VariablesPlugin(ABC):
@@ -37,7 +37,7 @@ def load_plugin_variables(
         # Create filename and directories list
         plugin_filename = basename(file, ".md") + ".py"
         directories = [dirname(file)] + backup_dirs
-        plugin_file = find_file_in_dirs(plugin_filename, directories)
+        plugin_file = _find_file_in_dirs_cached(plugin_filename, directories)
     except FileNotFoundError:
         plugin_file = None
 
@@ -45,7 +45,7 @@ def load_plugin_variables(
 
         from python.helpers import extract_tools
 
-        classes = extract_tools.load_classes_from_file(
+        classes = extract_tools.load_classes_from_file_cached(
             plugin_file, VariablesPlugin, one_per_file=False
         )
         for cls in classes:
@@ -88,32 +88,22 @@ def parse_file(
         _directories = []
 
     # Find the file in the directories
-    absolute_path = find_file_in_dirs(_filename, _directories)
+    absolute_path = _find_file_in_dirs_cached(_filename, _directories)
 
-    # Read the file content
-    with open(absolute_path, "r", encoding=_encoding) as f:
-        # content = remove_code_fences(f.read())
-        content = f.read()
+    # Read and compile the file content (cached until the file changes)
+    is_json, segments = _get_compiled_template(absolute_path, "parse", _encoding)
 
-    is_json = is_full_json_template(content)
-    content = remove_code_fences(content)
     variables = load_plugin_variables(absolute_path, _directories, **kwargs) or {}  # type: ignore
     variables.update(kwargs)
     if is_json:
-        content = replace_placeholders_json(content, **variables)
+        content = _render_segments(segments, variables, _directories, kwargs, as_json=True)
         obj = json.loads(content)
         # obj = replace_placeholders_dict(obj, **variables)
         return obj
     else:
-        content = replace_placeholders_text(content, **variables)
-        # Process include statements
-        content = process_includes(
-            # here we use kwargs, the plugin variables are not inherited
-            content,
-            _directories,
-            **kwargs,
-        )
-        return content
+        # Replace placeholders and process include statements in one pass
+        # (includes use kwargs, the plugin variables are not inherited)
+        return _render_segments(segments, variables, _directories, kwargs)
 
 
 def read_prompt_file(
@@ -129,31 +119,200 @@ def read_prompt_file(
         _directories = [folder_path] + _directories
 
     # Find the file in the directories
-    absolute_path = find_file_in_dirs(_file, _directories)
+    absolute_path = _find_file_in_dirs_cached(_file, _directories)
 
-    # Read the file content
-    with open(absolute_path, "r", encoding=_encoding) as f:
-        # content = remove_code_fences(f.read())
-        content = f.read()
+    # Read and compile the file content (cached until the file changes)
+    nodes = _get_compiled_template(absolute_path, "prompt", _encoding)
 
     variables = load_plugin_variables(_file, _directories, **kwargs) or {}  # type: ignore
     variables.update(kwargs)
 
-    # evaluate conditions
-    content = evaluate_text_conditions(content, **variables)
+    # evaluate conditions, replace placeholders and process includes in one pass
+    # (includes use kwargs, the plugin variables are not inherited)
+    return _render_nodes(nodes, variables, _directories, kwargs)
 
-    # Replace placeholders with values from kwargs
-    content = replace_placeholders_text(content, **variables)
-
-    # Process include statements
-    content = process_includes(
-        # here we use kwargs, the plugin variables are not inherited
-        content,
-        _directories,
-        **kwargs,
-    )
 
-    return content
+# Compiled prompt templates:
+# templates are read and tokenized once into text, placeholder, include and
+# if-block nodes, lookups are revalidated by directory mtimes and compiled
+# templates by file mtime and size
+
+_IF_PATTERN = re.compile(r"{{\s*if\s+(.*?)}}", flags=re.DOTALL)
+_IF_TOKEN_PATTERN = re.compile(r"{{\s*(if\b.*?|endif)\s*}}", flags=re.DOTALL)
+_TEMPLATE_TOKEN_PATTERN = re.compile(
+    r"{{\s*include\s*['\"](.*?)['\"]\s*}}|{{([^{}]+)}}"
+)
+
+_lookup_cache: dict[tuple[str, tuple[str, ...]], tuple[tuple, str | None]] = {}
+_template_cache: dict[tuple[str, str, str], tuple[tuple[int, int] | None, Any]] = {}
+
+
+def clear_prompt_cache():
+    _lookup_cache.clear()
+    _template_cache.clear()
+
+
+def _stat_signature(path: str) -> tuple[int, int] | None:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def _find_file_in_dirs_cached(_filename: str, _directories: list[str]) -> str:
+    """find_file_in_dirs, remembered until one of the searched directories changes."""
+    key = (_filename, tuple(_directories))
+    cached = _lookup_cache.get(key)
+    if cached and all(_stat_signature(dir) == sig for dir, sig in cached[0]):
+        found = cached[1]
+    else:
+        checked = []
+        found = None
+        for directory in _directories:
+            full_path = get_abs_path(directory, _filename)
+            parent = os.path.dirname(full_path)
+            checked.append((parent, _stat_signature(parent)))
+            if os.path.exists(full_path):
+                found = full_path
+                break
+        _lookup_cache[key] = (tuple(checked), found)
+
+    if not found:
+        raise FileNotFoundError(
+            f"File '{_filename}' not found in any of the provided directories."
+        )
+    return found
+
+
+def _get_compiled_template(absolute_path: str, mode: str, encoding: str):
+    key = (absolute_path, mode, encoding)
+    signature = _stat_signature(absolute_path)
+    cached = _template_cache.get(key)
+    if cached and cached[0] == signature:
+        return cached[1]
+
+    with open(absolute_path, "r", encoding=encoding) as f:
+        content = f.read()
+
+    if mode == "parse":
+        is_json = is_full_json_template(content)
+        compiled = (is_json, _compile_segments(remove_code_fences(content)))
+    else:
+        compiled = _compile_nodes(content)
+    _template_cache[key] = (signature, compiled)
+    return compiled
+
+
+def _compile_nodes(text: str) -> list[tuple]:
+    # same block matching as evaluate_text_conditions, resolved once
+    m_if = _IF_PATTERN.search(text)
+    if not m_if:
+        return [("text", _compile_segments(text))]
+
+    depth = 1
+    pos = m_if.end()
+    while True:
+        m = _IF_TOKEN_PATTERN.search(text, pos)
+        if not m:
+            # Unterminated if-block, keep text as is
+            return [("text", _compile_segments(text))]
+        token = m.group(1)
+        depth += 1 if token.startswith("if ") else -1
+        if depth == 0:
+            break
+        pos = m.end()
+
+    condition = m_if.group(1).strip()
+    try:
+        parsed = SimpleEval.parse(condition)
+    except Exception:
+        parsed = None  # evaluation will fail again and fall back to raw text
+
+    return [
+        ("text", _compile_segments(text[: m_if.start()])),
+        (
+            "if",
+            condition,
+            parsed,
+            _compile_nodes(text[m_if.end() : m.start()]),  # inner
+            _compile_nodes(text[m.end() :]),  # after
+            _compile_segments(text[m_if.start() :]),  # raw fallback
+        ),
+    ]
+
+
+def _compile_segments(text: str) -> list:
+    segments: list = []
+    pos = 0
+    for m in _TEMPLATE_TOKEN_PATTERN.finditer(text):
+        if m.start() > pos:
+            segments.append(text[pos : m.start()])
+        if m.group(1) is not None:
+            segments.append(("include", m.group(1), m.group(0)))
+        else:
+            segments.append(("var", m.group(2), m.group(0)))
+        pos = m.end()
+    if pos < len(text):
+        segments.append(text[pos:])
+    return segments
+
+
+def _render_nodes(
+    nodes: list[tuple], variables: dict, directories: list[str], kwargs: dict
+) -> str:
+    result = ""
+    for node in nodes:
+        if node[0] == "text":
+            result += _render_segments(node[1], variables, directories, kwargs)
+            continue
+
+        _, condition, parsed, inner, after, fallback = node
+        try:
+            evaluator = SimpleEval(names=variables)
+            value = evaluator.eval(condition, previously_parsed=parsed)
+        except Exception:
+            # On evaluation error, do not modify this block
+            return result + _render_segments(fallback, variables, directories, kwargs)
+        if value:
+            result += _render_nodes(inner, variables, directories, kwargs)
+        return result + _render_nodes(after, variables, directories, kwargs)
+    return result
+
+
+def _render_segments(
+    segments: list,
+    variables: dict,
+    directories: list[str],
+    kwargs: dict,
+    as_json: bool = False,
+) -> str:
+    parts = []
+    for segment in segments:
+        if isinstance(segment, str):
+            parts.append(segment)
+            continue
+
+        kind, name, raw = segment
+        if kind == "var":
+            if name not in variables:
+                parts.append(raw)
+            elif as_json:
+                parts.append(json.dumps(variables[name]))
+            else:
+                value = str(variables[name])
+                if "{{" in value:  # values may bring their own includes
+                    value = process_includes(value, directories, **kwargs)
+                parts.append(value)
+        elif as_json or os.path.isabs(name):
+            parts.append(raw)
+        else:
+            # Search for the include file in the directories
+            try:
+                parts.append(read_prompt_file(name, directories, **kwargs))
+            except FileNotFoundError:
+                parts.append(raw)  # Keep original if file not found
+    return "".join(parts)
 
 
 def evaluate_text_conditions(_content: str, **kwargs):
@@ -4,6 +4,7 @@ from collections import OrderedDict
 from collections.abc import Mapping
 import json
 import math
+import threading
 from typing import Coroutine, Literal, TypedDict, cast, Union, Dict, List, Any
 from python.helpers import messages, tokens, settings, call_llm
 from enum import Enum
@@ -83,7 +84,7 @@ class Message(Record):
         self.ai = ai
         self.content = content
         self.summary: str = ""
-        self.tokens: int = tokens or self.calculate_tokens()
+        self.tokens: int = tokens  # 0 until counted by get_tokens()
 
     def get_tokens(self) -> int:
         if not self.tokens:
@@ -116,35 +117,67 @@ class Message(Record):
             "ai": self.ai,
             "content": self.content,
             "summary": self.summary,
-            "tokens": self.tokens,
+            "tokens": self.get_tokens(),
         }
 
     @staticmethod
     def from_dict(data: dict, history: "History"):
         content = data.get("content", "Content lost")
-        msg = Message(ai=data["ai"], content=content)
+        msg = Message(ai=data["ai"], content=content, tokens=data.get("tokens", 0))
         msg.summary = data.get("summary", "")
-        msg.tokens = data.get("tokens", 0)
         return msg
 
 
 class Topic(Record):
     def __init__(self, history: "History"):
         self.history = history
-        self.summary: str = ""
+        self._summary: str = ""
+        self._summary_tokens: int = 0
+        self._messages_tokens: int | None = 0  # running total, None when dirty
         self.messages: list[Message] = []
 
+    @property
+    def summary(self) -> str:
+        return self._summary
+
+    @summary.setter
+    def summary(self, value: str):
+        # summaries are tokenized once when set, not on every get_tokens()
+        self._summary_tokens = tokens.approximate_tokens(value) if value else 0
+        self._summary = value
+        self.history.invalidate_tokens()
+
     def get_tokens(self):
         if self.summary:
-            return tokens.approximate_tokens(self.summary)
-        else:
-            return sum(msg.get_tokens() for msg in self.messages)
+            return self._summary_tokens
+        with self.history.tokens_lock:
+            if self._messages_tokens is None:
+                # messages loaded without a stored count are tokenized in one batch
+                missing = [msg for msg in self.messages if not msg.tokens]
+                counts = tokens.approximate_tokens_batch(
+                    [msg.output_text() for msg in missing]
+                )
+                for msg, count in zip(missing, counts):
+                    msg.tokens = count
+                self._messages_tokens = sum(msg.get_tokens() for msg in self.messages)
+            return self._messages_tokens
+
+    def invalidate_tokens(self):
+        with self.history.tokens_lock:
+            self._messages_tokens = None
+            self.history.invalidate_tokens()
 
     def add_message(
         self, ai: bool, content: MessageContent, tokens: int = 0
     ) -> Message:
         msg = Message(ai=ai, content=content, tokens=tokens)
-        self.messages.append(msg)
+        with self.history.tokens_lock:
+            self.messages.append(msg)
+            if self._messages_tokens is not None:
+                self._messages_tokens += msg.get_tokens()
+            # the current topic is not part of the cached history totals
+            if self is not self.history.current:
+                self.history.invalidate_tokens()
         return msg
 
     def output(self) -> list[OutputMessage]:
@@ -193,6 +226,7 @@ class Topic(Record):
                 )
                 msg.set_summary(_json_dumps(trunc))
 
+            self.invalidate_tokens()
             return True
         return False
 
@@ -217,6 +251,7 @@ class Topic(Record):
         )
         sum_msg = Message(False, sum_msg_content)
         self.messages[1 : cnt_to_sum + 1] = [sum_msg]
+        self.invalidate_tokens()
         return True
 
     async def summarize_messages(self, messages: list[Message]):
@@ -243,20 +278,40 @@ class Topic(Record):
         topic.messages = [
             Message.from_dict(m, history=history) for m in data.get("messages", [])
         ]
+        topic.invalidate_tokens()
         return topic
 
 
 class Bulk(Record):
     def __init__(self, history: "History"):
         self.history = history
-        self.summary: str = ""
+        self._summary: str = ""
+        self._summary_tokens: int = 0
+        self._records_tokens: int | None = 0  # None when dirty
         self.records: list[Record] = []
 
+    @property
+    def summary(self) -> str:
+        return self._summary
+
+    @summary.setter
+    def summary(self, value: str):
+        self._summary_tokens = tokens.approximate_tokens(value) if value else 0
+        self._summary = value
+        self.history.invalidate_tokens()
+
     def get_tokens(self):
         if self.summary:
-            return tokens.approximate_tokens(self.summary)
-        else:
-            return sum([r.get_tokens() for r in self.records])
+            return self._summary_tokens
+        with self.history.tokens_lock:
+            if self._records_tokens is None:
+                self._records_tokens = sum([r.get_tokens() for r in self.records])
+            return self._records_tokens
+
+    def invalidate_tokens(self):
+        with self.history.tokens_lock:
+            self._records_tokens = None
+            self.history.invalidate_tokens()
 
     def output(
         self, human_label: str = "user", ai_label: str = "ai"
@@ -292,6 +347,7 @@ class Bulk(Record):
         bulk.summary = data["summary"]
         cls = data["_cls"]
         bulk.records = [Record.from_dict(r, history=history) for r in data["records"]]
+        bulk.invalidate_tokens()
         return bulk
 
 
@@ -302,9 +358,23 @@ class History(Record):
         self.counter = 0
         self.bulks: list[Bulk] = []
         self.topics: list[Topic] = []
+        # cached totals of bulks and topics, None when dirty
+        # writers invalidate after modifying, readers recompute under the lock
+        self.tokens_lock = threading.RLock()
+        self._bulks_tokens: int | None = 0
+        self._topics_tokens: int | None = 0
+        # bumped by every change other than appending to the current topic
+        # (all of them invalidate the cached totals), lets persist_chat journal appends only
+        self.structure_version = 0
         self.current = Topic(history=self)
         self.agent: Agent = agent
 
+    def invalidate_tokens(self):
+        with self.tokens_lock:
+            self._bulks_tokens = None
+            self._topics_tokens = None
+            self.structure_version += 1
+
     def get_tokens(self) -> int:
         return (
             self.get_bulks_tokens()
@@ -318,10 +388,16 @@ class History(Record):
         return total > limit
 
     def get_bulks_tokens(self) -> int:
-        return sum(record.get_tokens() for record in self.bulks)
+        with self.tokens_lock:
+            if self._bulks_tokens is None:
+                self._bulks_tokens = sum(record.get_tokens() for record in self.bulks)
+            return self._bulks_tokens
 
     def get_topics_tokens(self) -> int:
-        return sum(record.get_tokens() for record in self.topics)
+        with self.tokens_lock:
+            if self._topics_tokens is None:
+                self._topics_tokens = sum(record.get_tokens() for record in self.topics)
+            return self._topics_tokens
 
     def get_current_topic_tokens(self) -> int:
         return self.current.get_tokens()
@@ -336,6 +412,7 @@ class History(Record):
         if self.current.messages:
             self.topics.append(self.current)
             self.current = Topic(history=self)
+            self.invalidate_tokens()
 
     def output(self) -> list[OutputMessage]:
         result: list[OutputMessage] = []
@@ -350,6 +427,7 @@ class History(Record):
         history.bulks = [Bulk.from_dict(b, history=history) for b in data["bulks"]]
         history.topics = [Topic.from_dict(t, history=history) for t in data["topics"]]
         history.current = Topic.from_dict(data["current"], history=history)
+        history.invalidate_tokens()
         return history
 
     def to_dict(self):
@@ -434,9 +512,11 @@ class History(Record):
             chunk = self.topics[:count]
             bulk = Bulk(history=self)
             bulk.records.extend(chunk)
+            bulk.invalidate_tokens()
             await bulk.summarize()
             self.bulks.append(bulk)
             self.topics[:count] = []
+            self.invalidate_tokens()
             return True
         return False
 
@@ -446,6 +526,7 @@ class History(Record):
         # remove oldest bulk if necessary
         if not compressed:
             self.bulks.pop(0)
+            self.invalidate_tokens()
             return True
         return compressed
 
@@ -461,11 +542,13 @@ class History(Record):
             ]
         )
         self.bulks = bulks
+        self.invalidate_tokens()
         return True
 
     async def merge_bulks(self, bulks: list[Bulk]) -> Bulk:
         bulk = Bulk(history=self)
         bulk.records = cast(list[Record], bulks)
+        bulk.invalidate_tokens()
         await bulk.summarize()
         return bulk
 
@@ -7,7 +7,8 @@ from python.helpers import errors
 from python.helpers import runtime
 
 
-SLEEP_TIME = 60
+SLEEP_TIME = 60  # development pause handshake and idle chat eviction interval
+TASKS_CHECK_INTERVAL = 5  # longest sleep between checks of tasks.json for external edits
 
 keep_running = True
 pause_time = 0
@@ -16,22 +17,47 @@ pause_time = 0
 async def run_loop():
     global pause_time, keep_running
 
+    next_housekeeping = 0.0
     while True:
-        if runtime.is_development():
-            # Signal to container that the job loop should be paused
-            # if we are runing a development instance to avoid duble-running the jobs
+        if time.monotonic() >= next_housekeeping:
+            next_housekeeping = time.monotonic() + SLEEP_TIME
+            if runtime.is_development():
+                # Signal to container that the job loop should be paused
+                # if we are runing a development instance to avoid duble-running the jobs
+                try:
+                    await runtime.call_development_function(pause_loop)
+                except Exception as e:
+                    PrintStyle().error("Failed to pause job loop by development instance: " + errors.error_text(e))
+            if not keep_running and (time.time() - pause_time) > (SLEEP_TIME * 2):
+                resume_loop()
             try:
-                await runtime.call_development_function(pause_loop)
+                # chats are saved off this loop, the scheduler keeps ticking meanwhile
+                await asyncio.to_thread(evict_idle_chats)
             except Exception as e:
-                PrintStyle().error("Failed to pause job loop by development instance: " + errors.error_text(e))
-        if not keep_running and (time.time() - pause_time) > (SLEEP_TIME * 2):
-            resume_loop()
+                PrintStyle().error(errors.format_error(e))
         if keep_running:
             try:
                 await scheduler_tick()
             except Exception as e:
                 PrintStyle().error(errors.format_error(e))
-        await asyncio.sleep(SLEEP_TIME)  # TODO! - if we lower it under 1min, it can run a 5min job multiple times in it's target minute
+
+        # sleep until the next task is due (each fire time runs at most once), a schedule changes or housekeeping
+        timeout = min(TASKS_CHECK_INTERVAL, max(0.0, next_housekeeping - time.monotonic()))
+        if keep_running:
+            try:
+                await TaskScheduler.get().wait_until_due(timeout)
+            except Exception as e:
+                PrintStyle().error(errors.format_error(e))
+                await asyncio.sleep(timeout)
+        else:
+            await asyncio.sleep(timeout)
+
+
+def evict_idle_chats():
+    # chats are local to this instance, evicted also while the development instance runs the jobs
+    from python.helpers import persist_chat
+
+    persist_chat.evict_idle_chats()
 
 
 async def scheduler_tick():
@@ -4,10 +4,10 @@ import threading
 import time
 import uuid
 from collections import OrderedDict
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Any, Literal, Optional, TYPE_CHECKING, TypeVar, cast
 
-from python.helpers.secrets import get_secrets_manager
+from python.helpers.secrets import StreamingSecretsFilter, get_secrets_manager
 from python.helpers.strings import truncate_text_by_ratio
 
 
@@ -157,10 +157,47 @@ class LogItem:
     timestamp: float = 0.0
     agentno: int = 0
 
+    # streamed content is kept as chunks and joined on read, see the content property below
+    _chunks: list[str] = field(default_factory=list, init=False, repr=False)
+    # secrets filter carrying the possible secret prefix at the end of streamed content
+    _stream_filter: StreamingSecretsFilter | None = field(
+        default=None, init=False, repr=False
+    )
+    _output_cache: tuple[str, Type, str] | None = field(
+        default=None, init=False, repr=False
+    )
+    # unmasked content of the last update, a longer content starting with it is masked as a stream
+    _raw_content: str | None = field(default=None, init=False, repr=False)
+
     def __post_init__(self):
         self.guid = self.log.guid
         self.timestamp = self.timestamp or time.time()
 
+    def _get_content(self) -> str:
+        # a tail still held back by the secrets filter is included as the end of the stream would flush it
+        with self.log._lock:
+            content = self._get_stored_content()
+            if self._stream_filter and self._stream_filter.pending:
+                content += self._stream_filter.preview()
+            return content
+
+    def _get_stored_content(self) -> str:
+        # caller holds the log lock
+        if len(self._chunks) > 1:
+            self._chunks = ["".join(self._chunks)]
+        return self._chunks[0] if self._chunks else ""
+
+    def _set_content(self, value: str):
+        with self.log._lock:
+            self._chunks = [value] if value else []
+            self._stream_filter = None
+            self._raw_content = None
+
+    def _append_content(self, chunk: str):
+        # caller holds the log lock
+        if chunk:
+            self._chunks.append(chunk)
+
     def update(
         self,
         type: Type | None = None,
@@ -189,25 +226,51 @@ class LogItem:
     ):
         if heading is not None:
             self.update(heading=self.heading + heading)
-        if content is not None:
-            self.update(content=self.content + content)
+        if content is not None and self.guid == self.log.guid:
+            self.log._stream_item(self.no, content)
 
         for k, v in kwargs.items():
             prev = self.kvps.get(k, "") if self.kvps else ""
             self.update(**{k: prev + v})
 
+    def end_stream(self):
+        """Flush the tail held back by the secrets filter into content, a later stream starts anew."""
+        if self.guid == self.log.guid:
+            self.log._end_stream(self.no)
+
     def output(self):
         return {
             "no": self.no,
             "id": self.id,  # Include id in output
             "type": self.type,
             "heading": self.heading,
-            "content": self.content,
+            "content": self._output_content(),
             "kvps": self.kvps,
             "timestamp": self.timestamp,
             "agentno": self.agentno,
         }
 
+    def _output_content(self) -> str:
+        # content is stored in full and truncated only here, the result is reused until content changes
+        with self.log._lock:
+            content = self._get_stored_content()
+            pending = self._stream_filter.preview() if self._stream_filter else ""
+            cached = self._output_cache
+            type = self.type
+        # the held back tail is shown as finalize() would flush it, partial secrets stay masked
+        if pending:
+            return _truncate_content(content + pending, type)
+        if cached and cached[0] is content and cached[1] == type:
+            return cached[2]
+        truncated = _truncate_content(content, type)
+        with self.log._lock:
+            self._output_cache = (content, type, truncated)
+        return truncated
+
+
+# the dataclass field keeps content as an init argument, reads and writes go through the chunks
+LogItem.content = property(LogItem._get_content, LogItem._set_content)  # type: ignore
+
 
 class Log:
 
@@ -215,7 +278,10 @@ class Log:
         self._lock = threading.RLock()
         self.context: "AgentContext|None" = None  # set from outside
         self.guid: str = str(uuid.uuid4())
-        self.updates: list[int] = []
+        # item no -> log version of its latest update, ordered by version
+        # repeated updates of the same item are coalesced into a single entry
+        self.updates: OrderedDict[int, int] = OrderedDict()
+        self.version: int = 0
         self.logs: list[LogItem] = []
         self.progress: str = ""
         self.progress_no: int = 0
@@ -279,17 +345,21 @@ class Log:
     ):
         # Capture the effective type for truncation without holding the lock during
         # masking/truncation work.
-        with self._lock:
-            current_type = self.logs[no].type
-        type_for_truncation = type if type is not None else current_type
-
         heading_out: str | None = None
         if heading is not None:
             heading_out = _truncate_heading(self._mask_recursive(heading))
 
         content_out: str | None = None
+        raw: str | None = None
         if content is not None:
-            content_out = _truncate_content(self._mask_recursive(content), type_for_truncation)
+            content = str(content)
+            with self._lock:
+                raw = self.logs[no]._raw_content
+            # output growing with each update is masked only in its new part, like a stream
+            if not raw or not content.startswith(raw):
+                raw = None
+                # truncation is deferred to LogItem.output
+                content_out = self._mask_recursive(content)
 
         kvps_out: OrderedDict | None = None
         if kvps is not None:
@@ -320,6 +390,21 @@ class Log:
 
             if content_out is not None:
                 item.content = content_out
+                item._raw_content = content
+            elif content is not None:
+                if item._raw_content is not raw:
+                    # replaced meanwhile by another update, mask the whole content
+                    content_out = self._mask_recursive(content)
+                    item.content = content_out
+                elif item._stream_filter is None:
+                    # the first append is masked with the content before it, later ones on their own
+                    item._stream_filter = self._create_stream_filter()
+                    item._chunks = [item._stream_filter.process_chunk(content)]
+                else:
+                    item._append_content(
+                        item._stream_filter.process_chunk(content[len(raw or ""):])
+                    )
+                item._raw_content = content
 
             if kvps_out is not None:
                 item.kvps = kvps_out
@@ -331,18 +416,63 @@ class Log:
                     item.kvps = OrderedDict()
                 item.kvps.update(kwargs_out)
 
-            self.updates.append(item.no)
-
-            if item.heading and item.update_progress != "none":
-                if item.no >= self.progress_no:
-                    self.progress = item.heading
-                    self.progress_no = (
-                        item.no if item.update_progress == "persistent" else -1
-                    )
-                    self.progress_active = True
+            self._touch(item)
+            self._update_progress_from(item)
         if notify_state_monitor:
             self._notify_state_monitor_for_context_update()
 
+    def _stream_item(self, no: int, content: str):
+        """Append content to an item, only the new chunk is masked."""
+        with self._lock:
+            item = self.logs[no]
+            if item._stream_filter is None:
+                item._stream_filter = self._create_stream_filter()
+            item._append_content(item._stream_filter.process_chunk(content))
+            item._raw_content = None
+            self._touch(item)
+            self._update_progress_from(item)
+        self._notify_state_monitor_for_context_update()
+
+    def _end_stream(self, no: int):
+        with self._lock:
+            item = self.logs[no]
+            if item._stream_filter is None:
+                return
+            item._append_content(item._stream_filter.finalize())
+            item._stream_filter = None
+            self._touch(item)
+        self._notify_state_monitor_for_context_update()
+
+    def _create_stream_filter(self) -> StreamingSecretsFilter:
+        try:
+            from agent import AgentContext
+
+            secrets_mgr = get_secrets_manager(self.context or AgentContext.current())
+            return secrets_mgr.create_streaming_filter()
+        except Exception:
+            # same as _mask_recursive, content stays unmasked if secrets are unavailable
+            return StreamingSecretsFilter({})
+
+    def mark_updated(self, no: int):
+        with self._lock:
+            self._touch(self.logs[no])
+
+    def _touch(self, item: LogItem):
+        # caller holds the lock
+        self.version += 1
+        self.updates[item.no] = self.version
+        self.updates.move_to_end(item.no)
+
+    def _update_progress_from(self, item: LogItem):
+        # caller holds the lock
+        if item.heading and item.update_progress != "none":
+            if item.no >= self.progress_no:
+                self.progress = item.heading
+                self.progress_no = (
+                    item.no if item.update_progress == "persistent" else -1
+                )
+                self.progress_active = True
+
     def _notify_state_monitor(self) -> None:
         ctx = self.context
         if not ctx:
@@ -386,26 +516,28 @@ class Log:
         self.set_progress("Waiting for input", 0, False)
 
     def output(self, start=None, end=None):
+        """Items updated after log version start (up to version end), in the order of their latest update."""
         with self._lock:
             if start is None:
                 start = 0
             if end is None:
-                end = len(self.updates)
-            updates = self.updates[start:end]
+                end = self.version
+            updates = []
+            # newest updates are at the end, stop at the first one the caller already has
+            for no, version in reversed(self.updates.items()):
+                if version <= start:
+                    break
+                if version <= end:
+                    updates.append(no)
+            updates.reverse()
             logs = list(self.logs)
 
-        out = []
-        seen = set()
-        for update in updates:
-            if update not in seen and update < len(logs):
-                out.append(logs[update].output())
-                seen.add(update)
-        return out
+        return [logs[no].output() for no in updates if no < len(logs)]
 
     def reset(self):
         with self._lock:
             self.guid = str(uuid.uuid4())
-            self.updates = []
+            self.updates = OrderedDict()
             self.logs = []
         self.set_initial_progress()
 
@@ -15,7 +15,9 @@ from typing import (
     Awaitable,
     TypeVar,
 )
+import os
 import threading
+import time
 import asyncio
 from contextlib import AsyncExitStack
 from shutil import which
@@ -24,6 +26,7 @@ import json
 from python.helpers import errors
 from python.helpers import settings
 from python.helpers.log import LogItem
+from python.helpers.defer import EventLoopThread, get_pool_size
 
 import httpx
 
@@ -31,6 +34,7 @@ from mcp import ClientSession, StdioServerParameters
 from mcp.client.stdio import stdio_client
 from mcp.client.sse import sse_client
 from mcp.client.streamable_http import streamablehttp_client
+from mcp.shared.exceptions import McpError
 from mcp.shared.message import SessionMessage
 from mcp.types import CallToolResult, ListToolsResult
 from anyio.streams.memory import (
@@ -43,6 +47,18 @@ from python.helpers import dirty_json
 from python.helpers.print_style import PrintStyle
 from python.helpers.tool import Tool, Response
 
+# MCP sessions are kept open per server and shared by all operations on it,
+# they all live in one event loop thread as the transports are bound to the loop that opened them
+THREAD_MCP = "MCP"
+MCP_MAX_CONCURRENCY = get_pool_size("A0_MCP_MAX_CONCURRENCY", 4)  # operations in flight per server
+_idle_timeout = os.getenv("A0_MCP_IDLE_TIMEOUT", "").strip()
+MCP_IDLE_TIMEOUT = int(_idle_timeout) if _idle_timeout.isdigit() else 5 * 60
+MCP_HEALTH_CHECK_INTERVAL = 30  # ping sessions unused for longer than this before reuse
+MCP_PING_TIMEOUT = 5
+MCP_CONNECT_ATTEMPTS = 3
+MCP_BACKOFF_BASE = 0.5  # seconds, doubled with every failed connect
+MCP_BACKOFF_MAX = 10
+
 
 def normalize_name(name: str) -> str:
     # Lowercase and strip whitespace
@@ -255,13 +271,22 @@ class MCPServerRemote(BaseModel):
         with self.__lock:
             return self.__client.has_tool(tool_name)  # type: ignore
 
+    def get_stats(self) -> dict[str, Any]:
+        with self.__lock:
+            return self.__client.get_stats()  # type: ignore
+
+    def close(self):
+        with self.__lock:
+            self.__client.close()  # type: ignore
+
     async def call_tool(
         self, tool_name: str, input_data: Dict[str, Any]
     ) -> CallToolResult:
         """Call a tool with the given input data"""
+        # do not hold the lock while the call runs, calls to the server may run concurrently
         with self.__lock:
-            # We already run in an event loop, dont believe Pylance
-            return await self.__client.call_tool(tool_name, input_data)  # type: ignore
+            client = self.__client
+        return await client.call_tool(tool_name, input_data)  # type: ignore
 
     def update(self, config: dict[str, Any]) -> "MCPServerRemote":
         with self.__lock:
@@ -333,13 +358,22 @@ class MCPServerLocal(BaseModel):
         with self.__lock:
             return self.__client.has_tool(tool_name)  # type: ignore
 
+    def get_stats(self) -> dict[str, Any]:
+        with self.__lock:
+            return self.__client.get_stats()  # type: ignore
+
+    def close(self):
+        with self.__lock:
+            self.__client.close()  # type: ignore
+
     async def call_tool(
         self, tool_name: str, input_data: Dict[str, Any]
     ) -> CallToolResult:
         """Call a tool with the given input data"""
+        # do not hold the lock while the call runs, calls to the server may run concurrently
         with self.__lock:
-            # We already run in an event loop, dont believe Pylance
-            return await self.__client.call_tool(tool_name, input_data)  # type: ignore
+            client = self.__client
+        return await client.call_tool(tool_name, input_data)  # type: ignore
 
     def update(self, config: dict[str, Any]) -> "MCPServerLocal":
         with self.__lock:
@@ -526,8 +560,17 @@ class MCPConfig(BaseModel):
         # If servers is a field like `servers: List[MCPServer] = Field(default_factory=list)`,
         # then super().__init__() might try to initialize it.
         # We are re-assigning self.servers later in this __init__.
+        # servers of the previous config, their sessions are closed once replaced
+        previous_servers = list(self.__dict__.get("servers") or [])
+
         super().__init__()
 
+        for previous in previous_servers:
+            try:
+                previous.close()
+            except Exception:
+                pass
+
         # Clear any servers potentially initialized by super().__init__() before we populate based on servers_list
         self.servers = []
         # initialize failed servers list
@@ -662,6 +705,8 @@ class MCPConfig(BaseModel):
                 error = server.get_error()
                 # get log bool
                 has_log = server.get_log() != ""
+                # session state and latency of operations
+                stats = server.get_stats()
 
                 # add server status to result
                 result.append(
@@ -671,6 +716,7 @@ class MCPConfig(BaseModel):
                         "error": error,
                         "tool_count": tool_count,
                         "has_log": has_log,
+                        "stats": stats,
                     }
                 )
 
@@ -683,6 +729,7 @@ class MCPConfig(BaseModel):
                         "error": disconnected["error"],
                         "tool_count": 0,
                         "has_log": False,
+                        "stats": {},
                     }
                 )
 
@@ -797,19 +844,34 @@ class MCPConfig(BaseModel):
             raise ValueError(f"Tool {tool_name} not found")
         server_name_part, tool_name_part = tool_name.split(".")
         with self.__lock:
-            for server in self.servers:
-                if server.name == server_name_part and server.has_tool(tool_name_part):
-                    return await server.call_tool(tool_name_part, input_data)
+            found = next(
+                (
+                    server
+                    for server in self.servers
+                    if server.name == server_name_part and server.has_tool(tool_name_part)
+                ),
+                None,
+            )
+        if found is None:
             raise ValueError(f"Tool {tool_name} not found")
+        return await found.call_tool(tool_name_part, input_data)
 
 
 T = TypeVar("T")
 
 
+def _unwrap_exception(e: BaseException) -> BaseException:
+    # anyio task groups raise exception groups, report the first real error
+    while getattr(e, "exceptions", None):
+        e = e.exceptions[0]  # type: ignore
+    return e
+
+
 class MCPClientBase(ABC):
     # server: Union[MCPServerLocal, MCPServerRemote] # Defined in __init__
     # tools: List[dict[str, Any]] # Defined in __init__
-    # No self.session, self.exit_stack, self.stdio, self.write as persistent instance fields
+    # The session is owned by a task in the MCP event loop thread, which opens the transport,
+    # keeps it until the session is idle or closed, and exits it in the same task (anyio requirement).
 
     __lock: ClassVar[threading.Lock] = threading.Lock()
 
@@ -820,6 +882,25 @@ class MCPClientBase(ABC):
         self.log: List[str] = []
         self.log_file: Optional[TextIO] = None
 
+        # persistent session, only used inside the MCP event loop
+        self._session: Optional[ClientSession] = None
+        self._session_task: Optional[asyncio.Task] = None
+        self._closing: Optional[asyncio.Event] = None
+        self._connect_lock = asyncio.Lock()
+        self._semaphore = asyncio.Semaphore(MCP_MAX_CONCURRENCY)
+        self._in_use = 0
+        self._last_used = 0.0
+        self._failures = 0
+        self._retry_at = 0.0
+
+        # metrics
+        self._connects = 0
+        self._calls = 0
+        self._errors = 0
+        self._latency_total = 0.0
+        self._latency_last = 0.0
+        self._latency_max = 0.0
+
     # Protected method
     @abstractmethod
     async def _create_stdio_transport(
@@ -834,65 +915,189 @@ class MCPClientBase(ABC):
     async def _execute_with_session(
         self,
         coro_func: Callable[[ClientSession], Awaitable[T]],
-        read_timeout_seconds=60,
     ) -> T:
         """
-        Manages the lifecycle of an MCP session for a single operation.
-        Creates a temporary session, executes coro_func with it, and ensures cleanup.
+        Executes coro_func with the persistent session of this server, opening it if needed.
+        Runs in the MCP event loop thread, at most MCP_MAX_CONCURRENCY operations at a time.
         """
+        mcp_loop = EventLoopThread(THREAD_MCP)
+        if asyncio.get_running_loop() is not mcp_loop.loop:
+            return await asyncio.wrap_future(
+                mcp_loop.run_coroutine(self._execute_with_session(coro_func))
+            )
+
         operation_name = coro_func.__name__  # For logging
-        # PrintStyle(font_color="cyan").print(f"MCPClientBase ({self.server.name}): Creating new session for operation '{operation_name}'...")
-        # Store the original exception outside the async block
-        original_exception = None
         try:
-            async with AsyncExitStack() as temp_stack:
+            async with self._semaphore:
+                start = time.monotonic()
+                failed = True
+                try:
+                    session = await self._get_session()
+                except Exception:
+                    self._record(time.monotonic() - start, failed)
+                    raise
+                self._in_use += 1
                 try:
-
-                    stdio, write = await self._create_stdio_transport(temp_stack)
-                    # PrintStyle(font_color="cyan").print(f"MCPClientBase ({self.server.name} - {operation_name}): Transport created. Initializing session...")
-                    session = await temp_stack.enter_async_context(
-                        ClientSession(
-                            stdio,  # type: ignore
-                            write,  # type: ignore
-                            read_timeout_seconds=timedelta(
-                                seconds=read_timeout_seconds
-                            ),
-                        )
-                    )
-                    await session.initialize()
-
                     result = await coro_func(session)
-
+                    failed = False
                     return result
-                except Exception as e:
-                    # Store the original exception and raise a dummy exception
-                    excs = getattr(e, "exceptions", None)  # Python 3.11+ ExceptionGroup
-                    if excs:
-                        original_exception = excs[0]
-                    else:
-                        original_exception = e
-                    # Create a dummy exception to break out of the async block
-                    raise RuntimeError("Dummy exception to break out of async block")
+                except McpError:
+                    # error response from the server, the session itself is fine
+                    raise
+                except Exception:
+                    # transport errors leave the session unusable, reconnect next time
+                    await self._close_session()
+                    raise
+                finally:
+                    self._in_use -= 1
+                    self._last_used = time.monotonic()
+                    self._record(self._last_used - start, failed)
         except Exception as e:
-            # Check if this is our dummy exception
-            if original_exception is not None:
-                e = original_exception
-            # We have the original exception stored
+            e = _unwrap_exception(e)
             PrintStyle(
                 background_color="#AA4455", font_color="white", padding=False
             ).print(
                 f"MCPClientBase ({self.server.name} - {operation_name}): Error during operation: {type(e).__name__}: {e}"
             )
             raise e  # Re-raise the original exception
-        # finally:
-        #     PrintStyle(font_color="cyan").print(
-        #         f"MCPClientBase ({self.server.name} - {operation_name}): Session and transport will be closed by AsyncExitStack."
-        #     )
-        # This line should ideally be unreachable if the try/except/finally logic within the 'async with' is exhaustive.
-        # Adding it to satisfy linters that might not fully trace the raise/return paths through async context managers.
-        raise RuntimeError(
-            f"MCPClientBase ({self.server.name} - {operation_name}): _execute_with_session exited 'async with' block unexpectedly."
+
+    async def _get_session(self) -> ClientSession:
+        """Returns the open session after a health check, or connects with backoff."""
+        async with self._connect_lock:
+            session = self._session
+            if (
+                session is not None
+                and time.monotonic() - self._last_used > MCP_HEALTH_CHECK_INTERVAL
+                and not await self._ping(session)
+            ):
+                PrintStyle(font_color="orange").print(
+                    f"MCPClientBase ({self.server.name}): Session not responding, reconnecting..."
+                )
+                await self._close_session()
+                session = None
+
+            attempt = 0
+            while session is None:
+                delay = self._retry_at - time.monotonic()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                try:
+                    session = await self._open_session()
+                    self._failures = 0
+                    self._retry_at = 0.0
+                except ValueError:
+                    # configuration errors, retrying won't help
+                    raise
+                except Exception:
+                    self._failures += 1
+                    self._retry_at = time.monotonic() + min(
+                        MCP_BACKOFF_MAX, MCP_BACKOFF_BASE * 2 ** (self._failures - 1)
+                    )
+                    attempt += 1
+                    if attempt >= MCP_CONNECT_ATTEMPTS:
+                        raise
+            return session
+
+    async def _ping(self, session: ClientSession) -> bool:
+        try:
+            await asyncio.wait_for(session.send_ping(), timeout=MCP_PING_TIMEOUT)
+            return True
+        except Exception:
+            return False
+
+    async def _open_session(self) -> ClientSession:
+        ready: asyncio.Future[ClientSession] = asyncio.get_running_loop().create_future()
+        self._closing = asyncio.Event()
+        self._session_task = asyncio.create_task(
+            self._run_session(ready, self._closing),
+            name=f"mcp-session-{self.server.name}",
         )
+        return await ready
+
+    async def _run_session(
+        self, ready: "asyncio.Future[ClientSession]", closing: asyncio.Event
+    ):
+        set = settings.get_settings()
+        read_timeout_seconds = self.server.init_timeout or set["mcp_client_init_timeout"]
+        session: Optional[ClientSession] = None
+        try:
+            async with AsyncExitStack() as stack:
+                stdio, write = await self._create_stdio_transport(stack)
+                session = await stack.enter_async_context(
+                    ClientSession(
+                        stdio,  # type: ignore
+                        write,  # type: ignore
+                        read_timeout_seconds=timedelta(seconds=read_timeout_seconds),
+                    )
+                )
+                await session.initialize()
+                self._session = session
+                self._connects += 1
+                self._last_used = time.monotonic()
+                if not ready.done():
+                    ready.set_result(session)
+                await self._wait_until_idle(closing)
+        except Exception as e:
+            e = _unwrap_exception(e)
+            if not ready.done():
+                ready.set_exception(e)
+            else:
+                PrintStyle(font_color="orange").print(
+                    f"MCPClientBase ({self.server.name}): Session closed with error: {type(e).__name__}: {e}"
+                )
+        finally:
+            if not ready.done():
+                ready.set_exception(ConnectionError("MCP session closed"))
+            if self._session is session:
+                self._session = None
+
+    async def _wait_until_idle(self, closing: asyncio.Event):
+        while True:
+            remaining = MCP_IDLE_TIMEOUT - (time.monotonic() - self._last_used)
+            if remaining <= 0 and not self._in_use:
+                return
+            try:
+                await asyncio.wait_for(closing.wait(), timeout=max(remaining, 1))
+                return
+            except asyncio.TimeoutError:
+                pass
+
+    async def _close_session(self):
+        task = self._session_task
+        if self._closing:
+            self._closing.set()
+        self._session = None
+        if task and not task.done() and task is not asyncio.current_task():
+            await asyncio.wait([task], timeout=MCP_PING_TIMEOUT)
+
+    def close(self):
+        """Close the session, safe to call from any thread."""
+        task, closing = self._session_task, self._closing
+        if task and closing and not task.done():
+            task.get_loop().call_soon_threadsafe(closing.set)
+
+    def _record(self, seconds: float, failed: bool):
+        with self.__lock:
+            self._calls += 1
+            self._errors += failed
+            self._latency_total += seconds
+            self._latency_last = seconds
+            self._latency_max = max(self._latency_max, seconds)
+
+    def get_stats(self) -> dict[str, Any]:
+        """Session state and operation latency (including connects)."""
+        with self.__lock:
+            return {
+                "session_open": self._session is not None,
+                "connects": self._connects,
+                "calls": self._calls,
+                "errors": self._errors,
+                "latency_last_ms": round(self._latency_last * 1000, 1),
+                "latency_avg_ms": round(
+                    self._latency_total / self._calls * 1000 if self._calls else 0.0, 1
+                ),
+                "latency_max_ms": round(self._latency_max * 1000, 1),
+            }
 
     async def update_tools(self) -> "MCPClientBase":
         # PrintStyle(font_color="cyan").print(f"MCPClientBase ({self.server.name}): Starting 'update_tools' operation...")
@@ -913,12 +1118,7 @@ class MCPClientBase(ABC):
             )
 
         try:
-            set = settings.get_settings()
-            await self._execute_with_session(
-                list_tools_op,
-                read_timeout_seconds=self.server.init_timeout
-                or set["mcp_client_init_timeout"],
-            )
+            await self._execute_with_session(list_tools_op)
         except Exception as e:
             # e = eg.exceptions[0]
             error_text = errors.format_error(e, 0, 0)
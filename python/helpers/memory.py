@@ -1,3 +1,4 @@
+import asyncio
 from datetime import datetime
 from typing import Any, List, Sequence
 from langchain.storage import InMemoryByteStore, LocalFileStore
@@ -12,7 +13,6 @@ from python.helpers import faiss_monkey_patch
 import faiss
 
 
-from langchain_community.docstore.in_memory import InMemoryDocstore
 from langchain_community.vectorstores.utils import (
     DistanceStrategy,
 )
@@ -25,20 +25,20 @@ import numpy as np
 from python.helpers.print_style import PrintStyle
 from . import files
 from langchain_core.documents import Document
-from python.helpers import knowledge_import
+from python.helpers import ann_index, knowledge_import, memory_journal
+from python.helpers.metadata_filter import IndexedDocstore, IndexedFAISS, compile_filter
 from python.helpers.log import Log, LogItem
 from enum import Enum
 from agent import Agent, AgentContext
 import models
 import logging
-from simpleeval import simple_eval
 
 
 # Raise the log level so WARNING messages aren't shown
 logging.getLogger("langchain_core.vectorstores.base").setLevel(logging.ERROR)
 
 
-class MyFaiss(FAISS):
+class MyFaiss(IndexedFAISS):
     # override aget_by_ids
     def get_by_ids(self, ids: Sequence[str], /) -> List[Document]:
         # return all self.docstore._dict[id] in ids
@@ -171,16 +171,27 @@ class Memory:
 
         created = False
 
+        journal = memory_journal.get_journal(db_dir)
+        # finish a snapshot swap interrupted by a crash
+        journal.recover()
+
         # if db folder exists and is not empty:
         if os.path.exists(db_dir) and files.exists(db_dir, "index.faiss"):
-            db = MyFaiss.load_local(
-                folder_path=db_dir,
-                embeddings=embedder,
-                allow_dangerous_deserialization=True,
-                distance_strategy=DistanceStrategy.COSINE,
-                # normalize_L2=True,
-                relevance_score_fn=Memory._cosine_normalizer,
-            )  # type: ignore
+            # wait for a running compaction, then load the last snapshot and replay the log on top of it
+            with journal.files_lock:
+                db = MyFaiss.load_local(
+                    folder_path=db_dir,
+                    embeddings=embedder,
+                    allow_dangerous_deserialization=True,
+                    distance_strategy=DistanceStrategy.COSINE,
+                    # normalize_L2=True,
+                    relevance_score_fn=Memory._cosine_normalizer,
+                )  # type: ignore
+                consistent = memory_journal.is_consistent(db)
+                if consistent and journal.replay(db):
+                    if log_item:
+                        log_item.stream(progress="\nRecovered memory changes from log")
+                    journal.compact(db)
 
             # if there is a mismatch in embeddings used, re-index the whole DB
             emb_ok = False
@@ -195,7 +206,8 @@ class Memory:
                     emb_ok = True
 
             # re-index -  create new DB and insert existing docs
-            if db and not emb_ok:
+            # a snapshot with mismatched index and docstore is re-indexed from its docstore as well
+            if db and not (emb_ok and consistent):
                 docs = db.get_all_docs()
                 db = None
 
@@ -206,7 +218,7 @@ class Memory:
             db = MyFaiss(
                 embedding_function=embedder,
                 index=index,
-                docstore=InMemoryDocstore(),
+                docstore=IndexedDocstore(),
                 index_to_docstore_id={},
                 distance_strategy=DistanceStrategy.COSINE,
                 # normalize_L2=True,
@@ -219,6 +231,8 @@ class Memory:
                 if log_item:
                     log_item.stream(progress="\nIndexing memories")
                 db.add_documents(documents=list(docs.values()), ids=list(docs.keys()))
+                # logged vectors may come from another model, re-embed their texts
+                journal.replay(db, use_vectors=False)
 
             # save DB
             Memory._save_db_file(db, memory_subdir)
@@ -236,6 +250,7 @@ class Memory:
 
             created = True
 
+        db.set_index_config(ann_index.load_config(db_dir))
         return db, created
 
     def __init__(
@@ -330,15 +345,54 @@ class Memory:
     async def search_similarity_threshold(
         self, query: str, limit: int, threshold: float, filter: str = ""
     ):
-        comparator = Memory._get_comparator(filter) if filter else None
+        [docs] = await self.search_similarity_threshold_multi(
+            query, [{"limit": limit, "threshold": threshold, "filter": filter}]
+        )
+        return docs
+
+    async def search_similarity_threshold_multi(
+        self, query: str, searches: list[dict[str, Any]]
+    ) -> list[list[Document]]:
+        """Embeds query once and runs several searches with it, each given by
+        the limit, threshold and filter arguments of search_similarity_threshold."""
+        embedding = await self.db._aembed_query(query)
+        return list(
+            await asyncio.gather(
+                *(self._search_by_vector(embedding, **search) for search in searches)
+            )
+        )
 
-        return await self.db.asearch(
-            query,
-            search_type="similarity_score_threshold",
+    async def search_similarity_threshold_batch(
+        self, queries: list[str], limit: int, threshold: float, filter: str = ""
+    ) -> list[list[tuple[Document, float]]]:
+        """Documents and relevance scores for several queries, in query order.
+        The queries are embedded together and searched with one index search."""
+        if not queries:
+            return []
+        # concurrent query embeddings are sent as one request by the embedding batcher
+        embeddings = await asyncio.gather(*(self.db._aembed_query(query) for query in queries))
+        comparator = Memory._get_comparator(filter) if filter else None
+        results = await asyncio.to_thread(
+            self.db.similarity_search_with_score_by_vectors,
+            list(embeddings),
             k=limit,
-            score_threshold=threshold,
             filter=comparator,
         )
+        relevance = self.db._select_relevance_score_fn()
+        return [
+            [(doc, relevance(score)) for doc, score in docs if relevance(score) >= threshold]
+            for docs in results
+        ]
+
+    async def _search_by_vector(
+        self, embedding: list[float], limit: int, threshold: float, filter: str = ""
+    ) -> list[Document]:
+        comparator = Memory._get_comparator(filter) if filter else None
+        results = await self.db.asimilarity_search_with_score_by_vector(
+            embedding, k=limit, filter=comparator
+        )
+        relevance = self.db._select_relevance_score_fn()
+        return [doc for doc, score in results if relevance(score) >= threshold]
 
     async def delete_documents_by_query(
         self, query: str, threshold: float, filter: str = ""
@@ -364,6 +418,7 @@ class Memory:
                 # if fnd["ids"]: self.db.delete(ids=fnd["ids"])
                 # tot += len(fnd["ids"])
                 await self.db.adelete(ids=document_ids)
+                self._journal().log_delete(document_ids)  # persist
                 tot += len(document_ids)
 
             # If fewer than K document IDs, break the loop
@@ -371,7 +426,7 @@ class Memory:
                 break
 
         if tot:
-            self._save_db()  # persist
+            self._save_db()
         return removed
 
     async def delete_documents_by_ids(self, ids: list[str]):
@@ -382,9 +437,8 @@ class Memory:
         if rem_docs:
             rem_ids = [doc.metadata["id"] for doc in rem_docs]  # ids to remove
             await self.db.adelete(ids=rem_ids)
-
-        if rem_docs:
-            self._save_db()  # persist
+            self._journal().log_delete(rem_ids)  # persist
+            self._save_db()
         return rem_docs
 
     async def insert_text(self, text, metadata: dict = {}):
@@ -403,19 +457,35 @@ class Memory:
                 if not doc.metadata.get("area", ""):
                     doc.metadata["area"] = Memory.Area.MAIN.value
 
-            await self.db.aadd_documents(documents=docs, ids=ids)
-            self._save_db()  # persist
+            await self._add_documents(docs, ids)
+            self._save_db()
         return ids
 
     async def update_documents(self, docs: list[Document]):
         ids = [doc.metadata["id"] for doc in docs]
         await self.db.adelete(ids=ids)  # delete originals
-        ins = await self.db.aadd_documents(documents=docs, ids=ids)  # add updated
-        self._save_db()  # persist
+        self._journal().log_delete(ids)
+        ins = await self._add_documents(docs, ids)  # add updated
+        self._save_db()
         return ins
 
+    async def _add_documents(self, docs: list[Document], ids: list[str]):
+        # embed here so the vectors can be written to the log along with the documents
+        texts = [doc.page_content for doc in docs]
+        metadatas = [doc.metadata for doc in docs]
+        embeddings = await self.db._aembed_documents(texts)
+        ins = self.db.add_embeddings(
+            text_embeddings=list(zip(texts, embeddings)), metadatas=metadatas, ids=ids
+        )
+        self._journal().log_add(ids, texts, metadatas, embeddings)  # persist
+        return ins
+
+    def _journal(self):
+        return memory_journal.get_journal(abs_db_dir(self.memory_subdir))
+
     def _save_db(self):
-        Memory._save_db_file(self.db, self.memory_subdir)
+        # changes are already in the log, fold them into the snapshot once it grows
+        self._journal().maybe_compact(self.db)
 
     def _generate_doc_id(self):
         while True:
@@ -425,19 +495,13 @@ class Memory:
 
     @staticmethod
     def _save_db_file(db: MyFaiss, memory_subdir: str):
-        abs_dir = abs_db_dir(memory_subdir)
-        db.save_local(folder_path=abs_dir)
+        memory_journal.get_journal(abs_db_dir(memory_subdir)).save_snapshot(db)
 
     @staticmethod
     def _get_comparator(condition: str):
-        def comparator(data: dict[str, Any]):
-            try:
-                result = simple_eval(condition, names=data)
-                return result
-            except Exception as e:
-                PrintStyle.error(f"Error evaluating condition: {e}")
-                return False
-
+        comparator = compile_filter(condition)
+        if comparator.error:
+            PrintStyle.error(f"Error evaluating condition: {comparator.error}")
         return comparator
 
     @staticmethod
@@ -2,7 +2,7 @@ import asyncio
 import json
 from dataclasses import dataclass, field
 from datetime import datetime, timezone
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 from enum import Enum
 
 from langchain_core.documents import Document
@@ -69,13 +69,16 @@ class MemoryConsolidator:
     def __init__(self, agent: Agent, config: Optional[ConsolidationConfig] = None):
         self.agent = agent
         self.config = config or ConsolidationConfig()
+        # ids removed or rewritten by consolidations of this consolidator
+        self._changed_ids: set[str] = set()
 
     async def process_new_memory(
         self,
         new_memory: str,
         area: str,
         metadata: Dict[str, Any],
-        log_item: Optional[LogItem] = None
+        log_item: Optional[LogItem] = None,
+        similar_memories: Optional[List[Tuple[Document, float]]] = None
     ) -> dict:
         """
         Process a new memory through the intelligent consolidation pipeline.
@@ -85,6 +88,8 @@ class MemoryConsolidator:
             area: Memory area (MAIN, FRAGMENTS, SOLUTIONS)
             metadata: Initial metadata for the memory
             log_item: Optional log item for progress tracking
+            similar_memories: Similar memories with scores from find_similar_memories,
+                searched for the memory when not given
 
         Returns:
             dict: {"success": bool, "memory_ids": [str, ...]}
@@ -92,7 +97,9 @@ class MemoryConsolidator:
         try:
             # Start processing with timeout
             processing_task = asyncio.create_task(
-                self._process_memory_with_consolidation(new_memory, area, metadata, log_item)
+                self._process_memory_with_consolidation(
+                    new_memory, area, metadata, log_item, similar_memories
+                )
             )
 
             result = await asyncio.wait_for(
@@ -114,15 +121,23 @@ class MemoryConsolidator:
         new_memory: str,
         area: str,
         metadata: Dict[str, Any],
-        log_item: Optional[LogItem] = None
+        log_item: Optional[LogItem] = None,
+        similar: Optional[List[Tuple[Document, float]]] = None
     ) -> dict:
         """Execute the full consolidation pipeline."""
 
         if log_item:
             log_item.update(progress="Starting intelligent memory consolidation...")
 
-        # Step 1: Discover similar memories
-        similar_memories = await self._find_similar_memories(new_memory, area, log_item)
+        # Step 1: Discover similar memories, searched before the batch may be outdated by now
+        if similar is not None:
+            similar = await self._refresh_similar_memories(similar)
+        if similar is None:
+            [similar] = await self.find_similar_memories([new_memory], area, log_item)
+        # Store similarity for replacement validation, documents may be shared by several new memories
+        for doc, score in similar:
+            doc.metadata['_consolidation_similarity'] = score
+        similar_memories = [doc for doc, _ in similar]
 
         # this block always returns
         if not similar_memories:
@@ -319,93 +334,82 @@ class MemoryConsolidator:
             PrintStyle(font_color="yellow").print(f"Failed to gather consolidated metadata: {str(e)}")
             return original_metadata
 
-    async def _find_similar_memories(
+    async def find_similar_memories(
         self,
-        new_memory: str,
+        new_memories: List[str],
         area: str,
         log_item: Optional[LogItem] = None
-    ) -> List[Document]:
+    ) -> List[List[Tuple[Document, float]]]:
         """
-        Find similar memories using both semantic similarity and keyword matching.
-        Now includes knowledge source awareness and similarity scores for validation.
+        Find similar memories for each new memory using both semantic similarity and keyword matching.
+        All memories share one pass: keywords are extracted concurrently, then the memories and their
+        keywords are embedded together and searched with one index search.
+        Returns the most similar memories with their similarity scores, per new memory.
         """
+        return await asyncio.wait_for(
+            self._find_similar_memories(new_memories, area, log_item),
+            timeout=self.config.processing_timeout_seconds
+        )
+
+    async def _find_similar_memories(
+        self,
+        new_memories: List[str],
+        area: str,
+        log_item: Optional[LogItem] = None
+    ) -> List[List[Tuple[Document, float]]]:
         db = await Memory.get(self.agent)
 
         # Step 1: Extract keywords/queries for enhanced search
-        search_queries = await self._extract_search_keywords(new_memory, log_item)
-
-        all_similar = []
+        keywords = await asyncio.gather(
+            *(self._extract_search_keywords(memory, log_item) for memory in new_memories)
+        )
 
-        # Step 2: Semantic similarity search with scores
-        semantic_similar = await db.search_similarity_threshold(
-            query=new_memory,
+        # Step 2: Semantic and keyword similarity searches with scores, in one batch
+        queries: List[str] = []
+        owners: List[int] = []
+        for i, (memory, search_queries) in enumerate(zip(new_memories, keywords)):
+            for query in [memory, *search_queries]:
+                if query.strip():
+                    queries.append(query.strip())
+                    owners.append(i)
+
+        results = await db.search_similarity_threshold_batch(
+            queries=queries,
             limit=self.config.max_similar_memories,
             threshold=self.config.similarity_threshold,
             filter=f"area == '{area}'"
         )
-        all_similar.extend(semantic_similar)
-
-        # Step 3: Keyword-based searches
-        for query in search_queries:
-            if query.strip():
-                # Fix division by zero: ensure len(search_queries) > 0
-                queries_count = max(1, len(search_queries))  # Prevent division by zero
-                keyword_similar = await db.search_similarity_threshold(
-                    query=query.strip(),
-                    limit=max(3, self.config.max_similar_memories // queries_count),
-                    threshold=self.config.similarity_threshold,
-                    filter=f"area == '{area}'"
-                )
-                all_similar.extend(keyword_similar)
-
-        # Step 4: Deduplicate by document ID and store similarity info
-        seen_ids = set()
-        unique_similar = []
-        for doc in all_similar:
-            doc_id = doc.metadata.get('id')
-            if doc_id and doc_id not in seen_ids:
-                seen_ids.add(doc_id)
-                unique_similar.append(doc)
-
-        # Step 5: Calculate similarity scores for replacement validation
-        # Since FAISS doesn't directly expose similarity scores, use ranking-based estimation
-        # CRITICAL: All documents must have similarity >= search_threshold since FAISS returned them
-        # FIXED: Use conservative scoring that keeps all scores in safe consolidation range
-        similarity_scores = {}
-        total_docs = len(unique_similar)
-        search_threshold = self.config.similarity_threshold
-        safety_threshold = self.config.replace_similarity_threshold
-
-        for i, doc in enumerate(unique_similar):
-            doc_id = doc.metadata.get('id')
-            if doc_id:
-                # Convert ranking to similarity score with conservative distribution
-                if total_docs == 1:
-                    ranking_similarity = 1.0  # Single document gets perfect score
-                else:
-                    # Use conservative scoring: distribute between safety_threshold and 1.0
-                    # This ensures all scores are suitable for consolidation
-                    # First document gets 1.0, last gets safety_threshold (0.9 by default)
-                    ranking_factor = 1.0 - (i / (total_docs - 1))
-                    score_range = 1.0 - safety_threshold  # e.g., 1.0 - 0.9 = 0.1
-                    ranking_similarity = safety_threshold + (score_range * ranking_factor)
-
-                    # Ensure minimum score is search_threshold for logical consistency
-                    ranking_similarity = max(ranking_similarity, search_threshold)
-
-                similarity_scores[doc_id] = ranking_similarity
-
-        # Step 6: Add similarity score to document metadata for LLM analysis
-        for doc in unique_similar:
-            doc_id = doc.metadata.get('id')
-            estimated_similarity = similarity_scores.get(doc_id, 0.7)
-            # Store for later validation
-            doc.metadata['_consolidation_similarity'] = estimated_similarity
-
-        # Step 7: Limit to max context for LLM
-        limited_similar = unique_similar[:self.config.max_llm_context_memories]
 
-        return limited_similar
+        # Step 3: Deduplicate by document ID keeping the best score
+        best: List[Dict[str, Tuple[Document, float]]] = [{} for _ in new_memories]
+        for i, docs in zip(owners, results):
+            for doc, score in docs:
+                doc_id = doc.metadata.get('id')
+                if doc_id and (doc_id not in best[i] or score > best[i][doc_id][1]):
+                    best[i][doc_id] = (doc, score)
+
+        # Step 4: Limit to max context for LLM, most similar first
+        return [
+            sorted(found.values(), key=lambda item: item[1], reverse=True)[:self.config.max_llm_context_memories]
+            for found in best
+        ]
+
+    async def _refresh_similar_memories(
+        self,
+        similar: List[Tuple[Document, float]]
+    ) -> Optional[List[Tuple[Document, float]]]:
+        """
+        Check similar memories found before earlier memories of the batch were consolidated.
+        Returns them as currently stored, or None if any was deleted or changed since and they need a new search.
+        """
+        ids = [str(doc.metadata.get('id')) for doc, _ in similar]
+        if any(id in self._changed_ids for id in ids):
+            return None
+        db = await Memory.get(self.agent)
+        current = {doc.metadata.get('id'): doc for doc in db.db.get_by_ids(ids)}
+        if any(id not in current for id in ids):
+            return None
+        return [(current[id], score) for id, (_, score) in zip(ids, similar)]
 
     async def _extract_search_keywords(
         self,
@@ -542,6 +546,13 @@ class MemoryConsolidator:
             # Retrieve metadata from memories being consolidated to preserve important fields
             consolidated_metadata = await self._gather_consolidated_metadata(db, result, original_metadata)
 
+            # similar memories searched for later memories of the batch are searched again if they include these
+            if result.action in (ConsolidationAction.MERGE, ConsolidationAction.REPLACE, ConsolidationAction.UPDATE):
+                self._changed_ids.update(str(id) for id in result.memories_to_remove)
+                self._changed_ids.update(
+                    str(info['id']) for info in result.memories_to_update if info.get('id')
+                )
+
             # Handle each action type specifically
             if result.action == ConsolidationAction.KEEP_SEPARATE:
                 return await self._handle_keep_separate(db, result, area, consolidated_metadata, log_item)
@@ -0,0 +1,329 @@
+import json
+import os
+import pickle
+import struct
+import threading
+import time
+from typing import Any, Sequence
+
+import numpy as np
+
+# faiss needs to be patched for python 3.12 on arm #TODO remove once not needed
+from python.helpers import faiss_monkey_patch
+import faiss
+from langchain_community.vectorstores import FAISS
+from langchain_core.embeddings import Embeddings
+
+from python.helpers.print_style import PrintStyle
+
+# Write-ahead log of memory changes kept next to index.faiss/index.pkl.
+# Every insert/delete appends a small record instead of rewriting the whole DB,
+# the log is folded into the snapshot files by a background compaction
+# and replayed on top of the last snapshot when the DB is loaded.
+# Snapshot files are swapped through temp files and a manifest marking the swap,
+# a swap interrupted by a crash is finished on the next load.
+
+WAL_FILE = "index.wal"
+COMPACTING_FILE = "index.wal.compacting"
+INDEX_FILE = "index.faiss"
+DOCSTORE_FILE = "index.pkl"
+MANIFEST_FILE = "index.manifest"
+
+COMPACT_AFTER_RECORDS = 500
+COMPACT_AFTER_BYTES = 64 * 1024 * 1024
+COMPACT_INTERVAL_SECONDS = 10 * 60
+
+_HEADER = struct.Struct("<I")
+
+
+class MemoryJournal:
+
+    def __init__(self, db_dir: str):
+        self.db_dir = db_dir
+        self.lock = threading.RLock()  # guards the log file and rotation
+        self.files_lock = threading.RLock()  # guards snapshot files while written or loaded
+        self.records = 0
+        self.bytes = 0
+        self.last_compaction = time.time()
+        self._compaction: threading.Thread | None = None
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.db_dir, name)
+
+    # --- logging ---
+
+    def log_add(
+        self,
+        ids: Sequence[str],
+        texts: Sequence[str],
+        metadatas: Sequence[dict],
+        embeddings: Any,
+    ):
+        self._append(
+            {
+                "op": "add",
+                "ids": list(ids),
+                "texts": list(texts),
+                "metadatas": list(metadatas),
+                "vectors": np.asarray(embeddings, dtype=np.float32),
+            }
+        )
+
+    def log_delete(self, ids: Sequence[str]):
+        self._append({"op": "delete", "ids": list(ids)})
+
+    def _append(self, record: dict):
+        data = pickle.dumps(record, protocol=pickle.HIGHEST_PROTOCOL)
+        with self.lock:
+            os.makedirs(self.db_dir, exist_ok=True)
+            with open(self.path(WAL_FILE), "ab") as f:
+                f.write(_HEADER.pack(len(data)) + data)
+                f.flush()
+                os.fsync(f.fileno())
+            self.records += 1
+            self.bytes += _HEADER.size + len(data)
+
+    # --- loading ---
+
+    @staticmethod
+    def read_records(path: str, truncate: bool = False) -> list[dict]:
+        records = []
+        if not os.path.exists(path):
+            return records
+        with open(path, "rb") as f:
+            data = f.read()
+        pos = 0
+        while pos + _HEADER.size <= len(data):
+            (size,) = _HEADER.unpack_from(data, pos)
+            start = pos + _HEADER.size
+            if start + size > len(data):
+                break  # torn tail from an interrupted write
+            try:
+                records.append(pickle.loads(data[start : start + size]))
+            except Exception:
+                break
+            pos = start + size
+        # cut the torn tail so records appended later are not hidden behind it
+        if truncate and pos < len(data):
+            with open(path, "r+b") as f:
+                f.truncate(pos)
+        return records
+
+    def replay(self, db: FAISS, use_vectors: bool = True) -> int:
+        """Apply logged changes on top of a freshly loaded snapshot, returns the number of applied records.
+        Replay is idempotent, adds of existing ids and deletes of missing ids are skipped.
+        With use_vectors=False the logged texts are embedded again by the DB's embedding function."""
+        with self.files_lock, self.lock:
+            records = self.read_records(
+                self.path(COMPACTING_FILE), truncate=True
+            ) + self.read_records(self.path(WAL_FILE), truncate=True)
+            self._apply(db, records, use_vectors)
+            self.records = len(records)
+            self.bytes = sum(
+                os.path.getsize(self.path(name))
+                for name in (COMPACTING_FILE, WAL_FILE)
+                if os.path.exists(self.path(name))
+            )
+            return len(records)
+
+    @staticmethod
+    def _apply(db: FAISS, records: list[dict], use_vectors: bool = True):
+        for record in records:
+            existing = db.docstore._dict  # type: ignore
+            if record["op"] == "add":
+                keep = [i for i, id in enumerate(record["ids"]) if id not in existing]
+                if keep and use_vectors:
+                    db.add_embeddings(
+                        text_embeddings=[
+                            (record["texts"][i], record["vectors"][i]) for i in keep
+                        ],
+                        metadatas=[record["metadatas"][i] for i in keep],
+                        ids=[record["ids"][i] for i in keep],
+                    )
+                elif keep:
+                    db.add_texts(
+                        texts=[record["texts"][i] for i in keep],
+                        metadatas=[record["metadatas"][i] for i in keep],
+                        ids=[record["ids"][i] for i in keep],
+                    )
+            elif record["op"] == "delete":
+                ids = [id for id in record["ids"] if id in existing]
+                if ids:
+                    db.delete(ids=ids)
+
+    def discard_log(self, keep: Sequence[str] = ()):
+        """Drop logged changes, for a snapshot replaced from outside (like a restored backup).
+        Log files named in keep were replaced along with it and stay."""
+        self.wait()
+        with self.files_lock, self.lock:
+            for name in (COMPACTING_FILE, WAL_FILE):
+                if name not in keep and os.path.exists(self.path(name)):
+                    os.remove(self.path(name))
+            self.records = self.bytes = 0
+
+    # --- snapshots ---
+
+    def save_snapshot(self, db: FAISS):
+        """Write a full snapshot synchronously and drop the log it contains."""
+        self.wait()
+        with self.files_lock, self.lock:
+            self._write_snapshot(*self._capture(db))
+            for name in (COMPACTING_FILE, WAL_FILE):
+                if os.path.exists(self.path(name)):
+                    os.remove(self.path(name))
+            self.records = self.bytes = 0
+            self.last_compaction = time.time()
+
+    def maybe_compact(self, db: FAISS):
+        if not self.records:
+            return
+        if (
+            self.records >= COMPACT_AFTER_RECORDS
+            or self.bytes >= COMPACT_AFTER_BYTES
+            or time.time() - self.last_compaction >= COMPACT_INTERVAL_SECONDS
+        ):
+            self.compact(db)
+
+    def compact(self, db: FAISS, background: bool = True):
+        with self.lock:
+            if self._compaction and self._compaction.is_alive():
+                return
+
+            wal, compacting = self.path(WAL_FILE), self.path(COMPACTING_FILE)
+            # a previous compaction failed, keep its records in front of the new ones
+            if os.path.exists(compacting) and os.path.exists(wal):
+                with open(wal, "rb") as src, open(compacting, "ab") as dst:
+                    dst.write(src.read())
+                    dst.flush()
+                    os.fsync(dst.fileno())
+                os.remove(wal)
+            elif os.path.exists(wal):
+                os.replace(wal, compacting)
+
+            # the snapshot files and the rotated log hold the state of db, new writes go to a fresh log;
+            # the log is folded into the files off the caller's thread, db itself is only captured
+            # when there is no snapshot to start from yet
+            snapshot = None
+            if not all(os.path.exists(self.path(name)) for name in (INDEX_FILE, DOCSTORE_FILE)):
+                snapshot = self._capture(db)
+            self.records = self.bytes = 0
+            self.last_compaction = time.time()
+
+            if background:
+                self._compaction = threading.Thread(
+                    target=self._finish_compaction,
+                    args=(snapshot,),
+                    daemon=True,
+                    name="MemoryCompaction",
+                )
+                self._compaction.start()
+            else:
+                self._finish_compaction(snapshot)
+
+    def wait(self):
+        thread = self._compaction
+        if thread and thread.is_alive() and thread is not threading.current_thread():
+            thread.join()
+
+    def recover(self):
+        """Finish a snapshot swap interrupted by a crash, call before loading the snapshot."""
+        with self.files_lock:
+            manifest = self._read_manifest()
+            if manifest.get("swapping"):
+                self._swap(manifest["generation"])
+
+    def _finish_compaction(self, snapshot: tuple[np.ndarray, bytes] | None):
+        try:
+            with self.files_lock:
+                if snapshot is None:
+                    snapshot = self._fold_log()
+                self._write_snapshot(*snapshot)
+                compacting = self.path(COMPACTING_FILE)
+                if os.path.exists(compacting):
+                    os.remove(compacting)
+        except Exception as e:
+            PrintStyle.error(f"Memory compaction failed in '{self.db_dir}': {e}")
+
+    def _fold_log(self) -> tuple[np.ndarray, bytes]:
+        # load the last snapshot and apply the rotated log to it, like a DB load does
+        with open(self.path(DOCSTORE_FILE), "rb") as f:
+            docstore, index_to_docstore_id = pickle.load(f)
+        db = FAISS(
+            embedding_function=_NoEmbeddings(),
+            index=faiss.read_index(self.path(INDEX_FILE)),
+            docstore=docstore,
+            index_to_docstore_id=index_to_docstore_id,
+        )
+        self._apply(db, self.read_records(self.path(COMPACTING_FILE)))
+        return self._capture(db)
+
+    @staticmethod
+    def _capture(db: FAISS) -> tuple[np.ndarray, bytes]:
+        return faiss.serialize_index(db.index), pickle.dumps(
+            (db.docstore, db.index_to_docstore_id)
+        )
+
+    def _write_snapshot(self, index_bytes: np.ndarray, docstore_bytes: bytes):
+        os.makedirs(self.db_dir, exist_ok=True)
+        generation = self._read_manifest().get("generation", 0) + 1
+        for name, data in (
+            (DOCSTORE_FILE, docstore_bytes),
+            (INDEX_FILE, index_bytes.tobytes()),
+        ):
+            tmp = self.path(name + ".tmp")
+            with open(tmp, "wb") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+        # both files are complete, from here on a crash is finished by recover()
+        self._write_manifest({"generation": generation, "swapping": True})
+        self._swap(generation)
+
+    def _swap(self, generation: int):
+        for name in (DOCSTORE_FILE, INDEX_FILE):
+            tmp = self.path(name + ".tmp")
+            if os.path.exists(tmp):
+                os.replace(tmp, self.path(name))
+        self._write_manifest({"generation": generation, "swapping": False})
+
+    def _read_manifest(self) -> dict:
+        try:
+            with open(self.path(MANIFEST_FILE), "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_manifest(self, manifest: dict):
+        tmp = self.path(MANIFEST_FILE + ".tmp")
+        with open(tmp, "w") as f:
+            json.dump(manifest, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path(MANIFEST_FILE))
+
+
+class _NoEmbeddings(Embeddings):
+    # compaction applies logged vectors only
+
+    def embed_documents(self, texts):
+        raise NotImplementedError()
+
+    def embed_query(self, text):
+        raise NotImplementedError()
+
+
+_journals: dict[str, MemoryJournal] = {}
+_journals_lock = threading.Lock()
+
+
+def get_journal(db_dir: str) -> MemoryJournal:
+    db_dir = os.path.abspath(db_dir)
+    with _journals_lock:
+        journal = _journals.get(db_dir)
+        if journal is None:
+            journal = _journals[db_dir] = MemoryJournal(db_dir)
+        return journal
+
+
+def is_consistent(db: FAISS) -> bool:
+    return db.index.ntotal == len(db.index_to_docstore_id)
@@ -0,0 +1,377 @@
+import ast
+import functools
+import math
+import operator
+import threading
+from typing import Any, Callable, Hashable, Iterable, List, Optional, Tuple
+
+import numpy as np
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_community.vectorstores import FAISS
+from langchain_community.vectorstores.utils import DistanceStrategy
+from langchain_core.documents import Document
+from simpleeval import DEFAULT_FUNCTIONS, SimpleEval
+
+# faiss needs to be patched for python 3.12 on arm #TODO remove once not needed
+from python.helpers import faiss_monkey_patch
+import faiss
+
+from python.helpers.ann_index import RERANK_FETCH, AnnIndex, IndexConfig, get_search_params
+
+# Metadata filters are simpleeval expressions over document metadata, like "area == 'main'".
+# They are parsed once per expression; comparisons, and/or/not, names and constants run as
+# plain python closures, anything else is evaluated by simpleeval on the parsed tree.
+# Equality tests on indexed keys are answered from inverted indexes kept by the docstore,
+# so a filtered search only scans the matching documents.
+
+INDEXED_KEYS = ("area", "document_uri", "knowledge_source", "source_file")
+# filters matching at least this share of a large store search the approximate index
+ANN_FILTER_SHARE = 0.1
+
+_COMPARE_OPS: dict[type, Callable[[Any, Any], Any]] = {
+    ast.Eq: operator.eq,
+    ast.NotEq: operator.ne,
+    ast.Lt: operator.lt,
+    ast.LtE: operator.le,
+    ast.Gt: operator.gt,
+    ast.GtE: operator.ge,
+    ast.In: lambda x, y: x in y,
+    ast.NotIn: lambda x, y: x not in y,
+    ast.Is: operator.is_,
+    ast.IsNot: operator.is_not,
+}
+
+Predicate = Callable[[dict], Any]
+# candidate ids in docstore order and whether every candidate is known to match
+Candidates = Tuple[dict[str, None], bool]
+
+
+class MetadataFilter:
+    """Compiled metadata filter, call it with a metadata dict."""
+
+    def __init__(self, condition: str):
+        self.condition = condition
+        self.error: str = ""
+        self._expr: ast.AST | None = None
+        try:
+            node = SimpleEval.parse(condition)
+        except Exception as e:
+            self.error = f"Invalid filter {condition!r}: {e}"
+            self._predicate: Predicate = lambda data: False
+            return
+        try:
+            if not isinstance(node, ast.Expr):
+                raise _NotCompiled()
+            self._predicate = _compile(node.value)
+            self._expr = node.value
+        except _NotCompiled:
+            self._predicate = lambda data: SimpleEval(names=data).eval(
+                condition, previously_parsed=node
+            )
+
+    def __call__(self, data: dict[str, Any]) -> bool:
+        try:
+            return bool(self._predicate(data))
+        except Exception:
+            return False
+
+    def candidates(self, docstore: "IndexedDocstore") -> Candidates | None:
+        """Ids of documents that may match, None when the indexes cannot narrow the filter down."""
+        if self.error:
+            return {}, True
+        if self._expr is None:
+            return None
+        return docstore.lookup(self._expr)
+
+
+@functools.lru_cache(maxsize=256)
+def compile_filter(condition: str) -> MetadataFilter:
+    return MetadataFilter(condition)
+
+
+class _NotCompiled(Exception):
+    pass
+
+
+def _compile(node: ast.AST) -> Predicate:
+    if isinstance(node, ast.Constant):
+        value = node.value
+        return lambda data: value
+    if isinstance(node, ast.Name):
+        if node.id in DEFAULT_FUNCTIONS:
+            raise _NotCompiled()
+        name = node.id
+        return lambda data: data[name]
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.Not):
+        operand = _compile(node.operand)
+        return lambda data: not operand(data)
+    if isinstance(node, ast.BoolOp):
+        values = [_compile(value) for value in node.values]
+        if isinstance(node.op, ast.And):
+            def all_of(data):
+                result = True
+                for value in values:
+                    result = value(data)
+                    if not result:
+                        return result
+                return result
+            return all_of
+
+        def any_of(data):
+            result = False
+            for value in values:
+                result = value(data)
+                if result:
+                    return result
+            return result
+        return any_of
+    if isinstance(node, ast.Compare):
+        if any(type(op) not in _COMPARE_OPS for op in node.ops):
+            raise _NotCompiled()
+        left = _compile(node.left)
+        steps = [(_COMPARE_OPS[type(op)], _compile(right)) for op, right in zip(node.ops, node.comparators)]
+
+        def compare(data):
+            lval = left(data)
+            for op, right in steps:
+                rval = right(data)
+                if not op(lval, rval):
+                    return False
+                lval = rval
+            return True
+        return compare
+    raise _NotCompiled()
+
+
+class IndexedDocstore(InMemoryDocstore):
+    """In memory docstore with inverted indexes on INDEXED_KEYS, pickled as a plain InMemoryDocstore."""
+
+    def __init__(self, _dict: Optional[dict[str, Document]] = None):
+        super().__init__(_dict)
+        self._lock = threading.RLock()
+        self._indexes: dict[str, dict[Hashable, dict[str, None]]] = {key: {} for key in INDEXED_KEYS}
+        self._index_docs(self._dict.items())
+
+    def __reduce__(self):
+        return (InMemoryDocstore, (self._dict,))
+
+    def add(self, texts: dict[str, Document]) -> None:
+        with self._lock:
+            super().add(texts)
+            self._index_docs(texts.items())
+
+    def delete(self, ids: List) -> None:
+        with self._lock:
+            docs = [(id, self._dict[id]) for id in ids if id in self._dict]
+            super().delete(ids)
+            for id, doc in docs:
+                for key, value in self._indexed_values(doc):
+                    postings = self._indexes[key].get(value)
+                    if postings is not None:
+                        postings.pop(id, None)
+                        if not postings:
+                            del self._indexes[key][value]
+
+    def lookup(self, node: ast.AST) -> Candidates | None:
+        with self._lock:
+            return self._lookup(node)
+
+    def _lookup(self, node: ast.AST) -> Candidates | None:
+        if isinstance(node, ast.Compare) and len(node.ops) == 1 and isinstance(node.ops[0], ast.Eq):
+            pair = (node.left, node.comparators[0])
+            for name, const in (pair, pair[::-1]):
+                if (
+                    isinstance(name, ast.Name)
+                    and name.id in self._indexes
+                    and isinstance(const, ast.Constant)
+                ):
+                    try:
+                        return dict(self._indexes[name.id].get(const.value, {})), True
+                    except TypeError:
+                        return None
+            return None
+        if isinstance(node, ast.BoolOp):
+            parts = [self._lookup(value) for value in node.values]
+            if isinstance(node.op, ast.Or):
+                if any(part is None for part in parts):
+                    return None
+                result: dict[str, None] = {}
+                for ids, _ in parts:  # type: ignore
+                    result.update(ids)
+                return result, all(exact for _, exact in parts)  # type: ignore
+            known = [part for part in parts if part is not None]
+            if not known:
+                return None
+            known.sort(key=lambda part: len(part[0]))
+            result = known[0][0]
+            for ids, _ in known[1:]:
+                result = {id: None for id in result if id in ids}
+            return result, len(known) == len(parts) and all(exact for _, exact in known)
+        return None
+
+    def _index_docs(self, docs: Iterable[tuple[str, Document]]):
+        for id, doc in docs:
+            for key, value in self._indexed_values(doc):
+                self._indexes[key].setdefault(value, {})[id] = None
+
+    @staticmethod
+    def _indexed_values(doc: Document):
+        for key in INDEXED_KEYS:
+            if key in doc.metadata:
+                value = doc.metadata[key]
+                try:
+                    hash(value)
+                except TypeError:
+                    continue
+                yield key, value
+
+
+class IndexedFAISS(FAISS):
+    """FAISS store keeping its docstore indexed. Searches with a compiled filter only scan
+    the vectors of candidate documents through a faiss IDSelector. Large stores search an
+    approximate index instead of the flat one, see ann_index."""
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        if not isinstance(self.docstore, IndexedDocstore):
+            self.docstore = IndexedDocstore(getattr(self.docstore, "_dict", None))
+        self.ann: AnnIndex | None = None
+        self._positions: dict[str, int] = {}
+        self._positions_of: tuple[dict, int] | None = None
+
+    def set_index_config(self, config: IndexConfig):
+        """Use an approximate index of the configured type once the store is large enough."""
+        self.ann = AnnIndex(config) if config.type != "flat" else None
+        if self.ann:
+            self.ann.get(self)  # starts building right away for stores over the threshold
+
+    def filter_candidates(self, filter: str | MetadataFilter) -> Candidates | None:
+        if isinstance(filter, str):
+            filter = compile_filter(filter)
+        return filter.candidates(self.docstore)  # type: ignore
+
+    def similarity_search_with_score_by_vector(
+        self,
+        embedding: List[float],
+        k: int = 4,
+        filter: Any = None,
+        fetch_k: int = 20,
+        **kwargs: Any,
+    ) -> List[Tuple[Document, float]]:
+        found = self.filter_candidates(filter) if isinstance(filter, MetadataFilter) else None
+        ann = self.ann.get(self) if self.ann else None
+        if found is None and ann is None:
+            return super().similarity_search_with_score_by_vector(
+                embedding, k, filter=filter, fetch_k=fetch_k, **kwargs
+            )
+        return self._search_vectors([embedding], k, filter, fetch_k, found, ann, **kwargs)[0]
+
+    def similarity_search_with_score_by_vectors(
+        self,
+        embeddings: List[List[float]],
+        k: int = 4,
+        filter: Any = None,
+        fetch_k: int = 20,
+        **kwargs: Any,
+    ) -> List[List[Tuple[Document, float]]]:
+        """Results of similarity_search_with_score_by_vector for several query vectors,
+        searched with one query matrix instead of an index scan per vector."""
+        if not len(embeddings):
+            return []
+        found = self.filter_candidates(filter) if isinstance(filter, MetadataFilter) else None
+        ann = self.ann.get(self) if self.ann else None
+        return self._search_vectors(embeddings, k, filter, fetch_k, found, ann, **kwargs)
+
+    def _search_vectors(
+        self,
+        embeddings: List[List[float]],
+        k: int,
+        filter: Any,
+        fetch_k: int,
+        found: Candidates | None,
+        ann: AnnIndex | None,
+        **kwargs: Any,
+    ) -> List[List[Tuple[Document, float]]]:
+        vectors = np.array(embeddings, dtype=np.float32)
+        if self._normalize_L2:
+            faiss.normalize_L2(vectors)
+
+        if found is None:
+            matches = self._create_filter_func(filter) if filter is not None else None
+            n = k if matches is None else fetch_k
+            hits = self._search_ann(ann, vectors, n) if ann else self._search_selected(vectors, None, n)
+            rows = [self._get_docs(row, matches) for row in hits]
+        else:
+            ids, exact = found
+            share = len(ids) / max(1, len(self.index_to_docstore_id))
+            if ann and share >= ANN_FILTER_SHARE:
+                # broad filter, over-fetch from the approximate index and keep candidates
+                hits = self._search_ann(ann, vectors, math.ceil(max(k, 1 if exact else fetch_k) / share))
+                hits = [[(id, score) for id, score in row if id in ids] for row in hits]
+            else:
+                hits = self._search_selected(vectors, ids, k if exact else max(k, fetch_k))
+            rows = [self._get_docs(row, None if exact else filter) for row in hits]
+
+        score_threshold = kwargs.get("score_threshold")
+        if score_threshold is not None:
+            cmp = (
+                operator.ge
+                if self.distance_strategy
+                in (DistanceStrategy.MAX_INNER_PRODUCT, DistanceStrategy.JACCARD)
+                else operator.le
+            )
+            rows = [[(doc, score) for doc, score in docs if cmp(score, score_threshold)] for docs in rows]
+        return [docs[:k] for docs in rows]
+
+    def _search_ann(self, ann: AnnIndex, vectors: np.ndarray, n: int) -> list[list[tuple[str, float]]]:
+        """Nearest n of the approximate index, quantized ones are over-fetched and re-ranked
+        with exact inner products of the flat index, so scores can be compared to thresholds."""
+        if not ann.quantized:
+            return ann.search(vectors, n)
+        rows = []
+        for vector, row in zip(vectors, ann.search(vectors, n * RERANK_FETCH)):
+            ids = [id for id, _ in row]
+            positions = self._get_positions(ids)
+            if len(positions) != len(ids):
+                ids = [id for id in ids if id in self._positions]
+            if not positions:
+                rows.append([])
+                continue
+            scores = self.index.reconstruct_batch(np.array(positions, dtype=np.int64)) @ vector
+            order = np.argsort(-scores, kind="stable")[:n]
+            rows.append([(ids[i], float(scores[i])) for i in order])
+        return rows
+
+    def _search_selected(
+        self, vectors: np.ndarray, ids: Iterable[str] | None, k: int
+    ) -> list[list[tuple[str, float]]]:
+        """Nearest of the given documents for each query vector, all documents for ids None."""
+        selector = None
+        if ids is not None:
+            positions = self._get_positions(ids)
+            if not positions:
+                return [[] for _ in range(len(vectors))]
+            selector = faiss.IDSelectorBatch(np.array(positions, dtype=np.int64))
+        scores, indices = self.index.search(vectors, k, params=get_search_params(self.index, selector))
+        return [
+            [(self.index_to_docstore_id[i], score) for score, i in zip(row_scores, row_indices) if i != -1]
+            for row_scores, row_indices in zip(scores, indices)
+        ]
+
+    def _get_docs(
+        self, hits: list[tuple[str, float]], matches: Callable[[dict], Any] | None
+    ) -> List[Tuple[Document, float]]:
+        docs = []
+        for id, score in hits:
+            doc = self.docstore.search(id)
+            if isinstance(doc, Document) and (matches is None or matches(doc.metadata)):
+                docs.append((doc, score))
+        return docs
+
+    def _get_positions(self, ids: Iterable[str]) -> list[int]:
+        # index_to_docstore_id grows in place on add and is replaced on delete
+        mapping = self.index_to_docstore_id
+        if self._positions_of is None or self._positions_of[0] is not mapping or self._positions_of[1] != len(mapping):
+            self._positions = {id: pos for pos, id in mapping.items()}
+            self._positions_of = (mapping, len(mapping))
+        return [self._positions[id] for id in ids if id in self._positions]
@@ -1,9 +1,13 @@
 from collections import OrderedDict
 from datetime import datetime
 from typing import Any
+import os
+import threading
+import time
 import uuid
 from agent import Agent, AgentConfig, AgentContext, AgentContextType
-from python.helpers import files, history
+from python.helpers import chat_index, chat_journal, files, history
+from python.helpers.chat_index import ChatIndexEntry
 import json
 from initialize import initialize_agent
 
@@ -12,6 +16,14 @@ from python.helpers.log import Log, LogItem
 CHATS_FOLDER = "usr/chats"
 LOG_SIZE = 1000
 CHAT_FILE_NAME = "chat.json"
+# seconds without use after which a loaded chat is evicted back to its index entry, 0 disables
+_idle_ttl = os.getenv("A0_CHAT_IDLE_TTL", "").strip()
+CHAT_IDLE_TTL = int(_idle_ttl) if _idle_ttl.isdigit() else 30 * 60
+
+# guards hydration and eviction so a chat is never loaded twice
+_hydrate_lock = threading.RLock()
+# chats evicted in this process, clients may still hold their log
+_evicted: set[str] = set()
 
 
 def get_chat_folder_path(ctxid: str):
@@ -30,16 +42,35 @@ def get_chat_msg_files_folder(ctxid: str):
     return files.get_abs_path(get_chat_folder_path(ctxid), "messages")
 
 def save_tmp_chat(context: AgentContext):
-    """Save context to the chats folder"""
+    """Save context to the chats folder.
+    The first save of a context in this process writes the whole chat.json,
+    later saves only append what changed since to the chat journal."""
     # Skip saving BACKGROUND contexts as they should be ephemeral
     if context.type == AgentContextType.BACKGROUND:
         return
 
-    path = _get_chat_file_path(context.id)
-    files.make_dirs(path)
-    data = _serialize_context(context)
-    js = _safe_json_serialize(data, ensure_ascii=False)
-    files.write_file(path, js)
+    folder = get_chat_folder_path(context.id)
+    journal = chat_journal.get_journal(folder, LOG_SIZE)
+    with journal.lock:
+        state: _SavedState | None = journal.state
+        records = state.diff(context) if state and state.matches(context) else None
+        if records is None:
+            state = _SavedState(context)
+            journal.write_snapshot(state.capture(context), _serialize_json)
+            journal.state = state
+        else:
+            try:
+                journal.append(records)
+            except Exception:
+                # the state already includes these records, start over with a full save
+                journal.state = None
+                raise
+
+        entry = state.index_entry(context)
+        if entry != state.entry:
+            chat_index.write_entry(folder, entry)
+            state.entry = entry
+    journal.maybe_compact(_serialize_json)
 
 
 def save_tmp_chats():
@@ -51,24 +82,127 @@ def save_tmp_chats():
         save_tmp_chat(context)
 
 
-def load_tmp_chats():
-    """Load all contexts from the chats folder"""
+def load_tmp_chats(rebuild_index: bool = False):
+    """Index all chats in the chats folder, contexts are hydrated when first used.
+    Loaded contexts of the same ids are replaced by what is on disk.
+    With rebuild_index the index entries are read from the chats instead of meta.json."""
     _convert_v080_chats()
     folders = files.list_files(CHATS_FOLDER, "*")
-    json_files = []
-    for folder_name in folders:
-        json_files.append(_get_chat_file_path(folder_name))
 
     ctxids = []
-    for file in json_files:
+    with _hydrate_lock:
+        chat_index.clear()
+        for folder_name in folders:
+            folder = get_chat_folder_path(folder_name)
+            try:
+                if not os.path.exists(os.path.join(folder, CHAT_FILE_NAME)):
+                    raise FileNotFoundError(_get_chat_file_path(folder_name))
+                entry = None if rebuild_index else chat_index.read_entry(folder)
+                if entry is None:
+                    # chats saved before the index, or index rebuilt after a restore
+                    data = chat_journal.get_journal(folder, LOG_SIZE).load()
+                    if data is None:
+                        raise FileNotFoundError(_get_chat_file_path(folder_name))
+                    entry = _index_entry(data)
+                    chat_index.write_entry(folder, entry)
+
+                loaded = AgentContext.remove(entry.id)
+                if loaded:
+                    chat_journal.get_journal(folder, LOG_SIZE).state = None
+                    _evicted.add(entry.id)
+                AgentContext._counter += 1
+                entry.no = AgentContext._counter
+                chat_index.add(entry)
+                ctxids.append(entry.id)
+            except Exception as e:
+                print(f"Error loading chat {folder_name}: {e}")
+    return ctxids
+
+
+def hydrate_chat(ctxid: str) -> AgentContext | None:
+    """Load an indexed chat from disk into a full AgentContext."""
+    with _hydrate_lock:
+        context = AgentContext._contexts.get(ctxid)
+        if context:
+            return context
+        entry = chat_index.pop(ctxid)
+        if entry is None:
+            return None
         try:
-            js = files.read_file(file)
-            data = json.loads(js)
-            ctx = _deserialize_context(data)
-            ctxids.append(ctx.id)
+            data = chat_journal.get_journal(get_chat_folder_path(ctxid), LOG_SIZE).load()
+            if data is None:
+                raise FileNotFoundError(_get_chat_file_path(ctxid))
+            context = _deserialize_context(data)
         except Exception as e:
-            print(f"Error loading chat {file}: {e}")
-    return ctxids
+            chat_index.add(entry)
+            print(f"Error loading chat {ctxid}: {e}")
+            return None
+        context.no = entry.no
+        if ctxid in _evicted:
+            # a client may still show the log of the evicted context, a new guid makes it reload
+            context.log.guid = str(uuid.uuid4())
+        return context
+
+
+def evict_idle_chats(ttl: float | None = None):
+    """Save and unload contexts unused for ttl seconds, they stay listed through the chat index."""
+    ttl = CHAT_IDLE_TTL if ttl is None else ttl
+    if ttl <= 0:
+        return []
+    from python.helpers.state_monitor_integration import projected_contexts
+
+    projected = projected_contexts()
+    evicted = []
+    for context in AgentContext.all():
+        if (
+            context.type == AgentContextType.BACKGROUND
+            or context.id in projected
+            or context.is_running()
+            or time.time() - context.last_used < ttl
+        ):
+            continue
+        if _evict_chat(context, ttl):
+            evicted.append(context.id)
+    return evicted
+
+
+def _evict_chat(context: AgentContext, ttl: float, attempts: int = 3) -> bool:
+    """Save an idle context and unload it, the save runs without locks held.
+    The context is removed only if it was not used during the save."""
+    for _ in range(attempts):
+        if not _is_idle(context, ttl):
+            return False
+        used = context.last_used
+        try:
+            save_tmp_chat(context)
+        except Exception as e:
+            print(f"Error saving chat {context.id}: {e}")
+            return False
+        journal = chat_journal.get_journal(get_chat_folder_path(context.id), LOG_SIZE)
+        with _hydrate_lock, AgentContext._contexts_lock:
+            if not _is_idle(context, ttl):
+                return False
+            if context.last_used != used:
+                continue  # touched during the save, save again
+            entry = journal.state.entry if journal.state else None
+            AgentContext.remove(context.id)
+            # release the saved state, it references the whole context
+            journal.state = None
+            if entry is None:
+                return False
+            _evicted.add(context.id)
+            chat_index.add(entry)
+            return True
+    return False
+
+
+def _is_idle(context: AgentContext, ttl: float) -> bool:
+    # still loaded, not running and unused for ttl seconds
+    return (
+        AgentContext._contexts.get(context.id) is context
+        and not context.is_running()
+        and time.time() - context.last_used >= ttl
+    )
 
 
 def _get_chat_file_path(ctxid: str):
@@ -106,6 +240,8 @@ def export_json_chat(context: AgentContext):
 def remove_chat(ctxid):
     """Remove a chat or task context"""
     path = get_chat_folder_path(ctxid)
+    chat_index.pop(ctxid)
+    chat_journal.drop_journal(path)
     files.delete_dir(path)
 
 
@@ -117,13 +253,24 @@ def remove_msg_files(ctxid):
 
 def _serialize_context(context: AgentContext):
     # serialize agents
+    agents = [_serialize_agent(agent) for agent in _agent_chain(context)]
+    return {
+        **_serialize_meta(context),
+        "agents": agents,
+        "log": _serialize_log(context.log),
+    }
+
+
+def _agent_chain(context: AgentContext) -> list[Agent]:
     agents = []
     agent = context.agent0
     while agent:
-        agents.append(_serialize_agent(agent))
+        agents.append(agent)
         agent = agent.data.get(Agent.DATA_NAME_SUBORDINATE, None)
+    return agents
 
 
+def _serialize_meta(context: AgentContext):
     data = {k: v for k, v in context.data.items() if not k.startswith("_")}
     output_data = {k: v for k, v in context.output_data.items() if not k.startswith("_")}
 
@@ -141,28 +288,28 @@ def _serialize_context(context: AgentContext):
             if context.last_message
             else datetime.fromtimestamp(0).isoformat()
         ),
-        "agents": agents,
         "streaming_agent": (
             context.streaming_agent.number if context.streaming_agent else 0
         ),
-        "log": _serialize_log(context.log),
         "data": data,
         "output_data": output_data,
     }
 
 
 def _serialize_agent(agent: Agent):
-    data = {k: v for k, v in agent.data.items() if not k.startswith("_")}
-
     history = agent.history.serialize()
 
     return {
         "number": agent.number,
-        "data": data,
+        "data": _serialize_agent_data(agent),
         "history": history,
     }
 
 
+def _serialize_agent_data(agent: Agent):
+    return {k: v for k, v in agent.data.items() if not k.startswith("_")}
+
+
 def _serialize_log(log: Log):
     # Guard against concurrent log mutations while serializing.
     with log._lock:
@@ -178,6 +325,160 @@ def _serialize_log(log: Log):
     }
 
 
+def _index_entry(data: dict[str, Any]) -> ChatIndexEntry:
+    """Index entry of a serialized context (meta with or without agents and log)."""
+    log = data.get("log") or {}
+    return ChatIndexEntry(
+        id=data["id"],
+        name=data.get("name"),
+        created_at=data.get("created_at", ""),
+        last_message=data.get("last_message", ""),
+        type=data.get("type", AgentContextType.USER.value),
+        project=(data.get("data") or {}).get("project"),
+        output_data=data.get("output_data") or {},
+        log_guid=log.get("guid", ""),
+        log_length=len(log.get("logs", [])),
+    )
+
+
+class _AgentState:
+    """What the chat files contain for one agent of the chain."""
+
+    def __init__(self, agent: Agent):
+        self.agent = agent
+        self.data_js = _serialize_json(_serialize_agent_data(agent))
+        self.mark_history(agent)
+
+    def mark_history(self, agent: Agent):
+        hist = agent.history
+        self.history = hist
+        self.structure_version = hist.structure_version
+        self.current = hist.current
+        self.messages = len(hist.current.messages)
+        self.counter = hist.counter
+
+    def history_unchanged(self, agent: Agent) -> bool:
+        hist = agent.history
+        return (
+            hist is self.history
+            and hist.structure_version == self.structure_version
+            and hist.current is self.current
+            and len(hist.current.messages) >= self.messages
+        )
+
+
+class _SavedState:
+    """What the chat files contain for a live context, diffed on every save to journal the changes."""
+
+    def __init__(self, context: AgentContext):
+        self.context = context
+        self.log = context.log
+        self.log_guid = context.log.guid
+        self.log_version = 0
+        self.progress: tuple = ()
+        self.meta_js = ""
+        self.agents: list[_AgentState] = []
+        self.entry: ChatIndexEntry | None = None  # last written meta.json
+
+    def matches(self, context: AgentContext) -> bool:
+        return (
+            context is self.context
+            and context.log is self.log
+            and context.log.guid == self.log_guid
+        )
+
+    def capture(self, context: AgentContext) -> dict[str, Any]:
+        """Serialize the whole context and remember what was written."""
+        self.log_version = context.log.version
+        self.agents = [_AgentState(agent) for agent in _agent_chain(context)]
+        data = _serialize_context(context)
+        self.meta_js = _serialize_json(_serialize_meta(context))
+        self.progress = (data["log"]["progress"], data["log"]["progress_no"])
+        return data
+
+    def diff(self, context: AgentContext) -> list[str]:
+        """Journal records for everything changed since the previous save."""
+        records: list[str] = []
+
+        meta_js = _serialize_json(_serialize_meta(context))
+        if meta_js != self.meta_js:
+            records.append(_record("meta", meta=json.loads(meta_js)))
+            self.meta_js = meta_js
+
+        chain = _agent_chain(context)
+        if len(chain) < len(self.agents):
+            records.append(_record("agents", count=len(chain)))
+            del self.agents[len(chain) :]
+        for index, agent in enumerate(chain):
+            state = self.agents[index] if index < len(self.agents) else None
+            if state is None or state.agent is not agent:
+                state = _AgentState(agent)
+                records.append(_record("agent", index=index, agent=_serialize_agent(agent)))
+                if index < len(self.agents):
+                    self.agents[index] = state
+                else:
+                    self.agents.append(state)
+                continue
+
+            if not state.history_unchanged(agent):
+                records.append(
+                    _record("history", index=index, history=agent.history.serialize())
+                )
+                state.mark_history(agent)
+            elif len(agent.history.current.messages) > state.messages:
+                messages = agent.history.current.messages[state.messages :]
+                records.append(
+                    _record(
+                        "messages",
+                        index=index,
+                        messages=[msg.to_dict() for msg in messages],
+                        counter=agent.history.counter,
+                    )
+                )
+                state.mark_history(agent)
+
+            data_js = _serialize_json(_serialize_agent_data(agent))
+            if data_js != state.data_js:
+                records.append(_record("agent_data", index=index, data=json.loads(data_js)))
+                state.data_js = data_js
+
+        log = context.log
+        with log._lock:
+            version = log.version
+            progress = (log.progress, log.progress_no)
+        items = log.output(start=self.log_version, end=version)
+        if items or progress != self.progress:
+            records.append(
+                _record(
+                    "log",
+                    guid=self.log_guid,
+                    items=items,
+                    progress=progress[0],
+                    progress_no=progress[1],
+                )
+            )
+        self.log_version = version
+        self.progress = progress
+
+        return records
+
+    def index_entry(self, context: AgentContext) -> ChatIndexEntry:
+        log = context.log
+        entry = _index_entry({**json.loads(self.meta_js), "log": None})
+        entry.log_guid = log.guid
+        entry.log_length = len(log.logs)
+        entry.no = context.no
+        return entry
+
+
+def _record(op: str, **fields) -> str:
+    return _serialize_json({"op": op, **fields})
+
+
+def _serialize_json(obj) -> str:
+    return _safe_json_serialize(obj, ensure_ascii=False)
+
+
 def _deserialize_context(data):
     config = initialize_agent()
     log = _deserialize_log(data.get("log", None))
@@ -282,7 +583,7 @@ def _deserialize_log(data: dict[str, Any]) -> "Log":
                 id=item_data.get("id"),
             )
         )
-        log.updates.append(i)
+        log.mark_updated(i)
         i += 1
 
     return log
@@ -1,7 +1,7 @@
 import os
 from typing import Literal, TypedDict, TYPE_CHECKING, cast
 
-from python.helpers import files, dirty_json, persist_chat, file_tree
+from python.helpers import chat_index, files, dirty_json, persist_chat, file_tree
 from python.helpers.print_style import PrintStyle
 
 
@@ -345,6 +345,7 @@ def deactivate_project(context_id: str, *, mark_dirty: bool = True):
 def reactivate_project_in_chats(name: str):
     from agent import AgentContext
 
+    _hydrate_project_chats(name)
     for context in AgentContext.all():
         if context.get_data(CONTEXT_DATA_KEY_PROJECT) == name:
             activate_project(context.id, name, mark_dirty=False)
@@ -357,6 +358,7 @@ def reactivate_project_in_chats(name: str):
 def deactivate_project_in_chats(name: str):
     from agent import AgentContext
 
+    _hydrate_project_chats(name)
     for context in AgentContext.all():
         if context.get_data(CONTEXT_DATA_KEY_PROJECT) == name:
             deactivate_project(context.id, mark_dirty=False)
@@ -366,6 +368,15 @@ def deactivate_project_in_chats(name: str):
     mark_dirty_all(reason="projects.deactivate_project_in_chats")
 
 
+def _hydrate_project_chats(name: str):
+    from agent import AgentContext
+
+    # chats of the project that are not loaded yet
+    for entry in chat_index.entries():
+        if entry.project == name:
+            AgentContext.get(entry.id)
+
+
 def build_system_prompt_vars(name: str):
     project_data = load_basic_project_data(name)
     main_instructions = project_data.get("instructions", "") or ""
@@ -9,6 +9,11 @@ from dotenv.parser import parse_stream
 from python.helpers.errors import RepairableException
 from python.helpers import files
 
+try:
+    import ahocorasick  # type: ignore
+except ImportError:  # masking falls back to one str.replace pass per secret
+    ahocorasick = None
+
 if TYPE_CHECKING:
     from agent import AgentContext
 
@@ -35,49 +40,120 @@ class EnvLine:
     )
 
 
+class SecretsMasker:
+    """Replaces secret values with placeholders in a single pass over the text.
+
+    Built once per secrets revision by SecretsManager.get_masker. Finds all values with an
+    Aho-Corasick automaton (pyahocorasick); without the library it falls back to one str.replace
+    per value. Either way overlapping values are resolved longest first, like replacing the
+    values one after another from the longest.
+    """
+
+    def __init__(
+        self,
+        key_to_value: Dict[str, str],
+        min_length: int = 1,
+        placeholder: str = "§§secret({key})",
+    ):
+        self.replacements: Dict[str, str] = {}
+        for key, value in key_to_value.items():
+            if isinstance(value, str) and value and len(value.strip()) >= min_length:
+                self.replacements.setdefault(value, alias_for_key(key, placeholder))
+        self.values: List[str] = sorted(self.replacements, key=len, reverse=True)
+        self.max_len: int = len(self.values[0]) if self.values else 0
+        self._prefixes: Dict[int, Set[str]] = {}
+
+        self._automaton = None
+        if ahocorasick is not None and self.values:
+            automaton = ahocorasick.Automaton()
+            for value in self.replacements:
+                automaton.add_word(value, value)
+            automaton.make_automaton()
+            self._automaton = automaton
+
+    def mask(self, text: str) -> str:
+        if not text or not self.values:
+            return text
+
+        if self._automaton is None:
+            for value in self.values:
+                text = text.replace(value, self.replacements[value])
+            return text
+
+        starts: Dict[str, List[int]] = {}
+        for end, value in self._automaton.iter(text):
+            starts.setdefault(value, []).append(end - len(value) + 1)
+        if not starts:
+            return text
+
+        # longest values take their places first, each value left to right
+        covered = bytearray(len(text))
+        found: List[Tuple[int, str]] = []
+        for value in self.values:
+            length = len(value)
+            for start in sorted(starts.get(value, ())):
+                if covered.find(1, start, start + length) == -1:
+                    covered[start : start + length] = b"\x01" * length
+                    found.append((start, value))
+
+        parts: List[str] = []
+        pos = 0
+        for start, value in sorted(found):
+            parts.append(text[pos:start])
+            parts.append(self.replacements[value])
+            pos = start + len(value)
+        parts.append(text[pos:])
+        return "".join(parts)
+
+    def prefixes(self, min_length: int) -> Set[str]:
+        """All prefixes of secret values at least min_length long, for streaming carry-over."""
+        prefixes = self._prefixes.get(min_length)
+        if prefixes is None:
+            prefixes = {
+                value[:i]
+                for value in self.values
+                for i in range(min_length, len(value) + 1)
+            }
+            self._prefixes[min_length] = prefixes
+        return prefixes
+
+
 class StreamingSecretsFilter:
     """Stateful streaming filter that masks secrets on the fly.
 
     - Replaces full secret values with placeholders §§secret(KEY) when detected.
     - Holds the longest suffix of the current buffer that matches any secret prefix
-      (with minimum trigger length of 3) to avoid leaking partial secrets across chunks.
-    - On finalize(), any unresolved partial is masked with '***'.
+      to avoid leaking partial secrets across chunks.
+    - On finalize(), an unresolved partial of at least min_trigger (3) characters is masked with '***'.
     """
 
-    def __init__(self, key_to_value: Dict[str, str], min_trigger: int = 3):
+    def __init__(
+        self,
+        key_to_value: Dict[str, str],
+        min_trigger: int = 3,
+        masker: Optional[SecretsMasker] = None,
+    ):
         self.min_trigger = max(1, int(min_trigger))
-        # Map value -> key for placeholder construction
-        self.value_to_key: Dict[str, str] = {
-            v: k for k, v in key_to_value.items() if isinstance(v, str) and v
-        }
-        # Only keep non-empty values
-        self.secret_values: List[str] = [v for v in self.value_to_key.keys() if v]
-        # Precompute all prefixes for quick suffix matching
-        self.prefixes: Set[str] = set()
-        for v in self.secret_values:
-            for i in range(self.min_trigger, len(v) + 1):
-                self.prefixes.add(v[:i])
-        self.max_len: int = max((len(v) for v in self.secret_values), default=0)
-
-        # Internal buffer of pending text that is not safe to flush yet
+        # Shared compiled masker, SecretsManager passes the one cached for the current secrets
+        self.masker = masker or SecretsMasker(key_to_value)
+        # Prefixes for quick suffix matching, computed once per masker
+        # any prefix is held back, min_trigger only decides what finalize() masks
+        self.prefixes: Set[str] = self.masker.prefixes(1)
+        self.max_len: int = self.masker.max_len
+
+        # Internal buffer of pending text that is not safe to flush yet,
+        # never longer than the longest secret
         self.pending: str = ""
 
     def _replace_full_values(self, text: str) -> str:
         """Replace all full secret values with placeholders in the given text."""
-        # Sort by length desc to avoid partial overlaps
-        for val in sorted(self.secret_values, key=len, reverse=True):
-            if not val:
-                continue
-            key = self.value_to_key.get(val, "")
-            if key:
-                text = text.replace(val, alias_for_key(key))
-        return text
+        return self.masker.mask(text)
 
     def _longest_suffix_prefix(self, text: str) -> int:
         """Return length of longest suffix of text that is a known secret prefix.
-        Returns 0 if none found (or only shorter than min_trigger)."""
+        Returns 0 if none found."""
         max_check = min(len(text), self.max_len)
-        for length in range(max_check, self.min_trigger - 1, -1):
+        for length in range(max_check, 0, -1):
             suffix = text[-length:]
             if suffix in self.prefixes:
                 return length
@@ -108,18 +184,20 @@ class StreamingSecretsFilter:
     def finalize(self) -> str:
         """Flush any remaining buffered text. If pending contains an unresolved partial
         (i.e., a prefix of a secret >= min_trigger), mask it with *** to avoid leaks."""
+        result = self.preview()
+        self.pending = ""
+        return result
+
+    def preview(self) -> str:
+        """Text finalize() would flush now, without ending the stream."""
         if not self.pending:
             return ""
 
         hold_len = self._longest_suffix_prefix(self.pending)
-        if hold_len > 0:
-            safe = self.pending[:-hold_len]
+        if hold_len >= self.min_trigger:
             # Mask unresolved partial
-            result = safe + "***"
-        else:
-            result = self.pending
-        self.pending = ""
-        return result
+            return self.pending[:-hold_len] + "***"
+        return self.pending
 
 
 class SecretsManager:
@@ -129,6 +207,7 @@ class SecretsManager:
     _instances: Dict[Tuple[str, ...], "SecretsManager"] = {}
     _secrets_cache: Optional[Dict[str, str]] = None
     _last_raw_text: Optional[str] = None
+    _version: int = 0  # bumped when any secrets file is saved
 
     @classmethod
     def get_instance(cls, *secrets_files: str) -> "SecretsManager":
@@ -146,6 +225,8 @@ class SecretsManager:
         self._raw_snapshots: Dict[str, str] = {}
         self._secrets_cache = None
         self._last_raw_text = None
+        # (min_length, placeholder) -> (secrets the masker was built from, masker)
+        self._maskers: Dict[Tuple[int, str], Tuple[Dict[str, str], SecretsMasker]] = {}
 
     def read_secrets_raw(self) -> str:
         """Read raw secrets file content from local filesystem (same system)."""
@@ -256,7 +337,23 @@ class SecretsManager:
 
     def create_streaming_filter(self) -> "StreamingSecretsFilter":
         """Create a streaming-aware secrets filter snapshotting current secret values."""
-        return StreamingSecretsFilter(self.load_secrets())
+        with self._lock:
+            return StreamingSecretsFilter(
+                self.load_secrets(), masker=self.get_masker(min_length=1)
+            )
+
+    def get_masker(
+        self, min_length: int = 4, placeholder: str = "§§secret({key})"
+    ) -> SecretsMasker:
+        """Compiled masker for the current secrets, rebuilt when the secrets change."""
+        with self._lock:
+            secrets = self.load_secrets()
+            cached = self._maskers.get((min_length, placeholder))
+            if cached and cached[0] is secrets:
+                return cached[1]
+            masker = SecretsMasker(secrets, min_length, placeholder)
+            self._maskers[(min_length, placeholder)] = (secrets, masker)
+            return masker
 
     def replace_placeholders(self, text: str) -> str:
         """Replace secret placeholders with actual values"""
@@ -301,18 +398,7 @@ class SecretsManager:
         """Replace actual secret values with placeholders in text"""
         if not text:
             return text
-
-        secrets = self.load_secrets()
-        result = text
-
-        # Sort by length (longest first) to avoid partial replacements
-        for key, value in sorted(
-            secrets.items(), key=lambda x: len(x[1]), reverse=True
-        ):
-            if value and len(value.strip()) >= min_length:
-                result = result.replace(value, alias_for_key(key, placeholder))
-
-        return result
+        return self.get_masker(min_length, placeholder).mask(text)
 
     def get_masked_secrets(self) -> str:
         """Get content with values masked for frontend display (preserves comments and unrecognized lines)"""
@@ -351,12 +437,18 @@ class SecretsManager:
             self._secrets_cache = None
             self._raw_snapshots = {}
             self._last_raw_text = None
+            self._maskers = {}
 
     @classmethod
     def _invalidate_all_caches(cls):
+        SecretsManager._version += 1
         for instance in cls._instances.values():
             instance.clear_cache()
 
+    @classmethod
+    def get_version(cls) -> int:
+        return SecretsManager._version
+
     # ---------------- Internal helpers for parsing/merging ----------------
 
     def parse_env_lines(self, content: str) -> List[EnvLine]:
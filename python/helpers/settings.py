@@ -4,6 +4,9 @@ import json
 import os
 import re
 import subprocess
+import threading
+import time
+from copy import deepcopy
 from typing import Any, Literal, TypedDict, cast, TypeVar
 
 import models
@@ -11,7 +14,7 @@ from python.helpers import runtime, whisper, defer, git
 from . import files, dotenv
 from python.helpers.print_style import PrintStyle
 from python.helpers.providers import get_providers, FieldOption as ProvidersFO
-from python.helpers.secrets import get_default_secrets_manager
+from python.helpers.secrets import get_default_secrets_manager, SecretsManager, DEFAULT_SECRETS_FILE
 from python.helpers import dirty_json
 from python.helpers.notification import NotificationManager, NotificationType, NotificationPriority
 
@@ -221,9 +224,19 @@ PASSWORD_PLACEHOLDER = "****PSWD****"
 API_KEY_PLACEHOLDER = "************"
 
 SETTINGS_FILE = files.get_abs_path("usr/settings.json")
+FILE_CHECK_INTERVAL = 1.0  # seconds between checks of .env and secrets files for external edits
 _settings: Settings | None = None
 _runtime_settings_snapshot: Settings | None = None
 
+# normalized settings with sensitive values, shared by all readers until something they depend on changes
+_snapshot: Settings | None = None
+_snapshot_key: tuple | None = None
+_snapshot_lock = threading.Lock()
+_version = 0  # bumped by set_settings and reload_settings
+_file_stamps: tuple = ()
+_file_stamps_checked = 0.0
+_cache_stats = {"hits": 0, "loads": 0}
+
 OptionT = TypeVar("OptionT", bound=FieldOption)
 
 def _ensure_option_present(options: list[OptionT] | None, current_value: str | None) -> list[OptionT]:
@@ -241,6 +254,7 @@ def _ensure_option_present(options: list[OptionT] | None, current_value: str | N
     return opts
 
 def convert_out(settings: Settings) -> SettingsOutput:
+    settings = cast(Settings, settings.copy())
     out = SettingsOutput(
         settings = settings.copy(),
         additional = SettingsOutputAdditional(
@@ -340,7 +354,7 @@ def _get_api_key_field(settings: Settings, provider: str, title: str) -> Setting
 
 
 def convert_in(settings: Settings) -> Settings:
-    current = get_settings()
+    current = cast(Settings, get_settings().copy())
 
     for key, value in settings.items():
         # Special handling for browser_http_headers and *_kwargs (stored as .env text)
@@ -352,20 +366,101 @@ def convert_in(settings: Settings) -> Settings:
     return current
 
 
+class _ReadOnlyDict(dict):
+    """Settings snapshot shared by all readers, copy() returns a mutable (deep) copy."""
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError("Settings snapshot is read-only, use copy() to modify it")
+
+    __setitem__ = __delitem__ = __ior__ = _read_only  # type: ignore
+    update = pop = popitem = setdefault = clear = _read_only  # type: ignore
+
+    def copy(self) -> dict:  # type: ignore
+        return {
+            key: value.copy() if isinstance(value, _ReadOnlyDict) else value
+            for key, value in self.items()
+        }
+
+    def __deepcopy__(self, memo):
+        return deepcopy(self.copy(), memo)
+
+    def __reduce__(self):
+        return (dict, (self.copy(),))
+
+
+def _freeze(settings: dict) -> Settings:
+    return cast(
+        Settings,
+        _ReadOnlyDict(
+            (key, _freeze(value) if isinstance(value, dict) else value)
+            for key, value in settings.items()
+        ),
+    )
+
+
+def _file_stamp(path: str) -> tuple[int, int] | None:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _current_key(check_files: bool = False) -> tuple:
+    # what the snapshot depends on, files are checked at most once per FILE_CHECK_INTERVAL
+    global _file_stamps, _file_stamps_checked
+    now = time.monotonic()
+    if check_files or now - _file_stamps_checked >= FILE_CHECK_INTERVAL:
+        _file_stamps_checked = now
+        _file_stamps = (
+            _file_stamp(dotenv.get_dotenv_file_path()),
+            _file_stamp(files.get_abs_path(DEFAULT_SECRETS_FILE)),
+        )
+    return (_version, dotenv.get_version(), SecretsManager.get_version(), _file_stamps)
+
+
 def get_settings() -> Settings:
-    global _settings
-    if not _settings:
-        _settings = _read_settings_file()
-    if not _settings:
-        _settings = get_default_settings()
-    norm = normalize_settings(_settings)
-    _load_sensitive_settings(norm)
-    return norm
+    """Current settings, a read-only snapshot recomputed only after a change."""
+    global _settings, _snapshot, _snapshot_key
+    snapshot = _snapshot
+    if snapshot is not None and _snapshot_key == _current_key():
+        _cache_stats["hits"] += 1
+        return snapshot
+
+    with _snapshot_lock:
+        key = _current_key()
+        if _snapshot is not None and _snapshot_key == key:
+            return _snapshot
+        if _snapshot_key is not None and key[3] != _snapshot_key[3]:
+            # .env edited outside of this process
+            dotenv.load_dotenv()
+            key = _current_key()
+        if not _settings:
+            _settings = _read_settings_file()
+        if not _settings:
+            _settings = get_default_settings()
+        norm = normalize_settings(_settings)
+        _load_sensitive_settings(norm)
+        # loading may write .env itself (persistent runtime id)
+        _snapshot, _snapshot_key = _freeze(norm), _current_key(check_files=True)
+        _cache_stats["loads"] += 1
+        return _snapshot
+
+
+def get_settings_version() -> tuple:
+    """Changes whenever get_settings() would return a different snapshot."""
+    get_settings()
+    return cast(tuple, _snapshot_key)
+
+
+def get_cache_stats() -> dict[str, int]:
+    return dict(_cache_stats)
 
 
 def reload_settings() -> Settings:
-    global _settings
+    global _settings, _version
     _settings = None
+    _version += 1
     return get_settings()
 
 
@@ -375,9 +470,10 @@ def set_runtime_settings_snapshot(settings: Settings) -> None:
 
 
 def set_settings(settings: Settings, apply: bool = True):
-    global _settings
+    global _settings, _version
     previous = _settings
     _settings = normalize_settings(settings)
+    _version += 1  # applying reads the new settings already
     _write_settings_file(_settings)
     if apply:
         _apply_settings(previous)
@@ -6,11 +6,12 @@ import sys
 from typing import Optional, Tuple
 from python.helpers import tty_session, runtime
 from python.helpers.shell_ssh import clean_string
+from python.helpers.terminal_output import TerminalOutput
 
 class LocalInteractiveSession:
     def __init__(self, cwd: str|None = None):
         self.session: tty_session.TTYSession|None = None
-        self.full_output = ''
+        self.output = TerminalOutput()
         self.cwd = cwd
 
     async def connect(self):
@@ -26,7 +27,7 @@ class LocalInteractiveSession:
     async def send_command(self, command: str):
         if not self.session:
             raise Exception("Shell not connected")
-        self.full_output = ""
+        self.output.reset()
         await self.session.sendline(command)
  
     async def read_output(self, timeout: float = 0, reset_full_output: bool = False) -> Tuple[str, Optional[str]]:
@@ -34,16 +35,26 @@ class LocalInteractiveSession:
             raise Exception("Shell not connected")
 
         if reset_full_output:
-            self.full_output = ""
+            self.output.reset()
 
         # get output from terminal
         partial_output = await self.session.read_full_until_idle(idle_timeout=0.01, total_timeout=timeout)
-        self.full_output += partial_output
+        self.output.feed(partial_output)
 
         # clean output
         partial_output = clean_string(partial_output)
-        clean_full_output = clean_string(self.full_output)
+        clean_full_output = self.output.text()
 
         if not partial_output:
             return clean_full_output, None
-        return clean_full_output, partial_output
\ No newline at end of file
+        return clean_full_output, partial_output
+
+    async def read_new_output(self, timeout: float) -> str | None:
+        """Wait up to timeout for output and add it to self.output, returns the new text or None."""
+        if not self.session:
+            raise Exception("Shell not connected")
+        chunk = await self.session.read(timeout=timeout)
+        if chunk is None:
+            return None
+        # take everything else the pump has queued meanwhile
+        return self.output.feed(chunk + self.session.read_nowait())
\ No newline at end of file
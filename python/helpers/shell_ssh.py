@@ -1,10 +1,12 @@
 import asyncio
+import codecs
 import paramiko
 import time
 import re
 from typing import Tuple
 from python.helpers.log import Log
 from python.helpers.print_style import PrintStyle
+from python.helpers.terminal_output import TerminalOutput
 # from python.helpers.strings import calculate_valid_match_lengths
 
 
@@ -24,7 +26,8 @@ class SSHInteractiveSession:
         self.client = paramiko.SSHClient()
         self.client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
         self.shell = None
-        self.full_output = b""
+        self.output = TerminalOutput()
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
         self.last_command = b""
         self.trimmed_command_length = 0  # Initialize trimmed_command_length
         self.cwd = cwd
@@ -96,7 +99,7 @@ class SSHInteractiveSession:
     async def send_command(self, command: str):
         if not self.shell:
             raise Exception("Shell not connected")
-        self.full_output = b""
+        self.output.reset()
         # if len(command) > 10: # if command is long, add end_comment to split output
         #     command = (command + " \\\n" +SSHInteractiveSession.end_comment + "\n")
         # else:
@@ -112,7 +115,7 @@ class SSHInteractiveSession:
             raise Exception("Shell not connected")
 
         if reset_full_output:
-            self.full_output = b""
+            self.output.reset()
         partial_output = b""
         leftover = b""
         start_time = time.time()
@@ -152,17 +155,29 @@ class SSHInteractiveSession:
             #         self.trimmed_command_length += trim_com
 
             partial_output += data
-            self.full_output += data
             await asyncio.sleep(0.1)  # Prevent busy waiting
 
         # Decode once at the end
-        decoded_partial_output = partial_output.decode("utf-8", errors="replace")
-        decoded_full_output = self.full_output.decode("utf-8", errors="replace")
-
+        decoded_partial_output = self._decoder.decode(partial_output)
+        self.output.feed(decoded_partial_output)
         decoded_partial_output = clean_string(decoded_partial_output)
-        decoded_full_output = clean_string(decoded_full_output)
 
-        return decoded_full_output, decoded_partial_output
+        return self.output.text(), decoded_partial_output
+
+    async def read_new_output(self, timeout: float) -> str | None:
+        """Wait up to timeout for output and add it to self.output, returns the new text or None.
+        paramiko channels cannot be awaited, readiness is polled."""
+        if not self.shell:
+            raise Exception("Shell not connected")
+        deadline = time.time() + timeout
+        while not self.shell.recv_ready():
+            if time.time() >= deadline:
+                return None
+            await asyncio.sleep(0.02)
+        data = b""
+        while self.shell.recv_ready():
+            data += self.receive_bytes(65536)
+        return self.output.feed(self._decoder.decode(data))
 
     def receive_bytes(self, num_bytes=1024):
         if not self.shell:
@@ -13,6 +13,7 @@ from python.helpers.state_snapshot import (
     StateRequestV1,
     advance_state_request_after_snapshot,
     build_snapshot_from_request,
+    diff_snapshot,
 )
 from python.helpers.websocket import ConnectionNotFoundError
 
@@ -48,6 +49,9 @@ class ConnectionProjection:
     # Development-only diagnostics - last known cause of the most recent dirty wave.
     dirty_reason: str | None = None
     dirty_wave_id: str | None = None
+    # Contexts and tasks (by id) contained in the last push, later pushes only send what changed.
+    # None until the first push after a state_request, which is always a full snapshot.
+    sent_lists: tuple[dict[str, Any], dict[str, Any]] | None = None
     created_at: float = field(default_factory=time.time)
 
 
@@ -126,6 +130,15 @@ class StateMonitor:
         for namespace, sid in identities:
             self.mark_dirty(namespace, sid, reason=reason, wave_id=wave_id)
 
+    def projected_contexts(self) -> set[str]:
+        """Context ids currently shown by any connection."""
+        with self._lock:
+            return {
+                projection.request.context
+                for projection in self._projections.values()
+                if projection.request is not None and projection.request.context
+            }
+
     def update_projection(
         self,
         namespace: str,
@@ -142,6 +155,7 @@ class StateMonitor:
             projection.request = request
             projection.seq_base = seq_base
             projection.seq = seq_base
+            projection.sent_lists = None
         _debug_log(
             f"[StateMonitor] update_projection namespace={namespace} sid={sid} context={request.context!r} "
             f"log_from={request.log_from} notifications_from={request.notifications_from} "
@@ -276,9 +290,15 @@ class StateMonitor:
                     return
 
                 # INVARIANT.STATE.SEQ_MONOTONIC + SEQ_RESET_ON_REQUEST
+                base_seq = projection.seq
                 projection.seq += 1
                 seq = projection.seq
 
+                # Contexts/tasks diff against the previous push of this sid (full on the first one).
+                outgoing, delta, projection.sent_lists = diff_snapshot(
+                    snapshot, projection.sent_lists
+                )
+
                 # Advance cursors after successful snapshot emission (incremental mode).
                 projection.request = advance_state_request_after_snapshot(request, snapshot)
 
@@ -286,11 +306,14 @@ class StateMonitor:
                 # arrived while building/emitting, a follow-up push will be scheduled.
                 projection.pushed_version = max(projection.pushed_version, base_version)
 
-            payload = {
+            payload: dict[str, Any] = {
                 "runtime_epoch": runtime.get_runtime_id(),
                 "seq": seq,
-                "snapshot": snapshot,
+                "snapshot": outgoing,
             }
+            if delta is not None:
+                # snapshot.contexts/tasks only hold added or changed entries, relative to push base_seq
+                payload["delta"] = {**delta, "base_seq": base_seq}
 
             try:
                 logs_len = (
@@ -300,7 +323,7 @@ class StateMonitor:
                 )
                 _debug_log(
                     f"[StateMonitor] emit state_push namespace={namespace} sid={sid} seq={seq} "
-                    f"context={request.context!r} logs_len={logs_len} "
+                    f"context={request.context!r} logs_len={logs_len} delta={delta is not None} "
                     f"reason={dirty_reason!r} wave={dirty_wave_id!r}"
                 )
                 await manager.emit_to(
@@ -11,3 +11,9 @@ def mark_dirty_for_context(context_id: str, *, reason: str | None = None) -> Non
     from python.helpers.state_monitor import get_state_monitor
 
     get_state_monitor().mark_dirty_for_context(context_id, reason=reason)
+
+
+def projected_contexts() -> set[str]:
+    from python.helpers.state_monitor import get_state_monitor
+
+    return get_state_monitor().projected_contexts()
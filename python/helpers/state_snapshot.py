@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import threading
 import types
 from typing import Any, Mapping, TypedDict, Union, get_args, get_origin, get_type_hints
 
@@ -9,6 +10,8 @@ import pytz  # type: ignore[import-untyped]
 
 from agent import AgentContext, AgentContextType
 
+from python.helpers import chat_index
+from python.helpers.chat_index import ChatIndexEntry
 from python.helpers.dotenv import get_dotenv_value
 from python.helpers.localization import Localization
 from python.helpers.task_scheduler import TaskScheduler
@@ -211,6 +214,127 @@ def advance_state_request_after_snapshot(
     )
 
 
+# Serialized sidebar entries shared by all connections and polls.
+# (context id, timezone) -> (output key, entry); timezone -> (version vector, contexts, tasks)
+_entries_lock = threading.Lock()
+_entries_cache: dict[tuple[str, str], tuple[tuple, dict[str, Any]]] = {}
+_lists_cache: dict[str, tuple[tuple, list[dict[str, Any]], list[dict[str, Any]]]] = {}
+
+
+def _task_key(task: Any) -> tuple | None:
+    if task is None:
+        return None
+    return (id(task), task.updated_at, task.state, task.last_run, task.last_result)
+
+
+def _context_entry(
+    ctx: AgentContext | ChatIndexEntry, task: Any, scheduler: TaskScheduler
+) -> dict[str, Any]:
+    context_data = ctx.output()
+    if task is None:
+        return context_data
+
+    task_details = scheduler.serialize_task(ctx.id)
+    if task_details:
+        context_data.update(
+            {
+                "task_name": task_details.get("name"),
+                "uuid": task_details.get("uuid"),
+                "state": task_details.get("state"),
+                "type": task_details.get("type"),
+                "system_prompt": task_details.get("system_prompt"),
+                "prompt": task_details.get("prompt"),
+                "last_run": task_details.get("last_run"),
+                "last_result": task_details.get("last_result"),
+                "attachments": task_details.get("attachments", []),
+                "context_id": task_details.get("context_id"),
+            }
+        )
+
+        if task_details.get("type") == "scheduled":
+            context_data["schedule"] = task_details.get("schedule")
+        elif task_details.get("type") == "planned":
+            context_data["plan"] = task_details.get("plan")
+        else:
+            context_data["token"] = task_details.get("token")
+    return context_data
+
+
+def _context_lists(timezone: str) -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
+    """Contexts and tasks lists, an entry is serialized again only when its context or task changes.
+    Unchanged entries are the same objects across snapshots, which diff_snapshot relies on."""
+    scheduler = TaskScheduler.get()
+
+    keyed: dict[str, tuple[AgentContext | ChatIndexEntry, Any, tuple]] = {}
+    for ctx in AgentContext.all():
+        if ctx.id in keyed or ctx.type == AgentContextType.BACKGROUND:
+            continue
+        task = scheduler.get_task_by_uuid(ctx.id)
+        if task is not None and task.context_id != ctx.id:
+            task = None
+        keyed[ctx.id] = (ctx, task, (ctx.output_key(), _task_key(task)))
+    # chats not loaded yet are listed from their index entries
+    for entry in chat_index.entries():
+        if entry.id in keyed:
+            continue
+        task = scheduler.get_task_by_uuid(entry.id)
+        if task is not None and task.context_id != entry.id:
+            task = None
+        keyed[entry.id] = (entry, task, (entry, _task_key(task)))
+    vector = tuple((ctxid, key) for ctxid, (_, _, key) in keyed.items())
+
+    with _entries_lock:
+        cached = _lists_cache.get(timezone)
+        if cached and cached[0] == vector:
+            return list(cached[1]), list(cached[2])
+
+        ctxs: list[dict[str, Any]] = []
+        tasks: list[dict[str, Any]] = []
+        for ctxid, (ctx, task, key) in keyed.items():
+            cached_entry = _entries_cache.get((ctxid, timezone))
+            if cached_entry and cached_entry[0] == key:
+                entry = cached_entry[1]
+            else:
+                entry = _context_entry(ctx, task, scheduler)
+                _entries_cache[(ctxid, timezone)] = (key, entry)
+            (tasks if task is not None else ctxs).append(entry)
+
+        for cache_key in [k for k in _entries_cache if k[0] not in keyed]:
+            del _entries_cache[cache_key]
+
+        ctxs.sort(key=lambda x: x["created_at"], reverse=True)
+        tasks.sort(key=lambda x: x["created_at"], reverse=True)
+        _lists_cache[timezone] = (vector, ctxs, tasks)
+        return list(ctxs), list(tasks)
+
+
+def diff_snapshot(
+    snapshot: Mapping[str, Any],
+    sent: tuple[dict[str, Any], dict[str, Any]] | None,
+) -> tuple[dict[str, Any], dict[str, Any] | None, tuple[dict[str, Any], dict[str, Any]]]:
+    """Reduce contexts and tasks of a snapshot to entries added or changed since the previous push.
+
+    sent is what the previous push contained (None sends the full snapshot).
+    Returns the snapshot to send, the delta description (None when full) and the new sent state.
+    """
+    current = (
+        {entry.get("id"): entry for entry in snapshot.get("contexts", [])},
+        {entry.get("id"): entry for entry in snapshot.get("tasks", [])},
+    )
+    if sent is None:
+        return dict(snapshot), None, current
+
+    out = dict(snapshot)
+    delta: dict[str, Any] = {}
+    for name, previous, now in (
+        ("contexts", sent[0], current[0]),
+        ("tasks", sent[1], current[1]),
+    ):
+        out[name] = [entry for id, entry in now.items() if previous.get(id) is not entry]
+        delta[f"{name}_removed"] = [id for id in previous if id not in now]
+    return out, delta, current
+
+
 async def build_snapshot_from_request(*, request: StateRequestV1) -> SnapshotV1:
     """Build a poll-shaped snapshot for both /poll and state_push."""
 
@@ -229,59 +353,7 @@ async def build_snapshot_from_request(*, request: StateRequestV1) -> SnapshotV1:
     notification_manager = AgentContext.get_notification_manager()
     notifications = notification_manager.output(start=notifications_from_no)
 
-    scheduler = TaskScheduler.get()
-
-    ctxs: list[dict[str, Any]] = []
-    tasks: list[dict[str, Any]] = []
-    processed_contexts: set[str] = set()
-
-    all_ctxs = AgentContext.all()
-    for ctx in all_ctxs:
-        if ctx.id in processed_contexts:
-            continue
-
-        if ctx.type == AgentContextType.BACKGROUND:
-            processed_contexts.add(ctx.id)
-            continue
-
-        context_data = ctx.output()
-
-        context_task = scheduler.get_task_by_uuid(ctx.id)
-        is_task_context = context_task is not None and context_task.context_id == ctx.id
-
-        if not is_task_context:
-            ctxs.append(context_data)
-        else:
-            task_details = scheduler.serialize_task(ctx.id)
-            if task_details:
-                context_data.update(
-                    {
-                        "task_name": task_details.get("name"),
-                        "uuid": task_details.get("uuid"),
-                        "state": task_details.get("state"),
-                        "type": task_details.get("type"),
-                        "system_prompt": task_details.get("system_prompt"),
-                        "prompt": task_details.get("prompt"),
-                        "last_run": task_details.get("last_run"),
-                        "last_result": task_details.get("last_result"),
-                        "attachments": task_details.get("attachments", []),
-                        "context_id": task_details.get("context_id"),
-                    }
-                )
-
-                if task_details.get("type") == "scheduled":
-                    context_data["schedule"] = task_details.get("schedule")
-                elif task_details.get("type") == "planned":
-                    context_data["plan"] = task_details.get("plan")
-                else:
-                    context_data["token"] = task_details.get("token")
-
-            tasks.append(context_data)
-
-        processed_contexts.add(ctx.id)
-
-    ctxs.sort(key=lambda x: x["created_at"], reverse=True)
-    tasks.sort(key=lambda x: x["created_at"], reverse=True)
+    ctxs, tasks = _context_lists(request.timezone)
 
     snapshot: SnapshotV1 = {
         "deselect_chat": bool(ctxid) and active_context is None,
@@ -290,7 +362,7 @@ async def build_snapshot_from_request(*, request: StateRequestV1) -> SnapshotV1:
         "tasks": tasks,
         "logs": logs,
         "log_guid": active_context.log.guid if active_context else "",
-        "log_version": len(active_context.log.updates) if active_context else 0,
+        "log_version": active_context.log.version if active_context else 0,
         "log_progress": active_context.log.progress if active_context else 0,
         "log_progress_active": bool(active_context.log.progress_active) if active_context else False,
         "paused": active_context.paused if active_context else False,
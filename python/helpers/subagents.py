@@ -323,7 +323,7 @@ def get_paths(
             project_agent_dir = projects.get_project_meta_folder(
                 project_name, "agents", profile_name
             )
-            if files.exists(files.get_abs_path(project_agent_dir, *check_subpaths)):
+            if (not must_exist_completely) or files.exists(files.get_abs_path(project_agent_dir, *check_subpaths)):
                 paths.append(files.get_abs_path(project_agent_dir, *subpaths))
 
         if project_name:
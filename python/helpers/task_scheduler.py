@@ -1,8 +1,10 @@
 import asyncio
+import atexit
 from datetime import datetime, timezone, timedelta
 import os
 import random
 import threading
+import time
 from urllib.parse import urlparse
 import uuid
 from enum import Enum
@@ -22,11 +24,14 @@ from python.helpers.print_style import PrintStyle
 from python.helpers.defer import DeferredTask
 from python.helpers.files import get_abs_path, make_dirs, read_file, write_file
 from python.helpers.localization import Localization
+from python.helpers.timer_heap import TimerHeap
 from python.helpers import projects, guids
 import pytz
 from typing import Annotated
 
 SCHEDULER_FOLDER = "usr/scheduler"
+SAVE_DELAY = 0.5  # seconds, saves within this window are written to tasks.json once
+STARTUP_GRACE = 60  # seconds, scheduled fires missed by this much before start still run
 
 # ----------------------
 # Task Models
@@ -184,6 +189,13 @@ class BaseTask(BaseModel):
     def get_next_run(self) -> datetime | None:
         return None
 
+    def get_timer_key(self) -> Any:
+        # the next fire is computed again only when this changes, None for tasks without a schedule
+        return None
+
+    def get_next_fire(self, after: datetime) -> datetime | None:
+        return None
+
     def is_dedicated(self) -> bool:
         return self.context_id == self.uuid
 
@@ -366,6 +378,22 @@ class ScheduledTask(BaseTask):
             crontab = CronTab(crontab=self.schedule.to_crontab())  # type: ignore
             return crontab.next(now=datetime.now(timezone.utc), return_datetime=True)  # type: ignore
 
+    def get_timer_key(self) -> Any:
+        return ("cron", self.schedule.to_crontab(), self.schedule.timezone)
+
+    def get_next_fire(self, after: datetime) -> datetime | None:
+        with self._lock:
+            crontab = CronTab(crontab=self.schedule.to_crontab())  # type: ignore
+            task_timezone = pytz.timezone(self.schedule.timezone or Localization.get().get_timezone())
+            # seconds from after to the first matching time strictly after it
+            next_run_seconds: Optional[float] = crontab.next(  # type: ignore
+                now=after.astimezone(task_timezone),
+                return_datetime=False
+            )  # type: ignore
+            if next_run_seconds is None:
+                return None
+            return after + timedelta(seconds=next_run_seconds)
+
 
 class PlannedTask(BaseTask):
     type: Literal[TaskType.PLANNED] = TaskType.PLANNED
@@ -422,6 +450,15 @@ class PlannedTask(BaseTask):
         with self._lock:
             return self.plan.get_next_launch_time()
 
+    def get_timer_key(self) -> Any:
+        # state included so a launch skipped while the task was busy is armed again once idle
+        return ("plan", self.plan.get_next_launch_time(), self.state)
+
+    def get_next_fire(self, after: datetime) -> datetime | None:
+        # planned launches are never skipped, one already past fires right away
+        with self._lock:
+            return self.plan.get_next_launch_time()
+
     async def on_run(self):
         with self._lock:
             # Get the next launch time and set it as in_progress
@@ -459,6 +496,14 @@ class PlannedTask(BaseTask):
         await super().on_error(error)
 
 
+def _file_stamp(path: str) -> tuple[int, int] | None:
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
 class SchedulerTaskList(BaseModel):
     tasks: list[Annotated[Union[ScheduledTask, AdHocTask, PlannedTask], Field(discriminator="type")]] = Field(default_factory=list)
     # Singleton instance
@@ -472,26 +517,49 @@ class SchedulerTaskList(BaseModel):
         if cls.__instance is None:
             if not exists(path):
                 make_dirs(path)
-                cls.__instance = asyncio.run(cls(tasks=[]).save())
+                instance = cls(tasks=[])
+                instance._dirty = True
+                instance.flush()
             else:
-                cls.__instance = cls.model_validate_json(read_file(path))
+                instance = cls()
+                instance._reload()
+            atexit.register(instance.flush)
+            cls.__instance = instance
         else:
-            asyncio.run(cls.__instance.reload())
+            cls.__instance._reload()
         return cls.__instance
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self._lock = threading.RLock()
+        self._stamp: tuple[int, int] | None = None  # (mtime, size) of tasks.json when last read or written
+        self._dirty = False
+        self._flush_timer: threading.Timer | None = None
+        self._timers = TimerHeap()  # task uuid -> next fire timestamp
+        self._timer_keys: dict[str, Any] = {}  # task uuid -> get_timer_key() its timer was computed for
+        self._fired: dict[str, float] = {}  # task uuid -> last fire dispatched, never dispatched twice
+        self._synced = False
+        self._wakeup: tuple[asyncio.AbstractEventLoop, asyncio.Event] | None = None
 
     async def reload(self) -> "SchedulerTaskList":
-        path = get_abs_path(SCHEDULER_FOLDER, "tasks.json")
-        if exists(path):
-            with self._lock:
-                data = self.__class__.model_validate_json(read_file(path))
-                self.tasks.clear()
-                self.tasks.extend(data.tasks)
+        self._reload()
         return self
 
+    def _reload(self):
+        # re-read tasks.json only when changed by someone else, unsaved changes of our own win
+        path = get_abs_path(SCHEDULER_FOLDER, "tasks.json")
+        with self._lock:
+            if self._dirty:
+                return
+            stamp = _file_stamp(path)
+            if stamp is None or stamp == self._stamp:
+                return
+            data = self.__class__.model_validate_json(read_file(path))
+            self.tasks.clear()
+            self.tasks.extend(data.tasks)
+            self._stamp = stamp
+            self._sync_timers(startup=not self._synced)
+
     async def add_task(self, task: Union[ScheduledTask, AdHocTask, PlannedTask]) -> "SchedulerTaskList":
         with self._lock:
             self.tasks.append(task)
@@ -499,6 +567,7 @@ class SchedulerTaskList(BaseModel):
         return self
 
     async def save(self) -> "SchedulerTaskList":
+        """Apply changes to the timers and write tasks.json shortly after, coalescing saves in between."""
         with self._lock:
             # Debug: check for AdHocTasks with null tokens before saving
             for task in self.tasks:
@@ -513,6 +582,23 @@ class SchedulerTaskList(BaseModel):
                             f"Fixed: Generated new token '{task.token}' for task {task.name}"
                         )
 
+            self._sync_timers()
+            self._dirty = True
+            if self._flush_timer is None:
+                self._flush_timer = threading.Timer(SAVE_DELAY, self.flush)
+                self._flush_timer.daemon = True
+                self._flush_timer.start()
+        return self
+
+    def flush(self):
+        """Write pending changes to tasks.json now."""
+        with self._lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            if not self._dirty:
+                return
+
             path = get_abs_path(SCHEDULER_FOLDER, "tasks.json")
             if not exists(path):
                 make_dirs(path)
@@ -526,17 +612,84 @@ class SchedulerTaskList(BaseModel):
                     "ERROR: Found null token in JSON output for an adhoc task"
                 )
 
-            write_file(path, json_data)
+            # atomic replace, readers never see a partial file
+            tmp = path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(json_data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, path)
+            self._stamp = _file_stamp(path)
+            self._dirty = False
+
+    def _sync_timers(self, startup: bool = False):
+        # (re)compute the next fire of tasks whose schedule changed, drop timers of removed tasks
+        now = datetime.now(timezone.utc)
+        # tasks loaded at start still run fires missed within the grace period (unless run since)
+        after = now - timedelta(seconds=STARTUP_GRACE) if startup else now
+        self._synced = True
+        changed = False
+        current = set()
+        for task in self.tasks:
+            current.add(task.uuid)
+            key = task.get_timer_key()
+            if task.uuid in self._timer_keys and self._timer_keys[task.uuid] == key:
+                continue
+            self._timer_keys[task.uuid] = key
+            last_run = task.last_run
+            if last_run and last_run.tzinfo is None:
+                last_run = last_run.replace(tzinfo=timezone.utc)
+            start = max(after, last_run) if last_run else after
+            changed |= self._schedule_next(task, start)
+        for task_uuid in list(self._timer_keys):
+            if task_uuid not in current:
+                del self._timer_keys[task_uuid]
+                self._timers.cancel(task_uuid)
+                self._fired.pop(task_uuid, None)
+        if changed:
+            self._wake()
+
+    def _schedule_next(self, task: Union[ScheduledTask, AdHocTask, PlannedTask], after: datetime) -> bool:
+        try:
+            fire = task.get_next_fire(after)
+        except Exception as e:
+            PrintStyle.error(f"Scheduler Task '{task.name}' has an invalid schedule: {e}")
+            fire = None
+        if fire is None:
+            self._timers.cancel(task.uuid)
+            return False
+        self._timers.schedule(task.uuid, fire.timestamp())
+        return True
+
+    def _wake(self):
+        if self._wakeup is not None:
+            loop, event = self._wakeup
+            try:
+                loop.call_soon_threadsafe(event.set)
+            except RuntimeError:  # loop closed
+                self._wakeup = None
 
-            # Debug: Verify after saving
-            if exists(path):
-                loaded_json = read_file(path)
-                if '"type": "adhoc"' in loaded_json and '"token": null' in loaded_json:
-                    PrintStyle.error(
-                        "ERROR: Null token persisted in JSON file for an adhoc task"
-                    )
+    def get_next_due_time(self) -> float | None:
+        """Timestamp of the earliest scheduled fire."""
+        with self._lock:
+            return self._timers.next_time()
 
-        return self
+    async def wait_until_due(self, timeout: float):
+        """Sleep until the earliest fire, a schedule change or the timeout, whichever comes first."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            self._reload()
+            if self._wakeup is None or self._wakeup[0] is not loop:
+                self._wakeup = (loop, asyncio.Event())
+            event = self._wakeup[1]
+            event.clear()
+            next_time = self._timers.next_time()
+        if next_time is not None:
+            timeout = min(timeout, max(0.0, next_time - time.time()))
+        try:
+            await asyncio.wait_for(event.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            pass
 
     async def update_task_by_uuid(
         self,
@@ -553,8 +706,8 @@ class SchedulerTaskList(BaseModel):
         Returns the updated task or None if not found.
         """
         with self._lock:
-            # Reload to ensure we have the latest state
-            await self.reload()
+            # Pick up external changes to tasks.json
+            self._reload()
 
             # Find the task
             task = next((task for task in self.tasks if task.uuid == task_uuid and verify_func(task)), None)
@@ -581,13 +734,26 @@ class SchedulerTaskList(BaseModel):
                 and (not only_running or task.state == TaskState.RUNNING)
             ]
 
-    async def get_due_tasks(self) -> list[Union[ScheduledTask, AdHocTask, PlannedTask]]:
+    async def get_due_tasks(self, now: datetime | None = None) -> list[Union[ScheduledTask, AdHocTask, PlannedTask]]:
+        """Idle tasks with a fire due, each fire time is returned at most once."""
         with self._lock:
-            await self.reload()
-            return [
-                task for task in self.tasks
-                if task.check_schedule() and task.state == TaskState.IDLE
-            ]
+            self._reload()
+            now = now or datetime.now(timezone.utc)
+            due = []
+            for task_uuid, fire in self._timers.pop_due(now.timestamp()):
+                task = self.get_task_by_uuid(task_uuid)
+                if task is None:
+                    continue
+                if isinstance(task, ScheduledTask):
+                    # the next fire is computed from this one, a busy task skips it like before
+                    self._schedule_next(task, datetime.fromtimestamp(fire, timezone.utc))
+                if fire <= self._fired.get(task_uuid, float("-inf")):
+                    continue
+                if task.state != TaskState.IDLE:
+                    continue
+                self._fired[task_uuid] = fire
+                due.append(task)
+            return due
 
     def get_task_by_uuid(self, task_uuid: str) -> Union[ScheduledTask, AdHocTask, PlannedTask] | None:
         with self._lock:
@@ -706,6 +872,12 @@ class TaskScheduler:
         for task in await self._tasks.get_due_tasks():
             await self._run_task(task)
 
+    def get_next_due_time(self) -> float | None:
+        return self._tasks.get_next_due_time()
+
+    async def wait_until_due(self, timeout: float):
+        await self._tasks.wait_until_due(timeout)
+
     async def run_task_by_uuid(self, task_uuid: str, task_context: str | None = None):
         # First reload tasks to ensure we have the latest state
         await self._tasks.reload()
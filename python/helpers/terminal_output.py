@@ -0,0 +1,152 @@
+import re
+from collections import deque
+from typing import Callable
+
+# Terminal output cleaned incrementally as it arrives, equivalent to shell_ssh.clean_string over the whole output.
+# Only new data is cleaned, complete lines are committed once and the output is bounded:
+# beyond the limit the middle is dropped, the head and the tail are kept for truncation.
+
+_ANSI = re.compile(r"\x1B(?:[@-Z\\-_]|\[[0-?]*[ -/]*[@-~])")
+# escape sequence cut at the end of a chunk, held back until the rest arrives
+_ANSI_PARTIAL = re.compile(r"\x1B(?:\[[0-?]*[ -/]*)?$")
+# ipython \r\r\n> sequences and '> ' at the start of the output
+_START_PROMPTS = re.compile(r"^[ \r]*(?:\r*\n>[ \r]*)*")
+_START_ARROWS = re.compile(r"^(>\s*)+")
+# anything past these characters ends the start of the output
+_START_CONTENT = re.compile(r"[^\s>]")
+
+DEFAULT_LIMIT = 1_000_000
+
+
+def clean_line(line: str) -> str:
+    # carriage returns overwrite the line, keep the last non-empty part
+    parts = [part for part in line.split("\r") if part.strip()]
+    return parts[-1].rstrip() if parts else line
+
+
+def _collapse_line(line: str) -> str:
+    # drop overwritten parts of an unfinished line, clean_line renders it the same now and after more text
+    parts = line.split("\r")
+    if len(parts) <= 2:
+        return line
+    written = [part for part in parts[:-1] if part.strip()]
+    if not written:
+        return line  # a blank line is rendered as it is
+    return written[-1] + "\r" + parts[-1]
+
+
+class TerminalOutput:
+
+    def __init__(self, limit: int = DEFAULT_LIMIT):
+        self.head_size = limit // 2
+        self.tail_size = limit - self.head_size
+        self.reset()
+
+    def reset(self):
+        self._escape = ""  # incomplete escape sequence from the last chunk
+        self._started = False  # start of the output stripped
+        self._pending = ""  # text after the last complete line
+        self._head = ""
+        self._tail: deque[str] = deque()
+        self._tail_len = 0
+        self.dropped = 0  # committed characters dropped between head and tail
+
+    def feed(self, chunk: str) -> str:
+        """Add raw terminal output, returns the chunk without escape sequences."""
+        text = self._escape + chunk
+        match = _ANSI_PARTIAL.search(text)
+        self._escape = text[match.start() :] if match else ""
+        if match:
+            text = text[: match.start()]
+        text = _ANSI.sub("", text).replace("\x00", "")
+        if not text:
+            return ""
+
+        self._pending += text
+        if not self._started:
+            if not _START_CONTENT.search(self._pending):
+                return text
+            self._pending = _START_ARROWS.sub(
+                "", _START_PROMPTS.sub("", self._pending, count=1), count=1
+            ).lstrip("\r ")
+            self._started = True
+
+        end = self._pending.rfind("\n")
+        if end >= 0:
+            complete = self._pending[: end + 1].replace("\r\n", "\n")
+            self._pending = self._pending[end + 1 :]
+            self._commit(
+                "".join(clean_line(line) + "\n" for line in complete.split("\n")[:-1])
+            )
+        if "\r" in text:
+            # progress bars repaint the line without ending it
+            self._pending = _collapse_line(self._pending)
+        return text
+
+    def _commit(self, text: str):
+        if len(self._head) < self.head_size:
+            room = self.head_size - len(self._head)
+            self._head += text[:room]
+            text = text[room:]
+        if not text:
+            return
+        self._tail.append(text)
+        self._tail_len += len(text)
+        while self._tail_len > self.tail_size:
+            excess = self._tail_len - self.tail_size
+            first = self._tail[0]
+            if len(first) <= excess:
+                self._tail.popleft()
+                self._tail_len -= len(first)
+                self.dropped += len(first)
+            else:
+                self._tail[0] = first[excess:]
+                self._tail_len -= excess
+                self.dropped += excess
+
+    def _partial(self) -> str:
+        if not self._started:
+            # only whitespace and prompts so far, cleaned the same way as a complete output
+            text = _START_ARROWS.sub("", _START_PROMPTS.sub("", self._pending, count=1), count=1)
+            text = text.replace("\r\n", "\n").lstrip("\r ")
+            return "\n".join(clean_line(line) for line in text.split("\n"))
+        return clean_line(self._pending)
+
+    def _tail_text(self) -> str:
+        if len(self._tail) > 1:
+            self._tail = deque(["".join(self._tail)])
+        return (self._tail[0] if self._tail else "") + self._partial()
+
+    def __len__(self) -> int:
+        return len(self._head) + self.dropped + self._tail_len + len(self._partial())
+
+    def text(self) -> str:
+        """The cleaned output, without the dropped middle when longer than the limit."""
+        return self._head + self._tail_text()
+
+    def truncated(self, threshold: int, placeholder: Callable[[int], str]) -> str:
+        """Same as messages.truncate_text over the whole output, placeholder gets the number of removed characters."""
+        length = len(self)
+        if not threshold or length <= threshold:
+            return self.text()
+        mark = placeholder(length - threshold)
+        start_len = (threshold - len(mark)) // 2
+        end_len = threshold - len(mark) - start_len
+        if self.dropped:
+            head, tail = self._head, self._tail_text()
+        else:
+            head = tail = self.text()
+        return head[:start_len] + mark + (tail[-end_len:] if end_len > 0 else "")
+
+    def last_lines(self, count: int) -> list[str]:
+        """Last lines of the output, without rendering the rest of it."""
+        tail = self._tail_text()
+        if not self.dropped:
+            tail = self._head + tail
+        size = 4096
+        while True:
+            text = tail[-size:]
+            lines = text.splitlines()
+            if size >= len(tail) or len(lines) > count:
+                return lines[-count:]
+            size *= 4
@@ -0,0 +1,54 @@
+import heapq
+import itertools
+
+# Min-heap of timers by key. Rescheduling or cancelling a key leaves its old entry in the heap,
+# stale entries are skipped when they reach the top and dropped in bulk when they pile up.
+
+
+class TimerHeap:
+
+    def __init__(self):
+        self._heap: list[tuple[float, int, str]] = []
+        self._entries: dict[str, tuple[float, int]] = {}
+        self._seq = itertools.count()
+
+    def schedule(self, key: str, when: float):
+        """Set the timer of key to fire at when (replaces the previous one)."""
+        entry = (when, next(self._seq))
+        self._entries[key] = entry
+        heapq.heappush(self._heap, (*entry, key))
+        if len(self._heap) > 2 * len(self._entries) + 16:
+            self._heap = [(*entry, key) for key, entry in self._entries.items()]
+            heapq.heapify(self._heap)
+
+    def cancel(self, key: str):
+        self._entries.pop(key, None)
+
+    def get(self, key: str) -> float | None:
+        entry = self._entries.get(key)
+        return entry[0] if entry else None
+
+    def next_time(self) -> float | None:
+        """Time of the earliest timer."""
+        self._prune()
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now: float) -> list[tuple[str, float]]:
+        """Remove and return (key, time) of timers due at now, earliest first."""
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            when, seq, key = heapq.heappop(self._heap)
+            if self._entries.get(key) == (when, seq):
+                del self._entries[key]
+                due.append((key, when))
+        return due
+
+    def _prune(self):
+        while self._heap and self._entries.get(self._heap[0][2]) != self._heap[0][:2]:
+            heapq.heappop(self._heap)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
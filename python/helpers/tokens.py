@@ -1,22 +1,101 @@
-from typing import Literal
+from collections import OrderedDict
+import math
+import threading
+from typing import Literal, Sequence
 import tiktoken
 
 APPROX_BUFFER = 1.1
 TRIM_BUFFER = 0.8
+DEFAULT_ENCODING = "cl100k_base"
 
+# character ratio used by estimate_tokens, roughly what cl100k produces for english text and code
+CHARS_PER_TOKEN = 4.0
+# strings up to this length are memoized, longer ones are encoded every time
+CACHE_MAX_CHARS = 16_000
+CACHE_SIZE = 4096
+BATCH_THREADS = 8
 
-def count_tokens(text: str, encoding_name="cl100k_base") -> int:
+_encodings: dict[str, tiktoken.Encoding] = {}
+_encodings_lock = threading.Lock()
+
+
+def get_encoding(encoding_name: str = DEFAULT_ENCODING) -> tiktoken.Encoding:
+    encoding = _encodings.get(encoding_name)
+    if encoding is None:
+        with _encodings_lock:
+            encoding = _encodings.get(encoding_name)
+            if encoding is None:
+                encoding = tiktoken.get_encoding(encoding_name)
+                _encodings[encoding_name] = encoding
+    return encoding
+
+
+_cache: OrderedDict[tuple[str, str], int] = OrderedDict()
+_cache_lock = threading.Lock()
+_cache_stats = {"hits": 0, "misses": 0}
+
+
+def _cache_get(text: str, encoding_name: str) -> int | None:
+    if len(text) > CACHE_MAX_CHARS:
+        return None
+    key = (encoding_name, text)
+    with _cache_lock:
+        count = _cache.get(key)
+        if count is None:
+            _cache_stats["misses"] += 1
+            return None
+        _cache_stats["hits"] += 1
+        _cache.move_to_end(key)
+        return count
+
+
+def _cache_put(text: str, encoding_name: str, count: int):
+    if len(text) > CACHE_MAX_CHARS:
+        return
+    with _cache_lock:
+        _cache[(encoding_name, text)] = count
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+
+
+def count_tokens(text: str, encoding_name=DEFAULT_ENCODING) -> int:
     if not text:
         return 0
 
-    # Get the encoding
-    encoding = tiktoken.get_encoding(encoding_name)
+    count = _cache_get(text, encoding_name)
+    if count is None:
+        count = len(get_encoding(encoding_name).encode(text, disallowed_special=()))
+        _cache_put(text, encoding_name, count)
+    return count
+
 
-    # Encode the text and count the tokens
-    tokens = encoding.encode(text, disallowed_special=())
-    token_count = len(tokens)
+def count_tokens_batch(
+    texts: Sequence[str],
+    encoding_name=DEFAULT_ENCODING,
+    num_threads: int = BATCH_THREADS,
+) -> list[int]:
+    """Count tokens of many strings at once, cache misses are encoded by tiktoken in parallel threads."""
+    counts = [0] * len(texts)
+    pending: list[int] = []
+    for i, text in enumerate(texts):
+        if not text:
+            continue
+        count = _cache_get(text, encoding_name)
+        if count is None:
+            pending.append(i)
+        else:
+            counts[i] = count
 
-    return token_count
+    if pending:
+        encoded = get_encoding(encoding_name).encode_batch(
+            [texts[i] for i in pending],
+            num_threads=num_threads,
+            disallowed_special=(),
+        )
+        for i, tokens in zip(pending, encoded):
+            counts[i] = len(tokens)
+            _cache_put(texts[i], encoding_name, counts[i])
+    return counts
 
 
 def approximate_tokens(
@@ -25,6 +104,28 @@ def approximate_tokens(
     return int(count_tokens(text) * APPROX_BUFFER)
 
 
+def approximate_tokens_batch(texts: Sequence[str]) -> list[int]:
+    return [int(count * APPROX_BUFFER) for count in count_tokens_batch(texts)]
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap character based estimate without encoding, meant for per-chunk accounting of streamed output."""
+    if not text:
+        return 0
+    return math.ceil(len(text) / CHARS_PER_TOKEN * APPROX_BUFFER)
+
+
+def clear_cache():
+    with _cache_lock:
+        _cache.clear()
+        _cache_stats["hits"] = _cache_stats["misses"] = 0
+
+
+def get_cache_stats() -> dict[str, int]:
+    with _cache_lock:
+        return {**_cache_stats, "size": len(_cache), "max_size": CACHE_SIZE}
+
+
 def trim_to_tokens(
     text: str,
     max_tokens: int,
@@ -51,6 +51,7 @@ class Tool:
         PrintStyle(font_color="#1B4F72", background_color="white", padding=True, bold=True).print(f"{self.agent.agent_name}: Response from tool '{self.name}'")
         PrintStyle(font_color="#85C1E9").print(text)
         self.log.update(content=text)
+        self.log.end_stream()
 
     def get_log_object(self):
         if self.method:
@@ -110,6 +110,13 @@ class TTYSession:
     # backward-compat alias:
     readline = read
 
+    def read_nowait(self) -> str:
+        # Everything queued by the pump so far, without waiting
+        chunks = []
+        while not self._buf.empty():
+            chunks.append(self._buf.get_nowait())
+        return "".join(chunks)
+
     async def read_full_until_idle(self, idle_timeout, total_timeout):
         # Collect child output using iter_until_idle to avoid duplicate logic
         return "".join(
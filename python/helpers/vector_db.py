@@ -7,19 +7,21 @@ import faiss
 
 
 from langchain_core.documents import Document
-from langchain.storage import InMemoryByteStore
-from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain.storage import InMemoryByteStore, LocalFileStore
 from langchain_community.vectorstores.utils import (
     DistanceStrategy,
 )
 from langchain.embeddings import CacheBackedEmbeddings
-from simpleeval import simple_eval
 
 from agent import Agent
-from python.helpers import guids
+from python.helpers import ann_index, guids, files
+from python.helpers.metadata_filter import IndexedDocstore, IndexedFAISS, compile_filter
 
+# on-disk embeddings cache, shared with Memory
+EMBEDDINGS_CACHE_DIR = "tmp/memory/embeddings"
 
-class MyFaiss(FAISS):
+
+class MyFaiss(IndexedFAISS):
     # override aget_by_ids
     def get_by_ids(self, ids: Sequence[str], /) -> List[Document]:
         # return all self.docstore._dict[id] in ids
@@ -37,41 +39,67 @@ class VectorDB:
     _cached_embeddings: dict[str, CacheBackedEmbeddings] = {}
 
     @staticmethod
-    def _get_embeddings(agent: Agent, cache: bool = True):
+    def get_embeddings_namespace(agent: Agent) -> str:
+        model_config = agent.config.embeddings_model
+        return files.safe_file_name(model_config.provider + "_" + model_config.name)
+
+    @staticmethod
+    def _get_embeddings(agent: Agent, cache: bool = True, persistent: bool = False):
         model = agent.get_embedding_model()
         if not cache:
             return model  # return raw embeddings if cache is False
-        namespace = getattr(
-            model,
-            "model_name",
-            "default",
-        )
-        if namespace not in VectorDB._cached_embeddings:
-            store = InMemoryByteStore()
-            VectorDB._cached_embeddings[namespace] = (
+        # same namespace as Memory uses, so both reuse each other's cached vectors
+        namespace = VectorDB.get_embeddings_namespace(agent)
+        key = namespace + (":disk" if persistent else ":memory")
+        if key not in VectorDB._cached_embeddings:
+            if persistent:
+                store = LocalFileStore(files.get_abs_path(EMBEDDINGS_CACHE_DIR))
+            else:
+                store = InMemoryByteStore()
+            VectorDB._cached_embeddings[key] = (
                 CacheBackedEmbeddings.from_bytes_store(
                     model,
                     store,
                     namespace=namespace,
                 )
             )
-        return VectorDB._cached_embeddings[namespace]
+        return VectorDB._cached_embeddings[key]
 
-    def __init__(self, agent: Agent, cache: bool = True):
+    def __init__(self, agent: Agent, cache: bool = True, db_dir: str | None = None):
+        """With db_dir the index is loaded from and saved to that folder and embeddings are cached on disk."""
         self.agent = agent
         self.cache = cache  # store cache preference
-        self.embeddings = self._get_embeddings(agent, cache=cache)
+        self.db_dir = db_dir
+        self.embeddings = self._get_embeddings(agent, cache=cache, persistent=bool(db_dir))
+
+        if db_dir and files.exists(db_dir, "index.faiss"):
+            self.db = MyFaiss.load_local(
+                folder_path=db_dir,
+                embeddings=self.embeddings,
+                allow_dangerous_deserialization=True,
+                distance_strategy=DistanceStrategy.COSINE,
+                relevance_score_fn=cosine_normalizer,
+            )  # type: ignore
+            self.index = self.db.index
+            self.db.set_index_config(ann_index.load_config(db_dir))
+            return
+
         self.index = faiss.IndexFlatIP(len(self.embeddings.embed_query("example")))
 
         self.db = MyFaiss(
             embedding_function=self.embeddings,
             index=self.index,
-            docstore=InMemoryDocstore(),
+            docstore=IndexedDocstore(),
             index_to_docstore_id={},
             distance_strategy=DistanceStrategy.COSINE,
             # normalize_L2=True,
             relevance_score_fn=cosine_normalizer,
         )
+        self.db.set_index_config(ann_index.load_config(db_dir))
+
+    def save(self):
+        if self.db_dir:
+            self.db.save_local(folder_path=self.db_dir)
 
     async def search_by_similarity_threshold(
         self, query: str, limit: int, threshold: float, filter: str = ""
@@ -89,8 +117,13 @@ class VectorDB:
     async def search_by_metadata(self, filter: str, limit: int = 0) -> list[Document]:
         comparator = get_comparator(filter)
         all_docs = self.db.get_all_docs()
+        # narrow down to candidates from the metadata indexes, exact ones need no evaluation
+        found = self.db.filter_candidates(comparator)
+        docs = [all_docs[id] for id in found[0] if id in all_docs] if found else all_docs.values()
+        if found and found[1]:
+            return docs[:limit] if limit > 0 else docs  # type: ignore
         result = []
-        for doc in all_docs.values():
+        for doc in docs:
             if comparator(doc.metadata):
                 result.append(doc)
                 # stop if limit reached and limit > 0
@@ -98,14 +131,28 @@ class VectorDB:
                     break
         return result
 
-    async def insert_documents(self, docs: list[Document]):
+    async def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return await self.embeddings.aembed_documents(texts)
+
+    async def insert_documents(
+        self, docs: list[Document], embeddings: list[list[float]] | None = None
+    ):
+        """Insert documents, embeddings from embed_documents skip embedding them again."""
         ids = [guids.generate_id() for _ in range(len(docs))]
 
         if ids:
             for doc, id in zip(docs, ids):
                 doc.metadata["id"] = id  # add ids to documents metadata
 
-            self.db.add_documents(documents=docs, ids=ids)
+            if embeddings is None:
+                await self.db.aadd_documents(documents=docs, ids=ids)
+            else:
+                texts = [doc.page_content for doc in docs]
+                self.db.add_embeddings(
+                    text_embeddings=list(zip(texts, embeddings)),
+                    metadatas=[doc.metadata for doc in docs],
+                    ids=ids,
+                )
         return ids
 
     async def delete_documents_by_ids(self, ids: list[str]):
@@ -139,12 +186,4 @@ def cosine_normalizer(val: float) -> float:
 
 
 def get_comparator(condition: str):
-    def comparator(data: dict[str, Any]):
-        try:
-            result = simple_eval(condition, names=data)
-            return result
-        except Exception as e:
-            # PrintStyle.error(f"Error evaluating condition: {e}")
-            return False
-
-    return comparator
+    return compile_filter(condition)
@@ -9,7 +9,7 @@ from python.helpers.shell_local import LocalInteractiveSession
 from python.helpers.shell_ssh import SSHInteractiveSession
 from python.helpers.docker import DockerContainerManager
 from python.helpers.strings import truncate_text as truncate_text_string
-from python.helpers.messages import truncate_text as truncate_text_agent
+from python.helpers.terminal_output import DEFAULT_LIMIT as OUTPUT_MAX_LEN, TerminalOutput
 import re
 
 # Timeouts for python, nodejs, and terminal runtimes.
@@ -20,6 +20,9 @@ CODE_EXEC_TIMEOUTS: dict[str, int] = {
     "dialog_timeout": 5,
 }
 
+# Terminal output is rendered into the log at most this many times per second.
+LOG_FRAME_RATE = 10
+
 # Timeouts for output runtime.
 OUTPUT_TIMEOUTS: dict[str, int] = {
     "first_output_timeout": 90,
@@ -113,6 +116,7 @@ class CodeExecution(Tool):
 
     async def after_execution(self, response, **kwargs):
         self.agent.hist_add_tool_result(self.name, response.message, **(response.additional or {}))
+        self.log.end_stream()
 
     async def prepare_state(self, reset=False, session: int | None = None):
         self.state: State | None = self.agent.get_data("_cet_state")
@@ -241,7 +245,7 @@ class CodeExecution(Tool):
         between_output_timeout=15,  # Wait up to x seconds between outputs
         dialog_timeout=5,  # potential dialog detection timeout
         max_exec_timeout=180,  # hard cap on total runtime
-        sleep_time=0.1,
+        sleep_time=0.1,  # longest wait for output before checking timeouts and interventions
         prefix="",
         timeouts: dict | None = None,
     ):
@@ -256,40 +260,50 @@ class CodeExecution(Tool):
             dialog_timeout = timeouts.get("dialog_timeout", dialog_timeout)
             max_exec_timeout = timeouts.get("max_exec_timeout", max_exec_timeout)
 
+        shell = self.state.shells[session].session
+        if reset_full_output:
+            shell.output.reset()
+
         start_time = time.time()
         last_output_time = start_time
-        full_output = ""
+        last_frame_time = 0.0
         truncated_output = ""
+        rendered = True  # log shows the latest output
         got_output = False
 
         # if prefix, log right away
         if prefix:
             self.log.update(content=prefix)
 
+        def render():
+            # output is rendered into the log at most LOG_FRAME_RATE times per second
+            nonlocal truncated_output, rendered, last_frame_time
+            if not rendered:
+                truncated_output = self.fix_full_output(shell.output)
+                self.set_progress(truncated_output)
+                heading = self.get_heading_from_output(truncated_output, 0)
+                self.log.update(content=prefix + truncated_output, heading=heading)
+                rendered = True
+                last_frame_time = time.time()
+            return truncated_output
+
         while True:
-            await asyncio.sleep(sleep_time)
-            full_output, partial_output = await self.state.shells[session].session.read_output(
-                timeout=1, reset_full_output=reset_full_output
-            )
-            reset_full_output = False  # only reset once
+            # wakes up as soon as the terminal produces output
+            partial_output = await shell.read_new_output(timeout=sleep_time)
 
             await self.agent.handle_intervention()
 
             now = time.time()
             if partial_output:
                 PrintStyle(font_color="#85C1E9").stream(partial_output)
-                # full_output += partial_output # Append new output
-                truncated_output = self.fix_full_output(full_output)
-                self.set_progress(truncated_output)
-                heading = self.get_heading_from_output(truncated_output, 0)
-                self.log.update(content=prefix + truncated_output, heading=heading)
+                rendered = False
                 last_output_time = now
                 got_output = True
+                if now - last_frame_time >= 1 / LOG_FRAME_RATE:
+                    render()
 
                 # Check for shell prompt at the end of output
-                last_lines = (
-                    truncated_output.splitlines()[-3:] if truncated_output else []
-                )
+                last_lines = shell.output.last_lines(3)
                 last_lines.reverse()
                 for idx, line in enumerate(last_lines):
                     for pat in self.prompt_patterns:
@@ -297,16 +311,20 @@ class CodeExecution(Tool):
                             PrintStyle.info(
                                 "Detected shell prompt, returning output early."
                             )
+                            output = render()
                             last_lines.reverse()
                             heading = self.get_heading_from_output(
                                 "\n".join(last_lines), idx + 1, True
                             )
                             self.log.update(heading=heading)
                             self.mark_session_idle(session)
-                            return truncated_output
+                            return output
+            elif not rendered and now - last_frame_time >= 1 / LOG_FRAME_RATE:
+                render()
 
             # Check for max execution time
             if now - start_time > max_exec_timeout:
+                truncated_output = render()
                 sysinfo = self.agent.read_prompt(
                     "fw.code.max_time.md", timeout=max_exec_timeout
                 )
@@ -331,6 +349,7 @@ class CodeExecution(Tool):
             else:
                 # Waiting for more output after first output
                 if now - last_output_time > between_output_timeout:
+                    truncated_output = render()
                     sysinfo = self.agent.read_prompt(
                         "fw.code.pause_time.md", timeout=between_output_timeout
                     )
@@ -345,9 +364,7 @@ class CodeExecution(Tool):
                 # potential dialog detection
                 if now - last_output_time > dialog_timeout:
                     # Check for dialog prompt at the end of output
-                    last_lines = (
-                        truncated_output.splitlines()[-2:] if truncated_output else []
-                    )
+                    last_lines = shell.output.last_lines(2)
                     for line in last_lines:
                         for pat in self.dialog_patterns:
                             if pat.search(line.strip()):
@@ -355,6 +372,7 @@ class CodeExecution(Tool):
                                     "Detected dialog prompt, returning output early."
                                 )
 
+                                truncated_output = render()
                                 sysinfo = self.agent.read_prompt(
                                     "fw.code.pause_dialog.md", timeout=dialog_timeout
                                 )
@@ -383,10 +401,9 @@ class CodeExecution(Tool):
         if not self.state.shells[session].running:
             return None
         
-        full_output, _ = await self.state.shells[session].session.read_output(
-            timeout=1, reset_full_output=reset_full_output
-        )
-        truncated_output = self.fix_full_output(full_output)
+        shell = self.state.shells[session].session
+        await shell.read_output(timeout=1, reset_full_output=reset_full_output)
+        truncated_output = self.fix_full_output(shell.output)
         self.set_progress(truncated_output)
         heading = self.get_heading_from_output(truncated_output, 0)
 
@@ -465,13 +482,16 @@ class CodeExecution(Tool):
 
         return self.get_heading() + done_icon
 
-    def fix_full_output(self, output: str):
+    def fix_full_output(self, output: TerminalOutput):
+        # ~1MB, larger outputs should be dumped to file, not read from terminal
+        # only the kept head and tail are rendered, the terminal output is bounded to the same size
+        text = output.truncated(
+            OUTPUT_MAX_LEN,
+            lambda length: self.agent.read_prompt("fw.msg_truncated.md", length=length),
+        )
         # remove any single byte \xXX escapes
-        output = re.sub(r"(?<!\\)\\x[0-9A-Fa-f]{2}", "", output)
-        # Strip every line of output before truncation
-        # output = "\n".join(line.strip() for line in output.splitlines())
-        output = truncate_text_agent(agent=self.agent, output=output, threshold=1000000) # ~1MB, larger outputs should be dumped to file, not read from terminal
-        return output
+        text = re.sub(r"(?<!\\)\\x[0-9A-Fa-f]{2}", "", text)
+        return text
 
     async def ensure_cwd(self) -> str | None:
         project_name = projects.get_context_project_name(self.agent.context)
@@ -17,3 +17,4 @@ class ResponseTool(Tool):
         if self.loop_data and "log_item_response" in self.loop_data.params_temporary:
             log = self.loop_data.params_temporary["log_item_response"]
             log.update(finished=True) # mark the message as finished
+            log.end_stream()
@@ -0,0 +1,79 @@
+"""
+Benchmark of recall@k and query latency of the approximate index types against the flat baseline.
+
+Synthetic embeddings: normalized points scattered around random cluster centers, roughly like
+memories on a few hundred topics. Queries are perturbed copies of stored vectors. Recall@k is the
+share of the exact (flat) top k found by each index; build time includes IVF training.
+
+Usage: python tests/benchmark_ann_index.py [queries] [vectors] [dimension]
+"""
+
+import sys, os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import statistics
+import time
+
+import numpy as np
+
+K = 10
+
+
+def make_vectors(rng: np.random.Generator, n: int, dim: int, clusters: int = 500) -> np.ndarray:
+    centers = rng.standard_normal((clusters, dim)).astype(np.float32)
+    vectors = centers[rng.integers(0, clusters, n)] + 0.6 * rng.standard_normal((n, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def measure(index, queries: np.ndarray, vectors: np.ndarray | None = None) -> tuple[np.ndarray, list[float]]:
+    """With vectors, candidates are over-fetched and re-ranked with exact scores like IndexedFAISS does."""
+    from python.helpers.ann_index import RERANK_FETCH, get_search_params
+
+    params = get_search_params(index)
+    results = []
+    timings = []
+    for query in queries:
+        start = time.perf_counter()
+        if vectors is None:
+            _, ids = index.search(query[None, :], K, params=params)
+            row = ids[0]
+        else:
+            _, ids = index.search(query[None, :], K * RERANK_FETCH, params=params)
+            candidates = ids[0][ids[0] != -1]
+            row = candidates[np.argsort(-(vectors[candidates] @ query))[:K]]
+        timings.append(time.perf_counter() - start)
+        results.append(row)
+    return results, timings
+
+
+def main(iterations: int = 200, size: int = 100_000, dim: int = 256):
+    import faiss
+    from python.helpers.ann_index import IndexConfig, build_index
+
+    faiss.omp_set_num_threads(1)  # per query latency, like one recall at a time
+    rng = np.random.default_rng(0)
+    vectors = make_vectors(rng, size, dim)
+    queries = vectors[rng.integers(0, size, iterations)] + 0.05 * rng.standard_normal((iterations, dim)).astype(np.float32)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+    print(f"{size} vectors, {dim} dimensions, {iterations} queries, recall@{K}")
+
+    baseline = None
+    for kind in ("flat", "hnsw", "ivf_flat", "ivf_pq", "ivf_pq+rerank"):
+        start = time.perf_counter()
+        index = build_index(IndexConfig(type=kind.split("+")[0]), vectors)
+        build = time.perf_counter() - start
+        results, timings = measure(index, queries, vectors if kind.endswith("+rerank") else None)
+        if baseline is None:
+            baseline = results
+        recall = np.mean([len(set(r) & set(b)) / K for r, b in zip(results, baseline)])
+        print(
+            f"{kind:>13}: build {build:7.2f} s | recall {recall:6.3f}"
+            f" | median {statistics.median(timings) * 1000:7.3f} ms"
+            f" | p95 {np.percentile(timings, 95) * 1000:7.3f} ms"
+        )
+
+
+if __name__ == "__main__":
+    args = [int(arg) for arg in sys.argv[1:4]]
+    main(*args)
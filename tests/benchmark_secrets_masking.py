@@ -0,0 +1,108 @@
+"""
+Benchmark of SecretsManager.mask_values with 200 secrets over 1 MB of text.
+
+"replace" is the previous implementation, one str.replace pass per secret sorted by length on every call.
+"masker" is the compiled SecretsMasker (Aho-Corasick automaton when pyahocorasick is installed).
+"stream" feeds the same text through StreamingSecretsFilter in 64 character chunks.
+The "-1k" rows mask the same text split into 1 KB messages, one call per message,
+which is closer to masking of log updates and tool results.
+
+Usage: python tests/benchmark_secrets_masking.py [iterations]
+"""
+
+import sys, os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import random
+import statistics
+import string
+import time
+
+
+def make_data(secrets_count: int = 200, text_size: int = 1_000_000):
+    rng = random.Random(0)
+    alphabet = string.ascii_letters + string.digits + "-_"
+    secrets = {
+        f"SECRET_{i}": "".join(rng.choices(alphabet, k=rng.randint(12, 40)))
+        for i in range(secrets_count)
+    }
+    values = list(secrets.values())
+    words = ["the", "agent", "tool", "result", "error", "token", "value", "\n"]
+    parts, size = [], 0
+    while size < text_size:
+        part = " ".join(rng.choices(words, k=800))
+        if rng.random() < 0.5:
+            part += " " + rng.choice(values)
+        parts.append(part)
+        size += len(part)
+    return secrets, " ".join(parts)[:text_size]
+
+
+def replace_loop(text: str, secrets: dict[str, str]) -> str:
+    from python.helpers.secrets import alias_for_key
+
+    for key, value in sorted(secrets.items(), key=lambda x: len(x[1]), reverse=True):
+        if value and len(value.strip()) >= 4:
+            text = text.replace(value, alias_for_key(key))
+    return text
+
+
+def stream(text: str, manager) -> str:
+    filter = manager.create_streaming_filter()
+    out = [filter.process_chunk(text[i : i + 64]) for i in range(0, len(text), 64)]
+    out.append(filter.finalize())
+    return "".join(out)
+
+
+def measure(fn, iterations: int) -> list[float]:
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def report(label: str, timings: list[float]):
+    print(
+        f"{label:>10}: median {statistics.median(timings) * 1000:8.2f} ms"
+        f" | mean {statistics.mean(timings) * 1000:8.2f} ms"
+        f" | min {min(timings) * 1000:8.2f} ms"
+    )
+
+
+def main(iterations: int = 10):
+    from python.helpers import secrets as secrets_module
+    from python.helpers.secrets import SecretsManager
+
+    secrets, text = make_data()
+    manager = SecretsManager("tmp/benchmark_secrets.env")
+    manager._secrets_cache = secrets
+    assert manager.mask_values(text) == replace_loop(text, secrets)
+
+    print(f"automaton: {'pyahocorasick' if secrets_module.ahocorasick else 'unavailable'}")
+    replace = measure(lambda: replace_loop(text, secrets), iterations)
+    masker = measure(lambda: manager.mask_values(text), iterations)
+    streamed = measure(lambda: stream(text, manager), iterations)
+    messages = [text[i : i + 1000] for i in range(0, len(text), 1000)]
+    replace_small = measure(
+        lambda: [replace_loop(m, secrets) for m in messages], iterations
+    )
+    masker_small = measure(
+        lambda: [manager.mask_values(m) for m in messages], iterations
+    )
+
+    report("replace", replace)
+    report("masker", masker)
+    report("stream", streamed)
+    report("replace-1k", replace_small)
+    report("masker-1k", masker_small)
+    print(f"speedup 1 MB: {statistics.median(replace) / statistics.median(masker):.1f}x")
+    print(
+        f"speedup 1 KB: {statistics.median(replace_small) / statistics.median(masker_small):.1f}x"
+    )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10)
@@ -0,0 +1,60 @@
+"""
+Benchmark of Agent.get_system_prompt latency with and without the compiled prompt cache.
+
+"cold" clears the prompt template cache and the cached plugin classes before each call,
+which is the same work as before the cache existed (resolve, read, import and parse every file).
+"warm" reuses the compiled templates.
+
+Usage: python tests/benchmark_system_prompt.py [iterations]
+"""
+
+import sys, os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+import statistics
+import time
+
+
+def measure(agent, iterations: int, cold: bool) -> list[float]:
+    from agent import LoopData
+    from python.helpers import files, extract_tools
+
+    timings = []
+    for _ in range(iterations):
+        if cold:
+            files.clear_prompt_cache()
+            extract_tools.reload_classes()
+        start = time.perf_counter()
+        asyncio.run(agent.get_system_prompt(LoopData()))
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def report(label: str, timings: list[float]):
+    print(
+        f"{label:>5}: median {statistics.median(timings) * 1000:8.2f} ms"
+        f" | mean {statistics.mean(timings) * 1000:8.2f} ms"
+        f" | min {min(timings) * 1000:8.2f} ms"
+    )
+
+
+def main(iterations: int = 20):
+    import initialize
+    from agent import AgentContext
+
+    context = AgentContext(config=initialize.initialize_agent())
+    agent = context.agent0
+
+    measure(agent, 2, cold=False)  # warm up imports
+    cold = measure(agent, iterations, cold=True)
+    warm = measure(agent, iterations, cold=False)
+
+    report("cold", cold)
+    report("warm", warm)
+    print(f"speedup: {statistics.median(cold) / statistics.median(warm):.1f}x")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20)
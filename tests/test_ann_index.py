@@ -0,0 +1,128 @@
+import json
+import sys
+import time
+from pathlib import Path
+
+import faiss
+import numpy as np
+from langchain_community.vectorstores.utils import DistanceStrategy
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from python.helpers import ann_index
+from python.helpers.ann_index import IndexConfig
+from python.helpers.metadata_filter import IndexedDocstore, IndexedFAISS, compile_filter
+
+
+def _vectors(n: int, dim: int = 32, seed: int = 0) -> np.ndarray:
+    vectors = np.random.default_rng(seed).standard_normal((n, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def _make_db(vectors: np.ndarray) -> IndexedFAISS:
+    db = IndexedFAISS(
+        embedding_function=lambda text: [],  # type: ignore
+        index=faiss.IndexFlatIP(vectors.shape[1]),
+        docstore=IndexedDocstore(),
+        index_to_docstore_id={},
+        distance_strategy=DistanceStrategy.COSINE,
+    )
+    db.add_embeddings(
+        [(f"text {i}", v.tolist()) for i, v in enumerate(vectors)],
+        metadatas=[{"area": "main" if i % 4 else "solutions"} for i in range(len(vectors))],
+        ids=[f"id{i}" for i in range(len(vectors))],
+    )
+    return db
+
+
+def _wait_ready(db: IndexedFAISS, builds: int = 1):
+    for _ in range(500):
+        if db.ann and db.ann.get(db) and db.ann.get_stats()["builds"] >= builds:
+            return
+        time.sleep(0.01)
+    raise AssertionError("index not built")
+
+
+def _ids(results) -> list[str]:
+    return [doc.id for doc, _ in results]
+
+
+def test_promotes_to_hnsw_and_follows_changes():
+    vectors = _vectors(3000)
+    db = _make_db(vectors[:2000])
+    db.set_index_config(IndexConfig(type="hnsw", threshold=2500))
+    assert db.ann and db.ann.get(db) is None  # under the threshold, flat search
+
+    db.add_embeddings(
+        [(f"text {i}", vectors[i].tolist()) for i in range(2000, 3000)],
+        metadatas=[{"area": "main"}] * 1000,
+        ids=[f"id{i}" for i in range(2000, 3000)],
+    )
+    _wait_ready(db)
+    assert isinstance(db.ann.index, faiss.IndexHNSW)
+
+    queries = vectors[:50] + 0.1 * _vectors(50, seed=1)
+    recall = 0
+    for query in queries:
+        exact = _ids(super(IndexedFAISS, db).similarity_search_with_score_by_vector(query.tolist(), k=10))
+        recall += len(set(exact) & set(_ids(db.similarity_search_with_score_by_vector(query.tolist(), k=10))))
+    assert recall / 500 > 0.9
+
+    # deleted documents disappear, added and re-added ones are found with their new vectors
+    db.delete(["id0", "id1"])
+    db.add_embeddings([("moved", vectors[5].tolist())], metadatas=[{"area": "main"}], ids=["id1"])
+    assert _ids(db.similarity_search_with_score_by_vector(vectors[0].tolist(), k=1)) != ["id0"]
+    assert _ids(db.similarity_search_with_score_by_vector(vectors[5].tolist(), k=2)) in (["id5", "id1"], ["id1", "id5"])
+    stats = db.ann.get_stats()
+    assert stats["deleted"] == 2 and stats["size"] == 2999
+
+    # broad filters over-fetch from the index, parts the indexes can't answer are checked per document
+    broad = db.similarity_search_with_score_by_vector(vectors[8].tolist(), k=5, filter=compile_filter("area == 'solutions'"))
+    assert _ids(broad)[0] == "id8" and all(doc.metadata["area"] == "solutions" for doc, _ in broad)
+    unknown = compile_filter("area == 'main' and missing == 1")
+    assert db.similarity_search_with_score_by_vector(vectors[9].tolist(), k=1, filter=unknown) == []
+
+    # too many tombstones trigger a rebuild in the background
+    db.delete([f"id{i}" for i in range(2, 800)])
+    _wait_ready(db, builds=2)
+    assert db.ann.get_stats()["deleted"] == 0 and db.ann.get_stats()["size"] == 2201
+
+
+def test_ivf_and_config(tmp_path):
+    (tmp_path / ann_index.CONFIG_FILE).write_text(json.dumps({"type": "ivf_pq", "threshold": 10, "pq_m": 6}))
+    config = ann_index.load_config(str(tmp_path))
+    assert config.type == "ivf_pq" and config.threshold == 10 and config.nprobe == 16
+
+    vectors = _vectors(4000)
+    index = ann_index.build_index(config, vectors)
+    assert isinstance(index, faiss.IndexIVFPQ) and index.pq.M == 4 and index.ntotal == 4000
+
+    db = _make_db(vectors)
+    db.set_index_config(IndexConfig(type="ivf_flat", threshold=100))
+    _wait_ready(db)
+    assert isinstance(db.ann.index, faiss.IndexIVFFlat)  # type: ignore
+    assert _ids(db.similarity_search_with_score_by_vector(vectors[7].tolist(), k=1)) == ["id7"]
+
+
+def test_ivf_pq_results_are_reranked_with_exact_scores():
+    vectors = _vectors(4000)
+    db = _make_db(vectors)
+    # uniform random vectors are the worst case for IVF, more lists are probed to keep recall up
+    db.set_index_config(IndexConfig(type="ivf_pq", threshold=100, pq_m=8, nprobe=32))
+    _wait_ready(db)
+    assert db.ann and db.ann.quantized
+
+    queries = vectors[:50] + 0.1 * _vectors(50, seed=1)
+    recall = 0
+    for query in queries:
+        exact = super(IndexedFAISS, db).similarity_search_with_score_by_vector(query.tolist(), k=10)
+        found = db.similarity_search_with_score_by_vector(query.tolist(), k=10)
+        recall += len(set(_ids(exact)) & set(_ids(found)))
+        # scores are the exact inner products, the same the flat search reports
+        for doc, score in found:
+            position = int(doc.id.removeprefix("id"))
+            assert np.isclose(score, float(vectors[position] @ query), atol=1e-5)
+        assert [score for _, score in found] == sorted((score for _, score in found), reverse=True)
+    assert recall / 500 > 0.85
@@ -0,0 +1,99 @@
+import os
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from agent import AgentContext
+from initialize import initialize_agent
+from python.helpers import chat_index, persist_chat, state_monitor_integration
+
+
+def test_chats_are_indexed_hydrated_and_evicted(monkeypatch, tmp_path):
+    monkeypatch.setattr(persist_chat, "CHATS_FOLDER", str(tmp_path))
+    monkeypatch.setattr(state_monitor_integration, "projected_contexts", lambda: set())
+
+    context = AgentContext(config=initialize_agent(), name="indexed")
+    ctxid = context.id
+    try:
+        context.agent0.history.add_message(False, "hello")
+        context.log.log(type="user", heading="User message", content="hello")
+        persist_chat.save_tmp_chat(context)
+        AgentContext.remove(ctxid)
+
+        # chats saved before the index get their meta.json on load
+        os.remove(tmp_path / ctxid / chat_index.META_FILE)
+        assert persist_chat.load_tmp_chats() == [ctxid]
+        assert (tmp_path / ctxid / chat_index.META_FILE).exists()
+        assert persist_chat.load_tmp_chats() == [ctxid]
+
+        entry = chat_index.get(ctxid)
+        assert entry is not None and entry.name == "indexed"
+        assert entry.output()["log_length"] == len(context.log.logs)
+        assert ctxid not in [ctx.id for ctx in AgentContext.all()]
+
+        # opened on first use
+        hydrated = AgentContext.get(ctxid)
+        assert hydrated is not None and hydrated is not context
+        assert hydrated.no == entry.no
+        assert hydrated.agent0.history.current.messages[-1].content == "hello"
+        assert not chat_index.is_unloaded(ctxid)
+        assert AgentContext.get(ctxid) is hydrated
+
+        # recently used chats stay loaded, idle ones go back to the index
+        assert persist_chat.evict_idle_chats(ttl=60) == []
+        hydrated.last_used = 0
+        assert persist_chat.evict_idle_chats(ttl=60) == [ctxid]
+        assert chat_index.get(ctxid).no == hydrated.no
+
+        again = AgentContext.get(ctxid)
+        assert again is not None and again is not hydrated
+        assert again.log.guid != hydrated.log.guid
+        assert len(again.log.logs) == len(context.log.logs)
+    finally:
+        AgentContext.remove(ctxid)
+        chat_index.clear()
+
+
+def test_idle_chats_are_saved_outside_the_contexts_lock(monkeypatch, tmp_path):
+    import threading
+    import time
+
+    monkeypatch.setattr(persist_chat, "CHATS_FOLDER", str(tmp_path))
+    monkeypatch.setattr(state_monitor_integration, "projected_contexts", lambda: set())
+
+    context = AgentContext(config=initialize_agent(), name="busy")
+    ctxid = context.id
+    save = persist_chat.save_tmp_chat
+    locked = []
+
+    def take_lock():
+        acquired = AgentContext._contexts_lock.acquire(timeout=1)
+        if acquired:
+            AgentContext._contexts_lock.release()
+        locked.append(acquired)
+
+    def touching_save(ctx):
+        # another thread can take the lock while the chat is written
+        thread = threading.Thread(target=take_lock)
+        thread.start()
+        thread.join()
+        save(ctx)
+        if len(locked) == 1:
+            ctx.last_used = time.time()  # used again during the first save
+
+    try:
+        context.last_used = 0
+        monkeypatch.setattr(persist_chat, "save_tmp_chat", touching_save)
+        assert persist_chat.evict_idle_chats(ttl=60) == []
+        assert locked == [True]
+        assert AgentContext.get(ctxid) is context
+
+        context.last_used = 0
+        assert persist_chat.evict_idle_chats(ttl=60) == [ctxid]
+        assert chat_index.is_unloaded(ctxid)
+    finally:
+        AgentContext.remove(ctxid)
+        chat_index.clear()
@@ -0,0 +1,110 @@
+import json
+import os
+import sys
+from datetime import datetime
+from pathlib import Path
+from types import SimpleNamespace
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from agent import Agent, AgentContextType
+from python.helpers import chat_journal, persist_chat
+from python.helpers.history import History
+from python.helpers.log import Log
+
+
+def _agent(number: int):
+    agent = SimpleNamespace(number=number, data={})
+    agent.history = History(agent=agent)
+    return agent
+
+
+def _context():
+    agent0 = _agent(0)
+    return SimpleNamespace(
+        id="ctx",
+        no=1,
+        name="chat",
+        type=AgentContextType.USER,
+        created_at=datetime(2025, 1, 1),
+        last_message=datetime(2025, 1, 1),
+        agent0=agent0,
+        streaming_agent=agent0,
+        log=Log(),
+        data={},
+        output_data={},
+    )
+
+
+def _setup(monkeypatch, tmp_path):
+    monkeypatch.setattr(persist_chat, "get_chat_folder_path", lambda ctxid: str(tmp_path / ctxid))
+    context = _context()
+    journal = chat_journal.get_journal(str(tmp_path / context.id), persist_chat.LOG_SIZE)
+    return context, journal
+
+
+def _expected(context):
+    return json.loads(persist_chat.export_json_chat(context))
+
+
+def _loaded(tmp_path, context):
+    # a fresh journal object, as after a restart
+    journal = chat_journal.ChatJournal(str(tmp_path / context.id), persist_chat.LOG_SIZE)
+    return journal.load()
+
+
+def test_saves_are_journaled_and_replayed(monkeypatch, tmp_path):
+    context, journal = _setup(monkeypatch, tmp_path)
+    context.agent0.history.add_message(False, "hello")
+    context.log.log(type="user", heading="User message", content="hello")
+    persist_chat.save_tmp_chat(context)
+    snapshot = (tmp_path / "ctx" / "chat.json").read_text()
+
+    # appended messages, updated log items and new subordinates are journaled
+    context.agent0.history.add_message(True, "hi")
+    item = context.log.log(type="agent", heading="Thinking")
+    persist_chat.save_tmp_chat(context)
+    item.stream(content="done")
+    sub = _agent(1)
+    sub.history.add_message(False, "task")
+    context.agent0.data[Agent.DATA_NAME_SUBORDINATE] = sub
+    context.name = "renamed"
+    persist_chat.save_tmp_chat(context)
+
+    assert (tmp_path / "ctx" / "chat.json").read_text() == snapshot
+    ops = [r.get("op") for r in chat_journal.read_records(journal.path(chat_journal.JOURNAL_FILE))]
+    assert ops == ["header", "messages", "log", "meta", "agent", "log"]
+    assert _loaded(tmp_path, context) == _expected(context)
+
+    # non-append history changes replace the whole history
+    context.agent0.history.new_topic()
+    context.agent0.history.add_message(False, "next topic")
+    persist_chat.save_tmp_chat(context)
+    assert _loaded(tmp_path, context) == _expected(context)
+
+
+def test_compaction_and_stale_journals(monkeypatch, tmp_path):
+    context, journal = _setup(monkeypatch, tmp_path)
+    persist_chat.save_tmp_chat(context)
+    context.agent0.history.add_message(False, "one")
+    persist_chat.save_tmp_chat(context)
+
+    journal.compact(persist_chat._serialize_json, background=False)
+    assert not os.path.exists(journal.path(chat_journal.JOURNAL_FILE))
+    assert not os.path.exists(journal.path(chat_journal.COMPACTING_FILE))
+    assert _loaded(tmp_path, context) == _expected(context)
+
+    # appends after the compaction continue the new generation
+    context.agent0.history.add_message(True, "two")
+    persist_chat.save_tmp_chat(context)
+    assert _loaded(tmp_path, context) == _expected(context)
+
+    # a journal left behind by an interrupted full save is not replayed again
+    stale = open(journal.path(chat_journal.JOURNAL_FILE), "rb").read()
+    journal.state = None
+    persist_chat.save_tmp_chat(context)
+    with open(journal.path(chat_journal.JOURNAL_FILE), "wb") as f:
+        f.write(stale + b'{"op": "messages", "ind')
+    assert _loaded(tmp_path, context) == _expected(context)
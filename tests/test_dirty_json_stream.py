@@ -0,0 +1,53 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from python.helpers.dirty_json import DirtyJson
+
+
+SAMPLES = [
+    '{"thoughts": ["a", "b\\n"], "tool_name": "code_execution_tool", "tool_args": {"runtime": "python", "code": "print(\\"hi\\")\\nx = \'\\u00e9\'"}}',
+    "{a: foo, b: [1, 2, 3,], c: {d: true, e: null, f: -1.5e3}}",
+    '{"a": """multi\nline""", "b": 2, // comment\n "c": /* c */ 3}',
+    '{{"a": {"b": [1, {"c": "d"}]}}}',
+    "Sure! here: {'a': 'b', \"c\": `d`} trailing",
+    '{"a": "\\u12", "b": "\\uzzzz", "c": tru}',
+]
+
+
+@pytest.mark.parametrize("text", SAMPLES)
+@pytest.mark.parametrize("step", [1, 3, 7])
+def test_feed_matches_full_parse_of_every_prefix(text: str, step: int):
+    parser = DirtyJson()
+    for pos in range(step, len(text) + step, step):
+        try:
+            expected = DirtyJson.parse_string(text[:pos])
+        except ValueError:  # cut inside a number like "-1.5e"
+            with pytest.raises(ValueError):
+                parser.feed(text[pos - step : pos])
+            continue
+        assert parser.feed(text[pos - step : pos]) == expected
+
+
+def test_nested_object_survives_trailing_comma():
+    assert DirtyJson.parse_string('{"x": {"a": 1,') == {"x": {"a": 1}}
+
+
+def test_changed_flag_and_snapshot():
+    parser = DirtyJson()
+    parser.feed('{"tool_args": {"text": "hel')
+    assert parser.changed
+    snapshot = parser.snapshot()
+
+    parser.feed('lo"')
+    assert parser.changed
+    assert parser.result == {"tool_args": {"text": "hello"}}
+    assert snapshot == {"tool_args": {"text": "hel"}}
+
+    parser.feed("  \n ")
+    assert not parser.changed
@@ -0,0 +1,212 @@
+import asyncio
+import json
+import os
+import random
+import sys
+import threading
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from python.helpers import document_query
+from python.helpers.document_query import DocumentQueryStore
+
+
+def test_file_version_follows_mtime_and_size(tmp_path):
+    path = tmp_path / "doc.txt"
+    path.write_text("first")
+    uri = DocumentQueryStore.normalize_uri(str(path))
+
+    first = asyncio.run(DocumentQueryStore.get_document_version(uri))
+    assert first == asyncio.run(DocumentQueryStore.get_document_version(uri))
+
+    path.write_text("second version")
+    assert asyncio.run(DocumentQueryStore.get_document_version(uri)) != first
+    assert asyncio.run(DocumentQueryStore.get_document_version(uri + ".missing")) is None
+
+
+def test_cached_document_is_reused_until_source_changes(monkeypatch):
+    store = DocumentQueryStore(agent=None)  # type: ignore[arg-type]
+    store.vector_db = object()  # type: ignore[assignment]
+    uri = "file:///docs/a.pdf"
+    store.manifest[uri] = {"version": "1:10", "indexed_at": time.time(), "chunks": 3}
+
+    assert store.is_document_current(uri, "1:10")
+    assert not store.is_document_current(uri, "2:10")
+    assert not store.is_document_current("file:///docs/b.pdf", "1:10")
+
+    web = "https://example.com/page"
+    store.manifest[web] = {"version": None, "indexed_at": time.time(), "chunks": 1}
+    assert store.is_document_current(web, None)
+    monkeypatch.setattr(document_query, "UNVERSIONED_DOCUMENT_TTL", 0)
+    assert not store.is_document_current(web, None)
+
+
+def test_store_lock_is_shared_across_event_loops():
+    lock = document_query.StoreLock()
+    events = []
+
+    async def work(name: str):
+        async with lock.hold():
+            events.append(f"{name} in")
+            async with lock.hold():  # the holding task enters again
+                await asyncio.sleep(0.05)
+            events.append(f"{name} out")
+
+    threads = [threading.Thread(target=asyncio.run, args=(work(name),)) for name in "ab"]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(events) == ["a in", "a out", "b in", "b out"]
+    assert events[0][0] == events[1][0]  # one task at a time
+
+
+class FakeVectorDB:
+    def __init__(self):
+        self.saves = 0
+
+    def save(self):
+        self.saves += 1
+
+
+def test_saves_are_coalesced_in_the_background(monkeypatch, tmp_path):
+    monkeypatch.setattr(document_query, "SAVE_DELAY_SECONDS", 0.05)
+    store = DocumentQueryStore(agent=None, db_dir=str(tmp_path))  # type: ignore[arg-type]
+    store.vector_db = FakeVectorDB()  # type: ignore[assignment]
+    for i in range(3):
+        store.manifest[f"file:///doc{i}"] = {"version": None, "indexed_at": 0, "chunks": 1}
+        store._save()
+    assert store.vector_db.saves == 0  # type: ignore[attr-defined]
+
+    for _ in range(100):
+        if store.vector_db.saves:  # type: ignore[attr-defined]
+            break
+        time.sleep(0.01)
+    time.sleep(0.1)
+    assert store.vector_db.saves == 1  # type: ignore[attr-defined]
+    assert len(json.loads((tmp_path / DocumentQueryStore.MANIFEST_FILE).read_text())) == 3
+
+
+def _stream_split(pages: list[str], chunk_size: int, chunk_overlap: int) -> list[str]:
+    splitter = document_query.StreamingTextSplitter(chunk_size, chunk_overlap)
+    chunks = []
+    for page in pages:
+        chunks += splitter.feed(page)
+    return chunks + splitter.finish()
+
+
+def _merge_overlaps(chunks: list[str]) -> list[str]:
+    # words are unique, so the longest suffix/prefix match is the overlap
+    words: list[str] = []
+    for chunk in chunks:
+        new = chunk.split()
+        overlap = next(k for k in range(min(len(words), len(new)), -1, -1) if k == 0 or words[-k:] == new[:k])
+        words += new[overlap:]
+    return words
+
+
+def test_streaming_splitter_matches_whole_text_split_of_uniform_text():
+    from langchain.text_splitter import RecursiveCharacterTextSplitter
+
+    pages = [("word%d " % i) * (40 + 37 * i) for i in range(12)]
+    expected = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=100).split_text(
+        "\n".join(pages)
+    )
+    assert _stream_split(pages, 1000, 100) == expected
+
+
+def test_streaming_splitter_keeps_all_text_with_mixed_separators():
+    rng = random.Random(0)
+    counter = iter(range(1_000_000))
+    for _ in range(100):
+        pages = [
+            "".join(f"w{next(counter)}" + rng.choice([" ", " ", " ", "\n", "\n\n"]) for _ in range(rng.randint(1, 200)))
+            for _ in range(rng.randint(1, 6))
+        ]
+        chunks = _stream_split(pages, 300, 30)
+        assert all(len(chunk) <= 300 for chunk in chunks)
+        assert _merge_overlaps(chunks) == "\n".join(pages).split()
+
+
+def test_contexts_index_the_same_document_once(monkeypatch, tmp_path):
+    from langchain_core.documents import Document
+
+    path = tmp_path / "doc.txt"
+    path.write_text("content")
+    store = DocumentQueryStore(agent=None)  # type: ignore[arg-type]
+    store.vector_db = object()  # type: ignore[assignment]
+    indexed = []
+
+    async def add_document_stream(agent, texts, document_uri, version=None, on_first_chunk=None):
+        indexed.append(document_uri)
+        # parsing runs without the store lock, the other context waits for it
+        assert store.lock.thread_lock.acquire(blocking=False)
+        store.lock.thread_lock.release()
+        await asyncio.sleep(0.05)
+        store.manifest[document_uri] = {"version": version, "indexed_at": time.time(), "chunks": 1}
+        return True, ["id"], "content"
+
+    async def get_document(document_uri):
+        return Document(page_content="content")
+
+    monkeypatch.setattr(store, "add_document_stream", add_document_stream)
+    monkeypatch.setattr(store, "get_document", get_document)
+
+    class Agent:
+        async def handle_intervention(self):
+            pass
+
+    def run():
+        helper = document_query.DocumentQueryHelper.__new__(document_query.DocumentQueryHelper)
+        helper.agent, helper.store, helper.progress_callback = Agent(), store, lambda text: None  # type: ignore
+        assert asyncio.run(helper.document_get_content(str(path), add_to_db=True)) == "content"
+
+    threads = [threading.Thread(target=run) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert indexed == [DocumentQueryStore.normalize_uri(str(path))]
+    assert not store.indexing
+
+
+class EmbeddingVectorDB(FakeVectorDB):
+    def __init__(self, store: DocumentQueryStore):
+        super().__init__()
+        self.store = store
+        self.docs = []
+
+    async def embed_documents(self, texts):
+        # embedding runs without the store lock
+        assert self.store.lock.thread_lock.acquire(blocking=False)
+        self.store.lock.thread_lock.release()
+        return [[1.0] for _ in texts]
+
+    async def insert_documents(self, docs, embeddings=None):
+        assert len(embeddings) == len(docs)
+        self.docs.extend(docs)
+        return [str(i) for i in range(len(docs))]
+
+    async def search_by_metadata(self, filter, limit=0):
+        return []
+
+
+def test_documents_are_embedded_outside_the_lock_with_total_chunks(monkeypatch):
+    store = DocumentQueryStore(agent=None)  # type: ignore[arg-type]
+    store.vector_db = EmbeddingVectorDB(store)  # type: ignore[assignment]
+    monkeypatch.setattr(store, "_save", lambda: None)
+
+    async def pages():
+        for i in range(3):
+            yield " ".join(f"page{i}word{j}" for j in range(200))
+
+    success, ids, _ = asyncio.run(store.add_document_stream(None, pages(), "/tmp/doc.txt"))  # type: ignore[arg-type]
+    docs = store.vector_db.docs  # type: ignore[attr-defined]
+    assert success and len(ids) == len(docs) > 1
+    # the total is stored with the chunks, not added after they were inserted
+    assert [doc.metadata["total_chunks"] for doc in docs] == [len(docs)] * len(docs)
+    assert [doc.metadata["chunk_index"] for doc in docs] == list(range(len(docs)))
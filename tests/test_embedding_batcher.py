@@ -0,0 +1,111 @@
+import asyncio
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+import models
+
+
+def test_concurrent_queries_share_one_request(monkeypatch):
+    calls = []
+
+    async def fake_aembedding(model, input, **kwargs):
+        calls.append(list(input))
+        await asyncio.sleep(0)
+        return SimpleNamespace(data=[{"embedding": [float(len(t))]} for t in input])
+
+    monkeypatch.setattr(models, "aembedding", fake_aembedding)
+    wrapper = models.LiteLLMEmbeddingWrapper(model="test", provider="other")
+
+    async def run():
+        return await asyncio.gather(
+            *(wrapper.aembed_query(t) for t in ["a", "bb", "a", "cccc"])
+        )
+
+    assert asyncio.run(run()) == [[1.0], [2.0], [1.0], [4.0]]
+    assert calls == [["a", "bb", "cccc"]]
+
+
+def test_errors_reach_every_waiter():
+    async def failing(texts):
+        raise RuntimeError("boom")
+
+    batcher = models.EmbeddingBatcher(failing)
+
+    async def run():
+        return await asyncio.gather(
+            batcher.submit("x"), batcher.submit("y"), return_exceptions=True
+        )
+
+    results = asyncio.run(run())
+    assert [type(r) for r in results] == [RuntimeError, RuntimeError]
+
+
+def test_full_batch_flushes_without_waiting():
+    batches = []
+
+    async def embed(texts):
+        batches.append(texts)
+        return [[0.0] for _ in texts]
+
+    batcher = models.EmbeddingBatcher(embed, window=10, max_batch=2)
+
+    async def run():
+        await asyncio.wait_for(
+            asyncio.gather(batcher.submit("a"), batcher.submit("b")), timeout=1
+        )
+
+    asyncio.run(run())
+    assert batches == [["a", "b"]]
+
+
+def test_repeated_queries_are_served_from_the_cache(monkeypatch):
+    calls = []
+
+    async def fake_aembedding(model, input, **kwargs):
+        calls.append(list(input))
+        return SimpleNamespace(data=[{"embedding": [float(len(t))]} for t in input])
+
+    monkeypatch.setattr(models, "aembedding", fake_aembedding)
+    monkeypatch.setattr(models, "query_embedding_cache", models.QueryEmbeddingCache(size=2))
+    wrapper = models.LiteLLMEmbeddingWrapper(model="cached", provider="other")
+
+    async def run():
+        first = await wrapper.aembed_query("repeated query")
+        first.append(0.0)  # callers get copies
+        return [await wrapper.aembed_query(t) for t in ["repeated query", "b", "c", "repeated query"]]
+
+    assert asyncio.run(run()) == [[14.0], [1.0], [1.0], [14.0]]
+    # evicted once two other queries were embedded
+    assert calls == [["repeated query"], ["b"], ["c"], ["repeated query"]]
+    assert models.query_embedding_cache.get_stats()["hits"] == 1
+
+
+def test_cached_queries_are_not_shared_between_providers_or_settings(monkeypatch):
+    calls = []
+
+    async def fake_aembedding(model, input, **kwargs):
+        calls.append((model, kwargs.get("dimensions")))
+        return SimpleNamespace(data=[{"embedding": [float(kwargs.get("dimensions") or 0)]} for t in input])
+
+    monkeypatch.setattr(models, "aembedding", fake_aembedding)
+    monkeypatch.setattr(models, "query_embedding_cache", models.QueryEmbeddingCache())
+    wrappers = [
+        models.LiteLLMEmbeddingWrapper(model="same", provider="one", dimensions=8),
+        models.LiteLLMEmbeddingWrapper(model="same", provider="one", dimensions=16),
+        models.LiteLLMEmbeddingWrapper(model="same", provider="two", dimensions=8),
+        models.LiteLLMEmbeddingWrapper(model="same", provider="one", dimensions=8, api_key="other"),
+    ]
+
+    async def run():
+        return [await wrapper.aembed_query("query") for wrapper in wrappers]
+
+    assert asyncio.run(run()) == [[8.0], [16.0], [8.0], [8.0]]
+    # only the api key differs for the last one, its vector is reused
+    assert calls == [("one/same", 8), ("one/same", 16), ("two/same", 8)]
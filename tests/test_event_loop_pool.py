@@ -0,0 +1,85 @@
+import asyncio
+import sys
+import threading
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from python.helpers import defer
+from python.helpers.defer import DeferredTask, EventLoopPool, EventLoopThread
+
+
+def test_keys_are_pinned_and_spread_by_load():
+    pool = EventLoopPool("TestPool", size=3)
+    names = [pool.thread_name_for(key) for key in ("a", "b", "c", "d")]
+    assert len(set(names[:3])) == 3
+    assert pool.thread_name_for("a") == names[0]
+
+    pool.release("b")
+    assert pool.thread_name_for("e") == names[1]
+    assert [m["keys"] for m in pool.get_metrics()] == [2, 1, 1]
+
+
+def test_hash_strategy_is_stable():
+    first = EventLoopPool("HashPool", size=4, strategy="hash")
+    second = EventLoopPool("HashPool", size=4, strategy="hash")
+    assert [first.thread_name_for(k) for k in "abcdef"] == [
+        second.thread_name_for(k) for k in "abcdef"
+    ]
+
+
+def test_blocked_loop_does_not_stall_other_loop(monkeypatch):
+    monkeypatch.setattr(defer, "LAG_PROBE_INTERVAL", 0.05)
+    pool = EventLoopPool("StallPool", size=2)
+
+    async def block():
+        time.sleep(0.5)  # synchronous work in one chat
+
+    async def quick():
+        return "done"
+
+    blocked = DeferredTask(pool.thread_name_for("slow")).start_task(block)
+    try:
+        time.sleep(0.05)
+        started = time.monotonic()
+        other = DeferredTask(pool.thread_name_for("fast")).start_task(quick)
+        assert other.result_sync(timeout=2) == "done"
+        assert time.monotonic() - started < 0.3
+        blocked.result_sync(timeout=2)
+        time.sleep(0.1)
+        lag = {m["thread"]: m["lag_max_ms"] for m in pool.get_metrics()}
+        assert lag["StallPool-0"] >= 300
+        assert lag["StallPool-1"] < 300
+    finally:
+        for index in range(2):
+            EventLoopThread(pool.thread_name(index)).terminate()
+
+
+def test_rate_limiter_is_shared_across_loops():
+    from python.helpers.rate_limiter import RateLimiter
+
+    limiter = RateLimiter(seconds=60, requests=1_000_000)
+    errors = []
+
+    def run():
+        async def work():
+            for _ in range(200):
+                limiter.add(requests=1)
+                await limiter.wait()
+                await asyncio.sleep(0)
+
+        try:
+            asyncio.run(work())
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=run) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert asyncio.run(limiter.get_total("requests")) == 800
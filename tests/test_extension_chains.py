@@ -0,0 +1,82 @@
+import asyncio
+import os
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from python.helpers import extension, subagents
+
+EXTENSION = """from python.helpers.extension import Extension
+
+class Ext(Extension):
+    async def execute(self, calls=None, **kwargs):
+        calls.append("{name}")
+"""
+
+
+def _write(folder: Path, file: str, name: str):
+    folder.mkdir(parents=True, exist_ok=True)
+    (folder / file).write_text(EXTENSION.format(name=name))
+
+
+def test_chains_are_cached_until_folders_change(monkeypatch, tmp_path):
+    user, default = tmp_path / "usr" / "chain_point", tmp_path / "default" / "chain_point"
+    _write(user, "_10_first.py", "first-override")
+    _write(default, "_10_first.py", "first")
+    _write(default, "_20_second.py", "second")
+
+    lookups = []
+
+    def get_paths(agent, *subpaths, **kwargs):
+        lookups.append(subpaths)
+        return [str(user), str(default)]
+
+    monkeypatch.setattr(subagents, "get_paths", get_paths)
+    monkeypatch.setattr(extension, "CHAIN_CHECK_INTERVAL", 3600)
+    extension.reload_extensions()
+    extension.clear_extension_stats()
+
+    def run() -> list[str]:
+        calls: list[str] = []
+        asyncio.run(extension.call_extensions("chain_point", None, calls=calls))
+        return calls
+
+    try:
+        assert run() == ["first-override", "second"]
+        assert run() == ["first-override", "second"]
+        assert len(lookups) == 1
+
+        # a new extension is picked up once the folder mtime is checked again
+        _write(default, "_05_zero.py", "zero")
+        stat = os.stat(default)
+        os.utime(default, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        assert run() == ["first-override", "second"]
+        monkeypatch.setattr(extension, "CHAIN_CHECK_INTERVAL", 0)
+        assert run() == ["zero", "first-override", "second"]
+        assert len(lookups) == 2
+
+        stats = {item["extension"]: item for item in extension.get_extension_stats()}
+        assert stats["_10_first"]["calls"] == 4 and stats["_05_zero"]["calls"] == 1
+        assert stats["_20_second"]["max_ms"] >= stats["_20_second"]["avg_ms"]
+    finally:
+        extension.reload_extensions()
+
+
+def test_missing_project_profile_folder_is_watched(monkeypatch, tmp_path):
+    from types import SimpleNamespace
+
+    from python.helpers import projects
+
+    monkeypatch.setattr(projects, "get_context_project_name", lambda context: "proj")
+    monkeypatch.setattr(
+        projects, "get_project_meta_folder", lambda name, *sub_dirs: str(tmp_path.joinpath(name, *sub_dirs))
+    )
+    agent = SimpleNamespace(config=SimpleNamespace(profile="dev"), context=None)
+
+    # the folder does not exist yet, its path is stamped so creating it changes the chain
+    paths = subagents.get_paths(agent, "extensions", "chain_point", must_exist_completely=False)
+    assert paths[0] == str(tmp_path / "proj" / "agents" / "dev" / "extensions" / "chain_point")
+    assert paths[0] not in subagents.get_paths(agent, "extensions", "chain_point")
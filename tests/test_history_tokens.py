@@ -0,0 +1,69 @@
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from python.helpers import history as history_module
+from python.helpers.history import Bulk, History
+
+
+def _recount(history: History) -> int:
+    def record_tokens(record) -> int:
+        if record.summary:
+            return history_module.tokens.approximate_tokens(record.summary)
+        if isinstance(record, Bulk):
+            return sum(record_tokens(r) for r in record.records)
+        return sum(m.get_tokens() for m in record.messages)
+
+    return (
+        sum(record_tokens(b) for b in history.bulks)
+        + sum(record_tokens(t) for t in history.topics)
+        + record_tokens(history.current)
+    )
+
+
+def test_cached_totals_follow_mutations():
+    history = History(agent=None)  # type: ignore[arg-type]
+    for i in range(5):
+        history.add_message(i % 2 == 1, content=f"message number {i} " * 10)
+        assert history.get_tokens() == _recount(history)
+
+    history.new_topic()
+    history.add_message(False, content="next topic")
+    assert history.get_tokens() == _recount(history)
+
+    history.topics[0].summary = "short summary"
+    assert history.get_tokens() == _recount(history)
+
+    topic = history.topics[0]
+    history.topics.remove(topic)
+    bulk = Bulk(history=history)
+    bulk.records.append(topic)
+    bulk.invalidate_tokens()
+    history.bulks.append(bulk)
+    history.invalidate_tokens()
+    assert history.get_tokens() == _recount(history)
+
+    restored = History.from_dict(history.to_dict(), History(agent=None))  # type: ignore[arg-type]
+    assert restored.get_tokens() == history.get_tokens()
+
+
+def test_summaries_are_tokenized_once(monkeypatch):
+    history = History(agent=None)  # type: ignore[arg-type]
+    history.add_message(False, content="hello")
+    history.new_topic()
+    history.topics[0].summary = "summary of the first topic"
+
+    calls = []
+    original = history_module.tokens.approximate_tokens
+    monkeypatch.setattr(
+        history_module.tokens,
+        "approximate_tokens",
+        lambda text: calls.append(text) or original(text),
+    )
+    for _ in range(10):
+        history.get_tokens()
+        history.invalidate_tokens()
+    assert calls == []
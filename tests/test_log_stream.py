@@ -0,0 +1,126 @@
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from python.helpers import log as log_module
+from python.helpers.log import CONTENT_MAX_LEN, Log
+from python.helpers.secrets import SecretsManager
+
+
+def _secrets(monkeypatch, values: dict[str, str]):
+    manager = SecretsManager("tmp/nonexistent_secrets.env")
+    manager._secrets_cache = values
+    monkeypatch.setattr(log_module, "get_secrets_manager", lambda context=None: manager)
+
+
+def test_stream_coalesces_updates(monkeypatch):
+    _secrets(monkeypatch, {})
+    log = Log()
+    first = log.log(type="info", heading="first", content="a")
+    item = log.log(type="tool", heading="streaming")
+    version = log.version
+
+    for i in range(100):
+        item.stream(content=f"chunk {i}\n")
+
+    assert list(log.updates) == [first.no, item.no]
+    assert log.version == version + 100
+    assert item.content == "".join(f"chunk {i}\n" for i in range(100))
+
+    out = log.output(start=version)
+    assert [o["no"] for o in out] == [item.no]
+    assert log.output(start=log.version) == []
+
+    first.update(content="b")
+    assert [o["no"] for o in log.output(start=version)] == [item.no, first.no]
+    assert [o["no"] for o in log.output()] == [item.no, first.no]
+
+
+def test_stream_masks_secret_split_across_chunks(monkeypatch):
+    _secrets(monkeypatch, {"API_KEY": "sk-live-123456"})
+    log = Log()
+    item = log.log(type="tool", heading="output")
+
+    item.stream(content="token is sk-li")
+    assert "sk-li" not in item.content
+    item.stream(content="ve-123")
+    item.stream(content="456 done")
+
+    assert item.content == "token is §§secret(API_KEY) done"
+    assert item.output()["content"] == item.content
+
+    item.update(content="reset sk-live-123456")
+    assert item.content == "reset §§secret(API_KEY)"
+
+
+def test_held_back_tail_is_kept_in_content(monkeypatch):
+    _secrets(monkeypatch, {"KEY": "secretvalue"})
+    log = Log()
+    item = log.log(type="tool", heading="output")
+
+    item.stream(content="wait, it is")
+    item.stream(content=" a sec")
+    # "sec" may still become the secret, it is masked like the end of the stream would
+    assert item.content == "wait, it is a ***"
+    assert item.output()["content"] == item.content
+
+    # replacing content built from it keeps the tail
+    item.update(content=item.content + "!")
+    assert item.content == "wait, it is a ***!"
+
+    item.stream(content=" se")
+    item.stream(content="cretvalue ok s")
+    assert item.content == "wait, it is a ***! §§secret(KEY) ok s"  # a 1 char prefix is not masked
+    item.end_stream()
+    assert item.content == "wait, it is a ***! §§secret(KEY) ok s"
+    assert item._stream_filter is None
+
+    item.stream(content=" secret")
+    item.end_stream()
+    assert item.content.endswith("ok s ***")
+
+
+def test_content_is_truncated_on_output(monkeypatch):
+    _secrets(monkeypatch, {})
+    log = Log()
+    item = log.log(type="tool", heading="big")
+    for _ in range(CONTENT_MAX_LEN // 100 * 2):
+        item.stream(content="x" * 100)
+
+    assert len(item.content) == CONTENT_MAX_LEN * 2
+    streamed = item.output()["content"]
+    assert len(streamed) < len(item.content)
+    assert "Characters hidden" in streamed
+
+    other = log.log(type="tool", heading="big", content=item.content)
+    assert other.output()["content"] == streamed
+    assert item.output()["content"] is streamed
+
+
+def test_growing_updates_mask_only_the_new_part(monkeypatch):
+    _secrets(monkeypatch, {"API_KEY": "sk-live-123456"})
+    masked = []
+    manager = log_module.get_secrets_manager()
+    mask_values = manager.mask_values
+    monkeypatch.setattr(manager, "mask_values", lambda text, *args, **kwargs: masked.append(text) or mask_values(text, *args, **kwargs))
+    log = Log()
+    item = log.log(type="tool", heading="output")
+
+    output = "start\n"
+    item.update(content=output)
+    for part in ["line 1 sk-li", "ve-123", "456\n", "line 2\n"]:
+        output += part
+        item.update(content=output)
+        assert "sk-li" not in item.content
+    assert item.content == "start\nline 1 §§secret(API_KEY)\nline 2\n"
+    # only the first update was masked as a whole, the growing output went through the stream filter
+    assert [text for text in masked if text.startswith("start")] == ["start\n"]
+
+    item.update(content="replaced sk-live-123456")
+    assert item.content == "replaced §§secret(API_KEY)"
+    item.update(content="replaced sk-live-123456 sk-li")
+    item.end_stream()
+    assert item.content == "replaced §§secret(API_KEY) ***"  # a partial secret at the end stays masked
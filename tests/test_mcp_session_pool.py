@@ -0,0 +1,92 @@
+import asyncio
+import sys
+from contextlib import asynccontextmanager
+from pathlib import Path
+from types import SimpleNamespace
+
+import anyio
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from mcp.server.fastmcp import FastMCP
+from mcp.shared.memory import create_client_server_memory_streams
+
+from python.helpers import mcp_handler
+
+
+def _make_server() -> FastMCP:
+    server = FastMCP("echo")
+
+    @server.tool()
+    async def echo(text: str) -> str:
+        """Echo the text back"""
+        await asyncio.sleep(0.05)
+        return text
+
+    return server
+
+
+@asynccontextmanager
+async def _memory_transport(server: FastMCP):
+    async with create_client_server_memory_streams() as (client_streams, server_streams):
+        async with anyio.create_task_group() as tg:
+            mcp_server = server._mcp_server
+            tg.start_soon(
+                lambda: mcp_server.run(
+                    *server_streams, mcp_server.create_initialization_options()
+                )
+            )
+            yield client_streams
+            tg.cancel_scope.cancel()
+
+
+class MemoryClient(mcp_handler.MCPClientBase):
+    def __init__(self, failures: int = 0):
+        super().__init__(SimpleNamespace(name="echo", init_timeout=5))  # type: ignore
+        self.failures = failures
+        self.transports = 0
+
+    async def _create_stdio_transport(self, current_exit_stack):
+        self.transports += 1
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("server not up yet")
+        return await current_exit_stack.enter_async_context(
+            _memory_transport(_make_server())
+        )
+
+
+def test_session_is_reused_concurrently_and_closed_when_idle(monkeypatch):
+    monkeypatch.setattr(mcp_handler, "MCP_IDLE_TIMEOUT", 1)
+    monkeypatch.setattr(mcp_handler, "MCP_BACKOFF_BASE", 0.01)
+    client = MemoryClient(failures=1)
+
+    async def scenario():
+        await client.update_tools()
+        assert [tool["name"] for tool in client.get_tools()] == ["echo"]
+
+        results = await asyncio.gather(
+            *[client.call_tool("echo", {"text": str(i)}) for i in range(6)]
+        )
+        assert [result.content[0].text for result in results] == [str(i) for i in range(6)]  # type: ignore
+
+        # one failed connect retried with backoff, then a single session for everything
+        assert client.transports == 2
+        stats = client.get_stats()
+        assert stats["session_open"] and stats["connects"] == 1
+        assert stats["calls"] == 7 and stats["errors"] == 0
+        assert 0 < stats["latency_avg_ms"] <= stats["latency_max_ms"]
+
+        # idle sessions are shut down and reopened on the next call
+        await asyncio.sleep(2.5)
+        assert not client.get_stats()["session_open"]
+        await client.call_tool("echo", {"text": "again"})
+        assert client.get_stats()["connects"] == 2
+
+        client.close()
+        await asyncio.sleep(0.2)
+        assert not client.get_stats()["session_open"]
+
+    asyncio.run(scenario())
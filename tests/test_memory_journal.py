@@ -0,0 +1,151 @@
+import os
+import sys
+from pathlib import Path
+
+import numpy as np
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from python.helpers import memory_journal
+from python.helpers.memory_journal import MemoryJournal
+
+import faiss
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_community.vectorstores import FAISS
+from langchain_core.embeddings import Embeddings
+
+
+class FakeEmbeddings(Embeddings):
+    def embed_documents(self, texts):
+        return [self.embed_query(t) for t in texts]
+
+    def embed_query(self, text):
+        rng = np.random.default_rng(abs(hash(text)) % (2**32))
+        return rng.random(8).tolist()
+
+
+def _new_db() -> FAISS:
+    return FAISS(
+        embedding_function=FakeEmbeddings(),
+        index=faiss.IndexFlatIP(8),
+        docstore=InMemoryDocstore(),
+        index_to_docstore_id={},
+    )
+
+
+def _load(path: str) -> FAISS:
+    return FAISS.load_local(path, FakeEmbeddings(), allow_dangerous_deserialization=True)
+
+
+def _add(db: FAISS, journal: MemoryJournal, ids: list[str]):
+    texts = [f"text {id}" for id in ids]
+    metadatas = [{"id": id} for id in ids]
+    vectors = db.embeddings.embed_documents(texts)  # type: ignore
+    db.add_embeddings(list(zip(texts, vectors)), metadatas=metadatas, ids=ids)
+    journal.log_add(ids, texts, metadatas, vectors)
+
+
+def _state(db: FAISS):
+    docs = db.docstore._dict  # type: ignore
+    return sorted((id, doc.page_content) for id, doc in docs.items())
+
+
+def test_replay_restores_changes_after_snapshot(tmp_path):
+    journal = MemoryJournal(str(tmp_path))
+    db = _new_db()
+    _add(db, journal, ["a", "b"])
+    journal.save_snapshot(db)
+    assert not os.path.exists(journal.path(memory_journal.WAL_FILE))
+
+    _add(db, journal, ["c", "d"])
+    db.delete(ids=["a"])
+    journal.log_delete(["a"])
+    db.delete(ids=["c"])
+    journal.log_delete(["c"])
+    _add(db, journal, ["c"])
+
+    # simulate a crash during the next append
+    with open(journal.path(memory_journal.WAL_FILE), "ab") as f:
+        f.write(b"\x50\x00\x00\x00partial")
+
+    loaded = _load(str(tmp_path))
+    assert MemoryJournal(str(tmp_path)).replay(loaded) == 4
+    assert _state(loaded) == _state(db)
+    assert memory_journal.is_consistent(loaded)
+
+    # the torn tail is cut, replaying twice changes nothing
+    _add(db, journal, ["e"])
+    assert MemoryJournal(str(tmp_path)).replay(loaded) == 5
+    assert _state(loaded) == _state(db)
+
+
+def test_background_compaction_folds_log_into_snapshot(tmp_path):
+    journal = MemoryJournal(str(tmp_path))
+    db = _new_db()
+    journal.save_snapshot(db)
+    _add(db, journal, ["a", "b", "c"])
+
+    journal.compact(db)
+    _add(db, journal, ["d"])  # written while the snapshot is being saved
+    journal.wait()
+
+    assert not os.path.exists(journal.path(memory_journal.COMPACTING_FILE))
+    assert len(MemoryJournal.read_records(journal.path(memory_journal.WAL_FILE))) == 1
+
+    loaded = _load(str(tmp_path))
+    assert len(_state(loaded)) == 3
+    MemoryJournal(str(tmp_path)).replay(loaded)
+    assert _state(loaded) == _state(db)
+
+
+def test_compaction_folds_log_into_snapshot_files_without_the_db(tmp_path):
+    journal = MemoryJournal(str(tmp_path))
+    db = _new_db()
+    _add(db, journal, ["a", "b"])
+    journal.save_snapshot(db)
+    _add(db, journal, ["c"])
+    db.delete(ids=["a"])
+    journal.log_delete(["a"])
+
+    journal.compact(None, background=False)  # type: ignore  # built from the files and the rotated log
+    assert not os.path.exists(journal.path(memory_journal.COMPACTING_FILE))
+    loaded = _load(str(tmp_path))
+    assert _state(loaded) == _state(db)
+    assert MemoryJournal(str(tmp_path)).replay(loaded) == 0
+
+
+def test_interrupted_snapshot_swap_is_finished_on_recover(tmp_path):
+    journal = MemoryJournal(str(tmp_path))
+    db = _new_db()
+    _add(db, journal, ["a", "b"])
+    journal.save_snapshot(db)
+
+    # same document count in both snapshots, a size check could not tell them apart
+    db.delete(ids=["a"])
+    _add(db, journal, ["c"])
+    index_bytes, docstore_bytes = MemoryJournal._capture(db)
+    for name, data in ((memory_journal.DOCSTORE_FILE, docstore_bytes), (memory_journal.INDEX_FILE, index_bytes.tobytes())):
+        Path(journal.path(name + ".tmp")).write_bytes(data)
+    journal._write_manifest({"generation": 2, "swapping": True})
+    os.replace(journal.path(memory_journal.DOCSTORE_FILE + ".tmp"), journal.path(memory_journal.DOCSTORE_FILE))  # crash here
+
+    MemoryJournal(str(tmp_path)).recover()
+    assert _state(_load(str(tmp_path))) == _state(db)
+    assert journal._read_manifest() == {"generation": 2, "swapping": False}
+
+
+def test_discard_log_keeps_restored_logs(tmp_path):
+    journal = MemoryJournal(str(tmp_path))
+    db = _new_db()
+    journal.save_snapshot(db)
+    _add(db, journal, ["a"])
+    os.replace(journal.path(memory_journal.WAL_FILE), journal.path(memory_journal.COMPACTING_FILE))
+    _add(db, journal, ["b"])
+
+    journal.discard_log(keep=[memory_journal.WAL_FILE])
+    assert not os.path.exists(journal.path(memory_journal.COMPACTING_FILE))
+    assert len(MemoryJournal.read_records(journal.path(memory_journal.WAL_FILE))) == 1
+    journal.discard_log()
+    assert not os.path.exists(journal.path(memory_journal.WAL_FILE)) and journal.records == 0
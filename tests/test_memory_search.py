@@ -0,0 +1,171 @@
+import asyncio
+import math
+import sys
+from pathlib import Path
+
+import faiss
+from langchain_community.vectorstores.utils import DistanceStrategy
+from langchain_core.embeddings import Embeddings
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from python.helpers.memory import Memory, MyFaiss
+from python.helpers.memory_consolidation import MemoryConsolidator, ConsolidationConfig
+from python.helpers.metadata_filter import IndexedDocstore
+
+
+class CountingEmbeddings(Embeddings):
+    def __init__(self):
+        self.queries = []
+
+    def embed_documents(self, texts):
+        return [self.embed_query(text) for text in texts]
+
+    def embed_query(self, text):
+        self.queries.append(text)
+        angle = len(text) / 10
+        return [math.cos(angle), math.sin(angle)]
+
+
+def _make_memory(embeddings: Embeddings) -> Memory:
+    db = MyFaiss(
+        embedding_function=embeddings,
+        index=faiss.IndexFlatIP(2),
+        docstore=IndexedDocstore(),
+        index_to_docstore_id={},
+        distance_strategy=DistanceStrategy.COSINE,
+        relevance_score_fn=Memory._cosine_normalizer,
+    )
+    texts = ["a", "bb", "ccc", "dddd", "eeeee"]
+    areas = ["main", "fragments", "solutions", "main", "solutions"]
+    db.add_texts(texts, [{"area": a, "id": t} for t, a in zip(texts, areas)], ids=texts)
+    return Memory(db, "test")
+
+
+def test_multi_search_embeds_query_once():
+    embeddings = CountingEmbeddings()
+    memory = _make_memory(embeddings)
+    searches = [
+        {"limit": 3, "threshold": 0.5, "filter": "area == 'main' or area == 'fragments'"},
+        {"limit": 1, "threshold": 0.5, "filter": "area == 'solutions'"},
+        {"limit": 5, "threshold": 0.995},
+    ]
+
+    async def scenario():
+        embeddings.queries.clear()
+        results = await memory.search_similarity_threshold_multi("ccc", searches)
+        assert embeddings.queries == ["ccc"]
+        singles = [await memory.search_similarity_threshold("ccc", **search) for search in searches]
+        return results, singles
+
+    results, singles = asyncio.run(scenario())
+    assert [sorted(doc.page_content for doc in docs) for docs in results] == [
+        ["a", "bb", "dddd"],
+        ["ccc"],
+        ["bb", "ccc", "dddd"],
+    ]
+    assert results == singles
+
+
+def test_batch_search_returns_scores_of_single_searches():
+    embeddings = CountingEmbeddings()
+    memory = _make_memory(embeddings)
+    queries = ["a", "ccc", "eeeee"]
+    calls = []
+    search = memory.db.similarity_search_with_score_by_vectors
+    memory.db.similarity_search_with_score_by_vectors = lambda *args, **kwargs: calls.append(args) or search(*args, **kwargs)  # type: ignore
+
+    async def scenario():
+        results = await memory.search_similarity_threshold_batch(queries, limit=2, threshold=0.9, filter="area != 'fragments'")
+        singles = [await memory.search_similarity_threshold(q, limit=2, threshold=0.9, filter="area != 'fragments'") for q in queries]
+        return results, singles
+
+    results, singles = asyncio.run(scenario())
+    assert len(calls) == 1 and len(calls[0][0]) == 3
+    assert [[doc for doc, _ in docs] for docs in results] == singles
+    for query, docs in zip(queries, results):
+        for doc, score in docs:
+            cosine = math.cos((len(query) - len(doc.page_content)) / 10)
+            assert math.isclose(score, (1 + cosine) / 2, rel_tol=1e-5)
+
+
+class FakeAgent:
+    def __init__(self):
+        self.keyword_calls = 0
+
+    def read_prompt(self, file, **kwargs):
+        return kwargs.get("memory_content", file)
+
+    async def call_utility_model(self, system, message, background=False):
+        self.keyword_calls += 1
+        return '["' + message[:1] * 4 + '"]'
+
+
+def test_consolidator_finds_similar_memories_in_one_pass(monkeypatch):
+    memory = _make_memory(CountingEmbeddings())
+    agent = FakeAgent()
+    consolidator = MemoryConsolidator(agent, ConsolidationConfig(similarity_threshold=0.99, max_llm_context_memories=2))  # type: ignore
+    searches = []
+    search = memory.search_similarity_threshold_batch
+
+    async def get_memory(agent):
+        return memory
+
+    async def batch(queries, **kwargs):
+        searches.append(queries)
+        return await search(queries, **kwargs)
+
+    monkeypatch.setattr(Memory, "get", get_memory)
+    monkeypatch.setattr(memory, "search_similarity_threshold_batch", batch)
+
+    found = asyncio.run(consolidator.find_similar_memories(["aa", "ee"], "main"))
+    assert agent.keyword_calls == 2
+    assert searches == [["aa", "aaaa", "ee", "eeee"]]
+    # "a" and "dddd" are the main memories, each keeps its best score over the memory and its keywords
+    assert [[doc.page_content for doc, _ in docs] for docs in found] == [["dddd", "a"], ["dddd", "a"]]
+    assert math.isclose(found[0][0][1], 1.0, rel_tol=1e-5)  # keyword "aaaa" matches "dddd" exactly
+    assert math.isclose(found[0][1][1], (1 + math.cos(0.1)) / 2, rel_tol=1e-5)  # "aa" itself is closest to "a"
+
+
+class NullJournal:
+    def log_add(self, *args):
+        pass
+
+    def log_delete(self, *args):
+        pass
+
+    def maybe_compact(self, db):
+        pass
+
+
+def test_consolidation_searches_again_when_batch_changed_similar_memories(monkeypatch):
+    from python.helpers.memory_consolidation import ConsolidationAction, ConsolidationResult
+
+    memory = _make_memory(CountingEmbeddings())
+    monkeypatch.setattr(memory, "_journal", lambda: NullJournal())
+    consolidator = MemoryConsolidator(FakeAgent(), ConsolidationConfig(similarity_threshold=0.99))  # type: ignore
+    analyzed = []
+
+    async def get_memory(agent):
+        return memory
+
+    async def analyze(context, log_item=None):
+        analyzed.append([doc.page_content for doc in context.similar_memories])
+        if len(analyzed) == 1:
+            return ConsolidationResult(ConsolidationAction.MERGE, memories_to_remove=["a"], new_memory_content="ab")
+        return ConsolidationResult(ConsolidationAction.SKIP)
+
+    monkeypatch.setattr(Memory, "get", get_memory)
+    monkeypatch.setattr(consolidator, "_analyze_memory_consolidation", analyze)
+
+    async def scenario():
+        similar = await consolidator.find_similar_memories(["a", "b"], "main")
+        for text, found in zip(["a", "b"], similar):
+            await consolidator.process_new_memory(text, "main", {"area": "main"}, similar_memories=found)
+
+    asyncio.run(scenario())
+    # the second memory sees the merged memory instead of the deleted one it was found with
+    assert "a" in analyzed[0]
+    assert "a" not in analyzed[1] and "ab" in analyzed[1]
@@ -0,0 +1,101 @@
+import pickle
+import sys
+from pathlib import Path
+
+import faiss
+import numpy as np
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_community.vectorstores.utils import DistanceStrategy
+from langchain_core.embeddings import Embeddings
+from simpleeval import simple_eval
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from python.helpers.metadata_filter import IndexedDocstore, IndexedFAISS, compile_filter
+
+FILTERS = [
+    "area == 'main'",
+    "area=='main' or area == 'fragments'",
+    "'main' == area and score > 0.5",
+    "not area == 'solutions'",
+    "area != 'main' and missing == 1",
+    "1 < score <= 2",
+    "area in 'main fragments'",
+    "str(score) == '1'",
+    "area == ",
+    "",
+]
+METADATA = [
+    {"area": "main", "score": 1},
+    {"area": "fragments", "score": 0.2},
+    {"area": "solutions", "score": 2},
+    {"score": 3},
+    {"area": ["main"], "missing": 1},
+]
+
+
+def _simple_eval(condition, data):
+    try:
+        return bool(simple_eval(condition, names=data))
+    except Exception:
+        return False
+
+
+def test_compiled_filter_matches_simple_eval():
+    for condition in FILTERS:
+        compiled = compile_filter(condition)
+        assert compile_filter(condition) is compiled
+        for data in METADATA:
+            assert compiled(data) == _simple_eval(condition, data), (condition, data)
+
+
+class AxisEmbeddings(Embeddings):
+    def embed_documents(self, texts):
+        return [self.embed_query(text) for text in texts]
+
+    def embed_query(self, text):
+        # "x.y" points mostly along the x axis, y breaks ties
+        x, y = (float(v) for v in text.split("."))
+        vector = np.array([1.0, x, y / 100], dtype=np.float32)
+        return (vector / np.linalg.norm(vector)).tolist()
+
+
+def _make_db():
+    return IndexedFAISS(
+        embedding_function=AxisEmbeddings(),
+        index=faiss.IndexFlatIP(3),
+        docstore=IndexedDocstore(),
+        index_to_docstore_id={},
+        distance_strategy=DistanceStrategy.COSINE,
+    )
+
+
+def test_filtered_search_scans_only_matching_documents():
+    db = _make_db()
+    texts = [f"1.{i}" for i in range(50)] + ["0.0", "0.1"]
+    areas = ["main"] * 50 + ["solutions", "fragments"]
+    ids = db.add_texts(texts, [{"area": a} for a in areas], ids=[f"id{i}" for i in range(52)])
+
+    # the solution ranks far behind 50 main memories, post-filtering fetch_k candidates misses it
+    condition = "area == 'solutions'"
+    assert db.similarity_search_with_score("1.0", k=1, filter=lambda m: m["area"] == "solutions") == []
+    [(doc, _)] = db.similarity_search_with_score("1.0", k=1, filter=compile_filter(condition))
+    assert doc.page_content == "0.0"
+
+    found = db.similarity_search_with_score("1.0", k=3, filter=compile_filter("area == 'main' or area == 'fragments'"))
+    assert [doc.page_content for doc, _ in found] == ["1.0", "1.1", "1.2"]
+    mixed = compile_filter("area == 'fragments' and page == 1")
+    assert db.filter_candidates(mixed) == ({"id51": None}, False)
+    assert db.similarity_search_with_score("1.0", k=3, filter=mixed) == []
+
+    # indexes and positions follow deletes and reloads
+    db.delete(ids[:49] + ["id50"])
+    assert db.filter_candidates(condition) == ({}, True)
+    assert [d.page_content for d, _ in db.similarity_search_with_score("0.0", k=5, filter=compile_filter("area == 'main'"))] == ["1.49"]
+
+    docstore, mapping = pickle.loads(pickle.dumps((db.docstore, db.index_to_docstore_id)))
+    assert type(docstore) is InMemoryDocstore
+    loaded = IndexedFAISS(AxisEmbeddings(), db.index, docstore, mapping, distance_strategy=DistanceStrategy.COSINE)
+    assert loaded.filter_candidates("area == 'fragments'") == ({"id51": None}, True)
@@ -0,0 +1,90 @@
+import asyncio
+import gc
+import sys
+import threading
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+import models
+from python.helpers import settings
+
+
+class FakeSentenceTransformer:
+    loads = 0
+
+    def __init__(self, name, **kwargs):
+        FakeSentenceTransformer.loads += 1
+        self.batches = []
+        self.release = threading.Event()
+
+    def encode(self, texts, convert_to_tensor=False):
+        self.batches.append(list(texts))
+        self.release.wait(5)
+        return [[float(len(t))] for t in texts]
+
+
+def test_wrappers_are_shared_until_settings_change(monkeypatch):
+    monkeypatch.delenv("API_KEY_OPENAI", raising=False)
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+    models.clear_model_cache()
+
+    chat = models.get_chat_model("OpenAI", "gpt-test", temperature=0)
+    assert models.get_chat_model("openai", "gpt-test", temperature=0) is chat
+    assert models.get_chat_model("openai", "gpt-test", temperature=1) is not chat
+    config = models.ModelConfig(models.ModelType.CHAT, "openai", "gpt-test", kwargs={"a": [1]})
+    assert models.get_chat_model("openai", "gpt-test", config, temperature=0) is not chat
+
+    settings.reload_settings()
+    assert models.get_chat_model("openai", "gpt-test", temperature=0) is not chat
+
+    # round-robin keys are handed out per model, never shared
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-a,sk-b")
+    first = models.get_chat_model("openai", "gpt-test")
+    second = models.get_chat_model("openai", "gpt-test")
+    assert first is not second and first.kwargs["api_key"] != second.kwargs["api_key"]
+
+
+def test_local_model_loaded_once_and_requests_batched(monkeypatch):
+    monkeypatch.setattr(models, "SentenceTransformer", FakeSentenceTransformer)
+    monkeypatch.setattr(models, "EMBED_INFERENCE_THREAD", True)
+    models.clear_model_cache()
+    FakeSentenceTransformer.loads = 0
+
+    name = "sentence-transformers/fake-model"
+    config = models.ModelConfig(models.ModelType.EMBEDDING, "huggingface", name)
+    first = models.get_embedding_model("huggingface", name)
+    second = models.get_embedding_model("huggingface", name, model_config=config)
+    assert first is models.get_embedding_model("huggingface", name)
+    assert first is not second and first.model is second.model  # type: ignore
+    assert FakeSentenceTransformer.loads == 1
+    model: FakeSentenceTransformer = first.model  # type: ignore
+
+    async def scenario():
+        # the first request blocks the inference thread, the rest queue up behind it
+        blocked = asyncio.ensure_future(first.aembed_documents(["x"]))
+        while not model.batches:
+            await asyncio.sleep(0.01)
+        queued = [
+            asyncio.ensure_future(wrapper.aembed_documents(texts))
+            for wrapper, texts in [(first, ["a", "bb"]), (second, ["ccc"]), (second, ["dddd"])]
+        ]
+        await asyncio.sleep(0.1)
+        model.release.set()
+        return await blocked, await asyncio.gather(*queued)
+
+    blocked, queued = asyncio.run(scenario())
+    assert blocked == [[1.0]]
+    assert queued == [[[1.0], [2.0]], [[3.0]], [[4.0]]]
+    assert model.batches == [["x"], ["a", "bb", "ccc", "dddd"]]
+    assert second.embed_query("eeeee") == [5.0]
+
+    # unloaded once no wrapper uses it anymore
+    [stats] = [s for s in models.get_local_model_stats() if s["model"] == "fake-model"]
+    assert stats["refs"] == 2 and stats["batches"] == 3
+    models.clear_model_cache()
+    del first, second, model
+    gc.collect()
+    assert all(s["model"] != "fake-model" for s in models.get_local_model_stats())
@@ -0,0 +1,132 @@
+import random
+import string
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from python.helpers import secrets as secrets_module
+from python.helpers.secrets import (
+    SecretsManager,
+    SecretsMasker,
+    StreamingSecretsFilter,
+    alias_for_key,
+)
+
+
+def _reference_mask(text: str, secrets: dict[str, str], min_length: int = 4) -> str:
+    for key, value in sorted(secrets.items(), key=lambda x: len(x[1]), reverse=True):
+        if value and len(value.strip()) >= min_length:
+            text = text.replace(value, alias_for_key(key))
+    return text
+
+
+def _sample(seed: int) -> tuple[dict[str, str], str]:
+    rng = random.Random(seed)
+    alphabet = string.ascii_letters + string.digits
+    secrets = {
+        f"KEY_{i}": "".join(rng.choices(alphabet, k=rng.randint(6, 24)))
+        for i in range(30)
+    }
+    values = list(secrets.values())
+    parts = []
+    for _ in range(300):
+        parts.append(" ".join(rng.choices(["foo", "bar", "baz", "\n"], k=5)))
+        if rng.random() < 0.3:
+            parts.append(rng.choice(values))
+    return secrets, " ".join(parts)
+
+
+class _PythonAutomaton:
+    # stand-in with the part of the pyahocorasick API the masker uses, all matches ordered by end
+
+    def __init__(self):
+        self.words = {}
+
+    def add_word(self, word, value):
+        self.words[word] = value
+
+    def make_automaton(self):
+        pass
+
+    def iter(self, text):
+        matches = []
+        for word, value in self.words.items():
+            start = text.find(word)
+            while start != -1:
+                matches.append((start + len(word) - 1, -len(word), value))
+                start = text.find(word, start + 1)
+        return [(end, value) for end, _, value in sorted(matches)]
+
+
+@pytest.fixture(params=["automaton", "fallback"])
+def backend(request, monkeypatch):
+    if request.param == "automaton":
+        if secrets_module.ahocorasick is None:
+            # the library is optional, run the automaton path on a pure python stand-in
+            monkeypatch.setattr(secrets_module, "ahocorasick", SimpleNamespace(Automaton=_PythonAutomaton))
+    else:
+        monkeypatch.setattr(secrets_module, "ahocorasick", None)
+    return request.param
+
+
+def test_masker_matches_sequential_replace(backend):
+    for seed in range(5):
+        secrets, text = _sample(seed)
+        masker = SecretsMasker(secrets, min_length=4)
+        assert masker.mask(text) == _reference_mask(text, secrets)
+    # longest value wins over its own prefix
+    secrets = {"SHORT": "abcd", "LONG": "abcdef12"}
+    assert SecretsMasker(secrets).mask("x abcdef12 abcd") == (
+        "x §§secret(LONG) §§secret(SHORT)"
+    )
+
+
+def test_overlapping_secrets_are_masked_longest_first(backend):
+    secrets = {"A": "abcdef", "B": "cdefghijkl"}
+    masker = SecretsMasker(secrets)
+    assert (masker._automaton is None) == (backend == "fallback")
+    assert masker.mask("abcdefghijkl") == "ab§§secret(B)"
+    assert masker.mask("abcdef cdefghijkl") == "§§secret(A) §§secret(B)"
+
+    rng = random.Random(3)
+    for _ in range(200):
+        secrets = {f"K{i}": "".join(rng.choices("xyz", k=rng.randint(4, 9))) for i in range(5)}
+        text = "".join(rng.choices("xyz ", k=120))
+        assert SecretsMasker(secrets, min_length=4).mask(text) == _reference_mask(text, secrets), (secrets, text)
+
+
+def test_streaming_filter_matches_whole_text(backend):
+    secrets, text = _sample(7)
+    masker = SecretsMasker(secrets)
+    rng = random.Random(7)
+    stream = StreamingSecretsFilter(secrets, masker=masker)
+    out, pos = [], 0
+    while pos < len(text):
+        size = rng.randint(1, 12)
+        out.append(stream.process_chunk(text[pos : pos + size]))
+        assert len(stream.pending) <= masker.max_len
+        pos += size
+    out.append(stream.finalize())
+    assert "".join(out) == masker.mask(text)
+
+
+def test_manager_rebuilds_masker_per_revision():
+    manager = SecretsManager("tmp/nonexistent_secrets.env")
+    manager._secrets_cache = {"TOKEN": "first-secret"}
+    masker = manager.get_masker()
+    assert manager.get_masker() is masker
+    assert manager.mask_values("a first-secret") == "a §§secret(TOKEN)"
+
+    manager.clear_cache()
+    manager._secrets_cache = {"TOKEN": "second-secret"}
+    assert manager.get_masker() is not masker
+    assert manager.mask_values("a first-secret second-secret") == (
+        "a first-secret §§secret(TOKEN)"
+    )
+    assert manager.create_streaming_filter().masker is manager.get_masker(min_length=1)
@@ -0,0 +1,51 @@
+import copy
+import sys
+from pathlib import Path
+
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from python.helpers import dotenv, files, settings
+from python.helpers.secrets import get_default_secrets_manager
+
+
+def test_settings_snapshot_is_shared_until_invalidated(monkeypatch):
+    reads = []
+    read_file = files.read_file
+    monkeypatch.setattr(files, "read_file", lambda *args, **kwargs: reads.append(args) or read_file(*args, **kwargs))
+    monkeypatch.setattr(settings, "FILE_CHECK_INTERVAL", 3600)
+
+    first = settings.reload_settings()
+    loads = settings.get_cache_stats()["loads"]
+    reads.clear()
+
+    # hot path: same snapshot, no disk reads
+    for _ in range(100):
+        assert settings.get_settings() is first
+    assert reads == []
+    assert settings.get_cache_stats()["loads"] == loads
+
+    # read-only, copies are mutable and detached
+    with pytest.raises(TypeError):
+        first["chat_model_name"] = "changed"  # type: ignore
+    with pytest.raises(TypeError):
+        first["api_keys"]["x"] = "y"  # type: ignore
+    mutable = first.copy()
+    mutable["api_keys"]["x"] = "y"
+    assert "x" not in first["api_keys"]
+    assert copy.deepcopy(first) == first
+    assert settings.merge_settings(first, {"chat_model_name": "m"})["chat_model_name"] == "m"
+
+    # reloading the environment or saving secrets gives a new snapshot
+    version = settings.get_settings_version()
+    dotenv.load_dotenv()
+    second = settings.get_settings()
+    assert second is not first and second == first
+    assert settings.get_settings_version() != version
+
+    get_default_secrets_manager()._invalidate_all_caches()
+    assert settings.get_settings() is not second
+    assert settings.get_cache_stats()["loads"] == loads + 2
@@ -0,0 +1,124 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from agent import AgentContext
+from initialize import initialize_agent
+
+
+def _entry(snapshot, ctxid):
+    return next(c for c in snapshot["contexts"] if c["id"] == ctxid)
+
+
+@pytest.mark.asyncio
+async def test_unchanged_contexts_reuse_serialized_entries():
+    from python.helpers import state_snapshot as snapshot
+
+    config = initialize_agent()
+    ids = ["ctx-delta-a", "ctx-delta-b"]
+    contexts = [AgentContext(config=config, id=ctxid, set_current=False) for ctxid in ids]
+    try:
+        first = await snapshot.build_snapshot(
+            context=None, log_from=0, notifications_from=0, timezone="UTC"
+        )
+        second = await snapshot.build_snapshot(
+            context=None, log_from=0, notifications_from=0, timezone="UTC"
+        )
+        assert _entry(first, ids[0]) is _entry(second, ids[0])
+
+        contexts[0].log.log(type="user", heading="hi", content="hello")
+        third = await snapshot.build_snapshot(
+            context=None, log_from=0, notifications_from=0, timezone="UTC"
+        )
+        assert _entry(third, ids[0]) is not _entry(first, ids[0])
+        assert _entry(third, ids[0])["log_version"] == contexts[0].log.version
+        assert _entry(third, ids[1]) is _entry(first, ids[1])
+
+        full, delta, sent = snapshot.diff_snapshot(first, None)
+        assert delta is None and full["contexts"] == first["contexts"]
+
+        AgentContext.remove(ids[1])
+        fourth = await snapshot.build_snapshot(
+            context=None, log_from=0, notifications_from=0, timezone="UTC"
+        )
+        changed, delta, _ = snapshot.diff_snapshot(fourth, sent)
+        assert [c["id"] for c in changed["contexts"]] == [ids[0]]
+        assert delta == {"contexts_removed": [ids[1]], "tasks_removed": []}
+    finally:
+        for ctxid in ids:
+            AgentContext.remove(ctxid)
+
+
+@pytest.mark.asyncio
+async def test_state_monitor_pushes_deltas_after_first_snapshot(monkeypatch):
+    import asyncio
+    from unittest.mock import AsyncMock
+
+    from python.helpers.state_monitor import StateMonitor
+    from python.helpers.state_snapshot import StateRequestV1
+
+    loop = asyncio.get_running_loop()
+    payloads: list[dict] = []
+    pushed = asyncio.Event()
+
+    async def _emit_to(namespace, sid, event_type, payload, **_kwargs):
+        payloads.append(payload)
+        pushed.set()
+
+    class FakeManager:
+        def __init__(self):
+            self._dispatcher_loop = loop
+            self.emit_to = AsyncMock(side_effect=_emit_to)
+
+    a, b = {"id": "a", "created_at": "2"}, {"id": "b", "created_at": "1"}
+    contexts = [a, b]
+
+    async def _fake_snapshot(**_kwargs):
+        return {
+            "log_version": 0,
+            "notifications_version": 0,
+            "logs": [],
+            "contexts": list(contexts),
+            "tasks": [],
+            "notifications": [],
+        }
+
+    monkeypatch.setattr("python.helpers.state_monitor.build_snapshot_from_request", _fake_snapshot)
+
+    monitor = StateMonitor(debounce_seconds=0.0)
+    monitor.bind_manager(FakeManager(), handler_id="tester")
+    monitor.register_sid("/state_sync", "sid")
+    request = StateRequestV1(context=None, log_from=0, notifications_from=0, timezone="UTC")
+    monitor.update_projection("/state_sync", "sid", request=request, seq_base=1)
+
+    async def push():
+        pushed.clear()
+        monitor.mark_dirty("/state_sync", "sid")
+        await asyncio.wait_for(pushed.wait(), timeout=1.0)
+        await asyncio.sleep(0)
+
+    await push()
+    assert "delta" not in payloads[-1]
+    assert payloads[-1]["snapshot"]["contexts"] == [a, b]
+
+    contexts[1] = {"id": "b", "created_at": "1", "name": "renamed"}
+    await push()
+    assert payloads[-1]["delta"] == {"contexts_removed": [], "tasks_removed": [], "base_seq": 2}
+    assert payloads[-1]["snapshot"]["contexts"] == [contexts[1]]
+
+    contexts.pop(0)
+    await push()
+    assert payloads[-1]["delta"]["contexts_removed"] == ["a"]
+    assert payloads[-1]["snapshot"]["contexts"] == []
+
+    # a new state_request starts over with a full snapshot
+    monitor.update_projection("/state_sync", "sid", request=request, seq_base=1)
+    await push()
+    assert "delta" not in payloads[-1]
+    assert payloads[-1]["snapshot"]["contexts"] == contexts
+    monitor.unregister_sid("/state_sync", "sid")
@@ -0,0 +1,98 @@
+import asyncio
+import json
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from python.helpers import task_scheduler
+from python.helpers.task_scheduler import (
+    PlannedTask,
+    ScheduledTask,
+    SchedulerTaskList,
+    TaskPlan,
+    TaskSchedule,
+    TaskState,
+)
+from python.helpers.timer_heap import TimerHeap
+
+
+def test_timer_heap_reschedule_and_cancel():
+    timers = TimerHeap()
+    for i in range(100):
+        timers.schedule("a", 100.0 - i)
+    timers.schedule("b", 50.0)
+    timers.schedule("c", 10.0)
+    timers.cancel("c")
+
+    assert len(timers) == 2
+    assert timers.next_time() == 1.0
+    assert timers.pop_due(49.0) == [("a", 1.0)]
+    assert timers.pop_due(49.0) == []
+    assert timers.pop_due(60.0) == [("b", 50.0)]
+    assert timers.next_time() is None
+
+
+def test_due_tasks_from_timers_without_reloading(monkeypatch, tmp_path):
+    monkeypatch.setattr(task_scheduler, "SCHEDULER_FOLDER", str(tmp_path))
+    reads = []
+    read_file = task_scheduler.read_file
+    monkeypatch.setattr(task_scheduler, "read_file", lambda path: reads.append(path) or read_file(path))
+    path = tmp_path / "tasks.json"
+
+    async def scenario():
+        tasks = SchedulerTaskList()
+        schedule = TaskSchedule(minute="*/5", hour="*", day="*", month="*", weekday="*", timezone="UTC")
+        task = ScheduledTask.create("every 5", "system", "prompt", schedule, timezone="UTC")
+        await tasks.add_task(task)
+        await tasks.save()
+        assert not path.exists()  # written behind
+        tasks.flush()
+        assert json.loads(path.read_text())["tasks"][0]["uuid"] == task.uuid
+
+        fire = datetime.fromtimestamp(tasks.get_next_due_time(), timezone.utc)  # type: ignore
+        assert fire.minute % 5 == 0 and fire.second == 0
+        assert fire > datetime.now(timezone.utc)
+
+        assert await tasks.get_due_tasks(fire - timedelta(seconds=1)) == []
+        assert await tasks.get_due_tasks(fire) == [task]
+        # at most once per fire time, the next one computed from it
+        assert await tasks.get_due_tasks(fire + timedelta(seconds=30)) == []
+        assert tasks.get_next_due_time() == (fire + timedelta(minutes=5)).timestamp()
+        assert reads == []
+
+        # external edit picked up by mtime, a past planned launch fires right away
+        planned = PlannedTask.create(
+            "planned", "system", "prompt",
+            TaskPlan.create(todo=[datetime.now(timezone.utc) - timedelta(minutes=1)]),
+        )
+        data = json.loads(path.read_text())
+        data["tasks"].append(json.loads(planned.model_dump_json()))
+        path.write_text(json.dumps(data))
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+        due = await tasks.get_due_tasks()
+        assert [t.uuid for t in due] == [planned.uuid] and len(reads) == 1
+        await tasks.update_task_by_uuid(planned.uuid, lambda t: t.update(state=TaskState.RUNNING))
+        await tasks.update_task_by_uuid(planned.uuid, lambda t: t.update(state=TaskState.IDLE))
+        assert await tasks.get_due_tasks() == []
+
+        # the launch moves on, the next planned time is armed
+        next_launch = datetime.now(timezone.utc) + timedelta(hours=1)
+        entry = tasks.get_task_by_uuid(planned.uuid)
+        assert isinstance(entry, PlannedTask)
+        entry.plan.set_in_progress(entry.plan.todo[0])
+        entry.plan.add_todo(next_launch)
+        await tasks.save()
+        assert tasks._timers.get(planned.uuid) == next_launch.timestamp()
+        assert len(reads) == 1
+
+        tasks.flush()
+        assert len(json.loads(path.read_text())["tasks"]) == 2
+
+    asyncio.run(scenario())
@@ -0,0 +1,75 @@
+import random
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from python.helpers.messages import truncate_text
+from python.helpers.shell_ssh import clean_string
+from python.helpers.terminal_output import TerminalOutput
+
+SAMPLES = [
+    "\r\r\n> \r\n>  hello\x1b[31mred\x1b[0m\r\nprogress 10%\rprogress 50%\rprogress 100%\r\nroot@abc:~# ",
+    "   \r\n\x00plain line\nsecond\r\n  \r\nthird\x1b[?2004h end\n",
+    ">>> x = 1\r\n>>> print(x)\r\n1\r\n>>> ",
+    "\n\nleading newlines\n",
+    "a\rb\r\nc" * 50,
+]
+
+
+def _feed(output: TerminalOutput, text: str, rng: random.Random):
+    i = 0
+    while i < len(text):
+        n = rng.randint(1, 12)
+        output.feed(text[i : i + n])
+        i += n
+
+
+def test_incremental_cleaning_matches_clean_string():
+    rng = random.Random(1)
+    noise = "".join(
+        rng.choice(["a", "b", " ", "\r", "\n", "\x1b[1m", ">", "\x00", "é"]) for _ in range(2000)
+    )
+    for text in SAMPLES + [noise]:
+        for _ in range(50):
+            output = TerminalOutput()
+            _feed(output, text, rng)
+            expected = clean_string(text)
+            assert output.text() == expected
+            assert len(output) == len(expected)
+            assert output.last_lines(3) == expected.splitlines()[-3:]
+
+
+def test_output_is_bounded_and_truncated_like_messages():
+    agent = SimpleNamespace(read_prompt=lambda name, length: f"[{length} characters removed]")
+    text = "".join(f"line {i}\r\n" for i in range(20000))
+    expected = clean_string(text)
+
+    output = TerminalOutput(limit=1000)
+    _feed(output, text, random.Random(2))
+
+    assert output.dropped > 0
+    assert len(output.text()) <= 1000
+    assert len(output) == len(expected)
+    assert output.truncated(1000, lambda length: agent.read_prompt("", length)) == truncate_text(
+        agent, expected, threshold=1000
+    )
+    assert output.last_lines(2) == expected.splitlines()[-2:]
+
+
+def test_repainted_line_stays_bounded():
+    text = "start\n" + "".join(f"\rprogress {i}%" for i in range(20000)) + "\r   \rdone"
+    expected = clean_string(text)
+    output = TerminalOutput()
+    rng = random.Random(3)
+    i = 0
+    while i < len(text):
+        n = rng.randint(1, 12)
+        output.feed(text[i : i + n])
+        i += n
+        assert len(output._pending) < 40
+    assert output.text() == expected
+    assert len(output) == len(expected)
@@ -0,0 +1,37 @@
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from python.helpers import tokens
+
+
+def test_batch_matches_single_counts():
+    texts = ["", "hello world", "def f(x):\n    return x * 2\n", "ünïcödé ✓ " * 50, "a" * 20_000]
+    tokens.clear_cache()
+    batch = tokens.count_tokens_batch(texts)
+    tokens.clear_cache()
+    assert batch == [tokens.count_tokens(t) for t in texts]
+    assert tokens.approximate_tokens_batch(texts) == [tokens.approximate_tokens(t) for t in texts]
+
+
+def test_repeated_strings_hit_the_cache():
+    tokens.clear_cache()
+    tokens.count_tokens("system prompt fragment")
+    tokens.count_tokens_batch(["system prompt fragment", "other"])
+    stats = tokens.get_cache_stats()
+    assert stats["hits"] == 1
+    assert stats["size"] == 2
+
+    tokens.count_tokens("x" * (tokens.CACHE_MAX_CHARS + 1))
+    assert tokens.get_cache_stats()["size"] == 2
+
+
+def test_estimate_is_close_to_encoder_for_prose():
+    text = "The quick brown fox jumps over the lazy dog. " * 40
+    assert tokens.estimate_tokens("") == 0
+    estimate = tokens.estimate_tokens(text)
+    exact = tokens.approximate_tokens(text)
+    assert 0.5 * exact <= estimate <= 2 * exact
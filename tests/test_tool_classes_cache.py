@@ -0,0 +1,50 @@
+import os
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from python.helpers import extract_tools
+from python.helpers.tool import Tool
+
+TOOL = """from python.helpers.tool import Tool
+
+class {name}(Tool):
+    pass
+"""
+
+
+def _write(file: Path, name: str, mtime_offset: int = 0):
+    file.write_text(TOOL.format(name=name))
+    if mtime_offset:
+        stat = os.stat(file)
+        os.utime(file, ns=(stat.st_atime_ns, stat.st_mtime_ns + mtime_offset))
+
+
+def test_tool_classes_are_cached_until_the_file_changes(tmp_path):
+    file = tmp_path / "cached_tool.py"
+    _write(file, "First")
+    extract_tools.reload_classes()
+    stats = extract_tools.get_classes_cache_stats()
+    hits, misses = stats["hits"], stats["misses"]
+
+    [first] = extract_tools.load_classes_from_file_cached(str(file), Tool)
+    assert first.__name__ == "First"
+    assert extract_tools.load_classes_from_file_cached(str(file), Tool) == [first]  # same class, not re-imported
+    stats = extract_tools.get_classes_cache_stats()
+    assert (stats["hits"] - hits, stats["misses"] - misses) == (1, 1)
+
+    # an edited file is imported again, the mtime is bumped in case the write lands in the same tick
+    _write(file, "Second", mtime_offset=1_000_000_000)
+    [second] = extract_tools.load_classes_from_file_cached(str(file), Tool)
+    assert second.__name__ == "Second"
+    assert extract_tools.get_classes_cache_stats()["misses"] - misses == 2
+
+    # dropped entries are imported again on next use, even when the file is unchanged
+    extract_tools.reload_classes(str(file))
+    [again] = extract_tools.load_classes_from_file_cached(str(file), Tool)
+    assert again.__name__ == "Second" and again is not second
+    extract_tools.reload_classes()
+    assert extract_tools.get_classes_cache_stats()["size"] == 0
@@ -55,6 +55,14 @@ const model = {
     }
   },
 
+  // Apply a state_push delta: changed/added contexts and ids of removed ones
+  applyContextsDelta(changedList, removedIds) {
+    const byId = new Map(this.contexts.map((ctx) => [ctx.id, ctx]));
+    for (const id of removedIds || []) byId.delete(id);
+    for (const ctx of changedList || []) byId.set(ctx.id, ctx);
+    this.applyContexts([...byId.values()]);
+  },
+
   // Select a chat
   async selectChat(id) {
     const currentContext = getContext();
@@ -28,6 +28,14 @@ const model = {
     }
   },
 
+  // Apply a state_push delta: changed/added tasks and ids of removed ones
+  applyTasksDelta(changedList, removedIds) {
+    const byId = new Map((this.tasks || []).map((task) => [task?.id, task]));
+    for (const id of removedIds || []) byId.delete(id);
+    for (const task of changedList || []) byId.set(task?.id, task);
+    this.applyTasks([...byId.values()]);
+  },
+
   // Update selected task and persist for tab restore
   setSelected(taskId) {
     this.selected = taskId || "";
@@ -72,6 +72,8 @@ const model = {
   runtimeEpoch: null,
   seqBase: 0,
   lastSeq: 0,
+  // seq of the last applied push, deltas must be based on it
+  lastAppliedSeq: 0,
 
   _setMode(newMode, reason = "") {
     const oldMode = this.mode;
@@ -414,6 +416,7 @@ const model = {
       if (typeof data.seq_base === "number" && Number.isFinite(data.seq_base)) {
         this.seqBase = data.seq_base;
         this.lastSeq = data.seq_base;
+        this.lastAppliedSeq = 0;
       }
 
       this.needsHandshake = false;
@@ -480,13 +483,28 @@ const model = {
       this.lastSeq = data.seq;
     }
 
+    const delta = data.delta && typeof data.delta === "object" ? data.delta : null;
+    if (delta && delta.base_seq !== this.lastAppliedSeq) {
+      // Contexts/tasks delta against a push this tab did not apply.
+      debug("[syncStore] delta base mismatch -> resync", {
+        lastAppliedSeq: this.lastAppliedSeq,
+        baseSeq: delta.base_seq,
+      });
+      this._setMode(SYNC_MODES.HANDSHAKE_PENDING, "delta base mismatch");
+      await this.sendStateRequest({ forceFull: true });
+      return;
+    }
+
     if (data.snapshot && typeof data.snapshot === "object") {
-      await applySnapshot(data.snapshot, {
+      const result = await applySnapshot(data.snapshot, {
+        delta,
         onLogGuidReset: async () => {
           debug("[syncStore] log_guid reset -> resync (forceFull)");
           await this.sendStateRequest({ forceFull: true });
         },
       });
+      // A skipped snapshot (e.g. context switch in progress) cannot be the base of the next delta.
+      this.lastAppliedSeq = result && result.listsApplied && typeof data.seq === "number" ? data.seq : -1;
       this._setMode(SYNC_MODES.HEALTHY, "push applied");
       await this._flushPendingReconnectToast();
     }
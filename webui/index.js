@@ -288,7 +288,8 @@ export function buildStateRequestPayload(options = {}) {
 }
 
 export async function applySnapshot(snapshot, options = {}) {
-  const { touchConnectionStatus = false, onLogGuidReset = null } = options || {};
+  // delta: contexts/tasks hold only changed entries (state_push after the first one)
+  const { touchConnectionStatus = false, onLogGuidReset = null, delta = null } = options || {};
 
   let updated = false;
 
@@ -354,11 +355,13 @@ export async function applySnapshot(snapshot, options = {}) {
 
   // Update chats list using store
   let contexts = snapshot.contexts || [];
-  chatsStore.applyContexts(contexts);
+  if (delta) chatsStore.applyContextsDelta(contexts, delta.contexts_removed);
+  else chatsStore.applyContexts(contexts);
 
   // Update tasks list using store
   let tasks = snapshot.tasks || [];
-  tasksStore.applyTasks(tasks);
+  if (delta) tasksStore.applyTasksDelta(tasks, delta.tasks_removed);
+  else tasksStore.applyTasks(tasks);
 
   // Make sure the active context is properly selected in both lists
   if (context) {
@@ -392,7 +395,7 @@ export async function applySnapshot(snapshot, options = {}) {
     // update message queue
     messageQueueStore.updateFromPoll();
 
-    return { updated };
+    return { updated, listsApplied: true };
   }
 
 export async function poll() {